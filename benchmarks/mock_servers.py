@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from email.utils import formatdate
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+Response = Tuple[int, Dict[str, str], bytes]
+Route = Callable[[str, str, Dict[str, str], bytes], Response]
+
+
+def load_fixture(name: str):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class MockServer:
+    """在本機背景執行緒上啟動的替身 HTTP 伺服器，可注入固定延遲；peak_in_flight 記錄同時處理中的最大請求數。"""
+
+    def __init__(self, route: Route, latency: float = 0.0):
+        self.route = route
+        self.latency = latency
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # keep-alive 連線上標頭與本文分兩次寫出時，Nagle 與延遲 ACK 會讓每個請求多等約 40ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self, method: str):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with server._lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    status, headers, payload = server.route(method, self.path, dict(self.headers), body)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def __enter__(self) -> "MockServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def _json(status: int, data, headers: Optional[Dict[str, str]] = None) -> Response:
+    return status, {"Content-Type": "application/json", **(headers or {})}, json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def hn_server(n_stories: int, latency: float = 0.0,
+              failures: Optional[Dict[int, Tuple[int, int]]] = None) -> MockServer:
+    """Hacker News Firebase API 替身：以錄製的 item 循環產生 n_stories 則近期文章。
+
+    failures 為 story id → (狀態碼, 失敗次數)，該 item 的前 N 次請求回傳此狀態碼 (N < 0 表示永遠失敗)；
+    各 item 被請求的次數記錄於 .hits。
+    """
+    items = load_fixture("hn_items.json")
+    now = int(time.time())
+    lock = threading.Lock()
+
+    def route(method, path, headers, body):
+        if path.endswith("/topstories.json"):
+            return _json(200, list(range(1, n_stories + 1)))
+        match = re.search(r"/item/(\d+)\.json$", path)
+        if not match:
+            return _json(404, None)
+        story_id = int(match.group(1))
+        with lock:
+            server.hits[story_id] = hits = server.hits.get(story_id, 0) + 1
+        status, times = (failures or {}).get(story_id, (200, 0))
+        if status != 200 and (times < 0 or hits <= times):
+            return _json(status, {"error": "mock failure"})
+        item = dict(items[story_id % len(items)])
+        item.update(id=story_id, time=now - (story_id * 37) % 43200)
+        if "title" in item:
+            item["title"] = f"{item['title']} #{story_id}"
+        return _json(200, item)
+
+    server = MockServer(route, latency)
+    server.hits = {}
+    return server
+
+
+def rss_server(items_per_feed: int, latency: float = 0.0) -> MockServer:
+    """RSS 替身：/feed/<k>.xml 以錄製的 entry 產生 feed，並支援 ETag 條件式 GET (304，次數記錄於 .not_modified)。"""
+    entries = load_fixture("rss_entries.json")
+    now = time.time()
+
+    def route(method, path, headers, body):
+        match = re.search(r"/feed/(\d+)\.xml$", path)
+        if not match:
+            return 404, {}, b""
+        feed_id = int(match.group(1))
+        etag = f'"feed-{feed_id}-v1"'
+        if headers.get("If-None-Match") == etag:
+            with server._lock:
+                server.not_modified += 1
+            return 304, {"ETag": etag}, b""
+
+        items = []
+        for i in range(items_per_feed):
+            entry = entries[(feed_id + i) % len(entries)]
+            items.append(
+                "<item>"
+                f"<title>{escape(entry['title'])} ({feed_id}-{i})</title>"
+                f"<link>{escape(entry['link'])}?f={feed_id}&amp;i={i}</link>"
+                f"<guid>feed-{feed_id}-item-{i}</guid>"
+                f"<description>{escape(entry['description'])}</description>"
+                f"<pubDate>{formatdate(now - i * 900)}</pubDate>"
+                "</item>"
+            )
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Mock Feed {feed_id}</title>{''.join(items)}</channel></rss>"
+        )
+        return 200, {"Content-Type": "application/rss+xml", "ETag": etag}, xml.encode("utf-8")
+
+    server = MockServer(route, latency)
+    server.not_modified = 0
+    return server
+
+
+def openai_server(latency: float = 0.0, rate_limit_every: int = 0,
+                  batch_reply: Optional[Callable[[list], object]] = None,
+                  fail_after: Optional[int] = None) -> MockServer:
+    """OpenAI Chat Completions 替身：依文章內容雜湊回放錄製的評分，可每 N 次回一次 429。
+
+    fail_after 指定後，成功回應 N 次之後的請求一律回 500，模擬評分途中服務中斷。
+
+    batch_reply 接收批次請求的正確結果列表，回傳實際送出的回覆內容，用來模擬缺漏、錯序或格式錯誤的批次回應；
+    批次請求的次數記錄於 .batches。
+    """
+    evaluations = load_fixture("llm_evaluations.json")
+    counter = {"n": 0, "ok": 0}
+    lock = threading.Lock()
+
+    def pick(payload: dict) -> dict:
+        digest = hashlib.md5(json.dumps(payload, sort_keys=True).encode("utf-8")).digest()
+        return evaluations[digest[0] % len(evaluations)]
+
+    def completion(content: dict) -> Response:
+        return _json(200, {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o-mini",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(content, ensure_ascii=False)},
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def route(method, path, headers, body):
+        if not path.endswith("/chat/completions"):
+            return _json(404, {"error": {"message": "not found"}})
+        with lock:
+            counter["n"] += 1
+            n = counter["n"]
+        if rate_limit_every and n % rate_limit_every == 0:
+            return _json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                         {"retry-after-ms": "200"})
+        if fail_after is not None:
+            with lock:
+                if counter["ok"] >= fail_after:
+                    return _json(500, {"error": {"message": "mock outage", "type": "server_error"}})
+                counter["ok"] += 1
+
+        request = json.loads(body)
+        user = json.loads(request["messages"][-1]["content"])
+        if "articles" in user:
+            results = [
+                {**pick({k: v for k, v in a.items() if k != "id"}), "id": a["id"]}
+                for a in user["articles"]
+            ]
+            with lock:
+                server.batches += 1
+            return completion(batch_reply(results) if batch_reply else {"results": results})
+        return completion(pick(user))
+
+    server = MockServer(route, latency)
+    server.batches = 0
+    return server
+
+
+def telegram_server(latency: float = 0.0, rate_limit_every: int = 0, retry_after: int = 1,
+                    fail_chats: Tuple[str, ...] = (), fail_status: int = 403) -> MockServer:
+    """Telegram Bot API 替身：記錄 sendMessage 呼叫於 .sent，可每 N 次回一次 429 或讓指定群組永遠回傳 fail_status。"""
+    counter = {"n": 0}
+    lock = threading.Lock()
+
+    def route(method, path, headers, body):
+        parsed = urlparse(path)
+        if not parsed.path.endswith("/sendMessage"):
+            return _json(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        if body:
+            params.update({k: v[-1] for k, v in parse_qs(body.decode("utf-8")).items()})
+        chat_id = params.get("chat_id", "")
+
+        with lock:
+            counter["n"] += 1
+            n = counter["n"]
+        if rate_limit_every and n % rate_limit_every == 0:
+            return _json(429, {
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after},
+            })
+        if chat_id in fail_chats:
+            description = "Forbidden: bot was kicked" if fail_status == 403 else "Internal Server Error"
+            return _json(fail_status, {"ok": False, "error_code": fail_status, "description": description})
+
+        with lock:
+            server.sent.append((chat_id, params.get("text", "")))
+            message_id = len(server.sent)
+        return _json(200, {"ok": True, "result": {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id) if chat_id.lstrip("-").isdigit() else 0, "type": "group"},
+            "text": params.get("text", ""),
+        }})
+
+    server = MockServer(route, latency)
+    server.sent = []
+    return server
@@ -0,0 +1,257 @@
+"""管線效能基準測試：以本地替身伺服器回放錄製資料，量測各階段的延遲與吞吐量。
+
+用法：
+    python -m benchmarks.run_benchmarks --scales 100 1000 10000 --latency 0.05 --output bench_results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, List
+
+import numpy as np
+
+from benchmarks.mock_servers import hn_server, openai_server, rss_server
+
+ITEMS_PER_FEED = 50
+
+
+class Recorder:
+    def __init__(self, verbose: bool):
+        self.results: List[dict] = []
+        self.verbose = verbose
+
+    def measure(self, stage: str, scale: int, mode: str, items: int, fn: Callable):
+        """執行 fn 並記錄耗時；各模組的 print 在量測期間會被靜音。"""
+        sink = sys.stdout if self.verbose else io.StringIO()
+        with contextlib.redirect_stdout(sink):
+            start = time.perf_counter()
+            value = fn()
+            seconds = time.perf_counter() - start
+        record = {
+            "stage": stage,
+            "scale": scale,
+            "mode": mode,
+            "items": items,
+            "seconds": round(seconds, 6),
+            "items_per_sec": round(items / seconds, 2) if seconds > 0 else None,
+        }
+        self.results.append(record)
+        print(f"  {stage:<8} scale={scale:<6} {mode:<22} {items:>6} 筆  {seconds:8.3f}s")
+        return value
+
+
+def _synthetic_embeddings(n: int, dim: int = 384, dup_ratio: float = 0.3, seed: int = 0) -> np.ndarray:
+    """無法載入模型時使用：含一定比例近似重複的隨機向量，只用於量測分群階段。"""
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    dups = rng.random(n) < dup_ratio
+    sources = rng.integers(0, max(1, n), size=n)
+    vectors[dups] = vectors[sources[dups]] + 0.1 * rng.normal(size=(int(dups.sum()), dim))
+    return vectors
+
+
+def simulate_prescreen(days: int = 30, per_day: int = 200, top_k: int = 40, dim: int = 64,
+                       noise: float = 4.0, seed: int = 0) -> dict:
+    """離線模擬 PreScreener：每天產生 per_day 篇合成文章，其「LLM 分數」為 embedding 的隱藏線性函數加雜訊。
+
+    每天只把預篩選保留的候選「送評」並記錄為訓練樣本，比較候選中的 top 3 與全部文章的 top 3 是否相同；
+    線性模型擬合前 (原型比對的冷啟動期) 與擬合後分開統計。
+    """
+    from src.models.article_batch import make_article
+    from src.models.schemas import EvaluationResult, ScoredArticle
+    from src.scoring.prescreen import PreScreener
+
+    rng = np.random.default_rng(seed)
+    weights = rng.normal(size=dim)
+    weights /= np.linalg.norm(weights)
+    prototypes = {}
+
+    def encode(texts):
+        return np.stack([prototypes.setdefault(t, rng.normal(size=dim)) for t in texts]).astype(np.float32)
+
+    screener = PreScreener(encode, top_k=top_k,
+                           samples_path=os.path.join(tempfile.mkdtemp(prefix="bench-prescreen-"), "samples.npz"))
+    now = datetime.now(timezone.utc)
+    stats = {phase: {"days": 0, "top3_unchanged": 0, "sent": 0, "total": 0} for phase in ("cold", "trained")}
+    for day in range(days):
+        embeddings = rng.normal(size=(per_day, dim)).astype(np.float32)
+        unit = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        true_scores = np.clip(50 + 120 * unit @ weights + rng.normal(scale=noise, size=per_day), 0, 100).round()
+        articles = [make_article(f"day {day} item {i}", f"https://sim.example/{day}/{i}", "sim", now, "")
+                    for i in range(per_day)]
+        row = {a.url: i for i, a in enumerate(articles)}
+
+        phase = stats["trained" if screener._weights is not None else "cold"]
+        candidates, candidate_embs = screener.select(articles, embeddings)
+        rows = [row[a.url] for a in candidates]
+        best = set(np.argsort(-true_scores, kind="stable")[:3].tolist())
+        kept = set(sorted(rows, key=lambda i: (-true_scores[i], i))[:3])
+        phase["days"] += 1
+        phase["top3_unchanged"] += best == kept
+        phase["sent"] += len(candidates)
+        phase["total"] += per_day
+
+        scored = [
+            ScoredArticle.model_construct(article=a, evaluation=EvaluationResult.model_construct(
+                total_score=int(true_scores[row[a.url]])))
+            for a in candidates
+        ]
+        screener.record(candidates, candidate_embs, scored)
+
+    return {
+        f"{name}_{key}": round(value["sent"] / value["total"], 4) if key == "llm_fraction" else value[key]
+        for name, value in stats.items() if value["days"]
+        for key in ("days", "top3_unchanged", "llm_fraction")
+    }
+
+
+def run(args) -> dict:
+    recorder = Recorder(args.verbose)
+
+    with hn_server(max(args.scales), args.latency) as hn, \
+            rss_server(ITEMS_PER_FEED, args.latency) as rss, \
+            openai_server(args.llm_latency, args.rate_limit_every) as llm:
+        os.environ["HN_API_BASE"] = f"{hn.url}/v0"
+        os.environ["OPENAI_BASE_URL"] = f"{llm.url}/v1"
+        os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+        # 在設定好替身端點之後才載入專案模組
+        from src.data_ingestion import hn_scraper, rss_parser
+        from src.filtering.clustering import GreedyClusterer
+        from src.filtering.dedup_engine import ArticleFilter
+        from src.filtering.exact_dedup import ExactDeduper
+        from src.notifications.broadcaster import format_daily_briefing
+        from src.scoring.eval_cache import EvaluationCache
+        from src.scoring.llm_evaluator import evaluate_events_async
+
+        engine = ArticleFilter(use_cache=False, use_history=False)
+        model_available = True
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                engine.model
+        except Exception as e:
+            model_available = False
+            print(f"[Bench] 無法載入語意模型，embed 階段略過、cluster 改用合成向量: {e}")
+
+        for scale in args.scales:
+            print(f"\n=== scale {scale} ===")
+
+            # ── fetch：HN (上限為 MAX_IDS_TO_SCAN) 與 RSS ──
+            hn_scraper.MAX_IDS_TO_SCAN = scale
+            hn_modes = [("concurrent", hn_scraper.MAX_WORKERS)]
+            if args.baseline:
+                hn_modes.append(("sequential", 1))
+            for mode, workers in hn_modes:
+                recorder.measure("fetch_hn", scale, mode, scale,
+                                 lambda: hn_scraper.fetch_hn_ai_stories(max_workers=workers, stage_timeout=3600))
+
+            feeds = [
+                {"url": f"{rss.url}/feed/{k}.xml", "name": f"Mock Feed {k}"}
+                for k in range(max(1, scale // ITEMS_PER_FEED))
+            ]
+            batch = recorder.measure("fetch_rss", scale, "concurrent_cold", scale,
+                                     lambda: rss_parser.fetch_official_rss_batch(feeds=feeds))
+            recorder.measure("fetch_rss", scale, "concurrent_304", scale,
+                             lambda: rss_parser.fetch_official_rss_batch(feeds=feeds))
+            if args.baseline:
+                recorder.measure("fetch_rss", scale, "sequential_nocache", scale,
+                                 lambda: rss_parser.fetch_official_rss_batch(feeds=feeds, max_workers=1, use_cache=False))
+
+            # ── clean / embed / cluster ──
+            batch = batch.take(range(min(scale, len(batch))))
+            cleaned, texts = recorder.measure("clean", scale, "html_parser", len(batch),
+                                              lambda: engine.clean(batch))
+            recorder.measure("exact_dedup", scale, "url_title_simhash", len(texts),
+                             lambda: ExactDeduper().add(cleaned.urls, cleaned.titles, texts, 0))
+            if model_available:
+                embeddings = recorder.measure("embed", scale, engine.backend, len(texts),
+                                              lambda: engine._encode_texts(texts))
+            else:
+                embeddings = _synthetic_embeddings(len(texts))
+
+            def cluster():
+                clusterer = GreedyClusterer(ArticleFilter.SIMILARITY_THRESHOLD)
+                clusterer.add(embeddings)
+                return clusterer.rep_ids
+
+            reps = recorder.measure("cluster", scale, "blocked_matmul", len(embeddings), cluster)
+
+            # ── score：固定上限篇數，比較逐篇 / 批次 / 快取命中 ──
+            to_score = cleaned.take(reps[: args.score_limit]).to_articles()
+            if not to_score:
+                continue
+            cache_path = os.path.join(tempfile.mkdtemp(prefix="bench-llm-"), "cache.sqlite3")
+            scored = []
+            for mode, batch_size, cache in [
+                ("single", 1, None),
+                (f"batch{args.batch_size}", args.batch_size, None),
+                ("cache_cold", 1, EvaluationCache(cache_path)),
+                ("cache_warm", 1, EvaluationCache(cache_path)),
+            ]:
+                scored = recorder.measure(
+                    "score", scale, mode, len(to_score),
+                    lambda: asyncio.run(evaluate_events_async(
+                        to_score, max_concurrency=args.concurrency, cache=cache, batch_size=batch_size,
+                    )),
+                )
+                if cache:
+                    cache.close()
+
+            top = scored[:20]
+            recorder.measure("format", scale, "top20", len(top),
+                             lambda: format_daily_briefing(top))
+
+            # ── prescreen：離線模擬，最終 top 3 是否與全部送評時相同 ──
+            per_day = min(scale, 1000)
+            quality = recorder.measure("prescreen", scale, "simulated_30d", 30 * per_day,
+                                       lambda: simulate_prescreen(days=30, per_day=per_day))
+            recorder.results[-1].update(quality)
+            print(f"           top3 不變 {quality.get('trained_top3_unchanged', 0)}/{quality.get('trained_days', 0)} 天 "
+                  f"(線性模型)，送評比例 {quality.get('trained_llm_fraction', 1.0):.1%}")
+
+        return {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "latency": args.latency,
+                "llm_latency": args.llm_latency,
+                "concurrency": args.concurrency,
+                "model_available": model_available,
+                "mock_requests": {"hn": hn.requests, "rss": rss.requests, "llm": llm.requests},
+            },
+            "results": recorder.results,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yoyo AI 管線效能基準測試")
+    parser.add_argument("--scales", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--latency", type=float, default=0.05, help="HN / RSS 替身伺服器的注入延遲 (秒)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="LLM 替身伺服器的注入延遲 (秒)")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="每 N 次 LLM 請求回一次 429")
+    parser.add_argument("--score-limit", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--baseline", action="store_true", help="同時量測序列 (未並發) 版本作為對照")
+    parser.add_argument("--output", help="將結果寫入 JSON 檔；未指定時輸出到 stdout")
+    parser.add_argument("--verbose", action="store_true", help="顯示各模組的 print 輸出")
+    args = parser.parse_args()
+
+    os.environ["YOYO_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench-cache-")
+    report = run(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n[Bench] 結果已寫入 {args.output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
@@ -1,70 +1,285 @@
+import argparse
 import os
+from typing import List, Optional
+
 from dotenv import load_dotenv
 
-from src.data_ingestion.hn_scraper import fetch_hn_ai_stories
-from src.data_ingestion.rss_parser import fetch_official_rss
+from src.data_ingestion.cursors import IngestState
+from src.data_ingestion.scheduler import IngestionScheduler
+from src.data_ingestion.sources import load_sources
 from src.filtering.dedup_engine import ArticleFilter
+from src.models.article_batch import ArticleBatch
+from src.models.schemas import RawArticle, ScoredArticle
+from src.pipeline.checkpoint import STAGES, IncompleteStageError, RunCheckpoint
+from src.pipeline.daemon import run_daemon
+from src.pipeline.streaming import run_streaming_pipeline
 from src.scoring.llm_evaluator import evaluate_events
-from src.notifications.broadcaster import format_daily_briefing, send_telegram_broadcast
+from src.scoring.prescreen import PreScreener
+from src.notifications.audiences import default_top_n, group_deliveries, load_audiences, plan_briefings
+from src.notifications.broadcaster import send_briefings
+from src.utils import metrics
 
 
-if __name__ == "__main__":
-    load_dotenv()
+def _exit_without_articles(scheduler: IngestionScheduler):
+    if scheduler.state is not None:
+        # 增量模式下沒有新內容是正常情況：保存游標後正常結束
+        scheduler.commit()
+        print("\n✅ 增量模式：沒有新文章，本輪結束")
+        exit(0)
+    print("\n❌ 沒有採集到任何文章，系統終止")
+    exit(1)
 
-    print("=" * 60)
-    print("  🚀 Yoyo AI 商業情報系統 2.0 — 啟動")
-    print("=" * 60)
 
-    # ── 階段 1：數據採集 ──
-    print("\n📡 【階段 1/4】數據採集中 ...")
-    all_articles = []
+def _reuse(checkpoint: Optional[RunCheckpoint], stage: str, only_stage: Optional[str]) -> bool:
+    """是否直接讀回此階段的 artifact：單獨執行某階段時其前置階段一律讀回，否則沿用已完成的階段。"""
+    if checkpoint is None:
+        return False
+    if only_stage:
+        return STAGES.index(stage) < STAGES.index(only_stage)
+    return checkpoint.completed(stage)
 
-    for name, fetcher, kwargs in [
-        ("Hacker News", fetch_hn_ai_stories, {"hours": 24}),
-        ("RSS Feeds", fetch_official_rss, {"hours": 24}),
-    ]:
-        try:
-            results = fetcher(**kwargs)
-            all_articles.extend(results)
-            print(f"  ✅ {name}: {len(results)} 篇")
-        except Exception as e:
-            print(f"  ❌ {name} 失敗: {e}")
 
-    print(f"  📊 採集總計: {len(all_articles)} 篇原始文章")
+def run_staged(scheduler: IngestionScheduler, dedup_engine: ArticleFilter,
+               checkpoint: Optional[RunCheckpoint] = None,
+               only_stage: Optional[str] = None) -> Optional[List[ScoredArticle]]:
+    """分階段模式：採集 → 去重 → 預篩選 → 評分，每個階段完成後才進入下一階段。
 
-    if not all_articles:
-        print("\n❌ 沒有採集到任何文章，系統終止")
-        exit(1)
+    傳入 checkpoint 時每個階段完成後寫入 artifact，重跑同一 run id 會從上次完成的階段接續；
+    only_stage 只執行指定階段 (以前一階段的 artifact 為輸入)；只執行採集或去重時回傳 None。
+    使用 checkpoint 時若有候選文章評分失敗，拋出 IncompleteStageError 而不標記評分階段完成。
+    """
+    # ── 階段 1：數據採集 ──
+    if _reuse(checkpoint, "ingest", only_stage):
+        all_articles = checkpoint.load_ingest()
+        print(f"\n♻️ 【階段 1/4】沿用 run {checkpoint.run_id} 的採集結果: {len(all_articles)} 篇")
+    else:
+        print("\n📡 【階段 1/4】數據採集中 ...")
+        with metrics.span("stage", stage="ingest"):
+            results = scheduler.collect()
+        all_articles = ArticleBatch.concat(ArticleBatch.from_articles(r) for r in results.values())
+        print(f"  📊 採集總計: {len(all_articles)} 篇原始文章")
+
+        if not all_articles:
+            _exit_without_articles(scheduler)
+        if checkpoint is not None:
+            checkpoint.save_ingest(all_articles)
+            checkpoint.invalidate_after("ingest")
+    if only_stage == "ingest":
+        return None
 
     # ── 階段 2：語意去重 ──
-    print("\n🔬 【階段 2/4】語意去重中 ...")
-    dedup_engine = ArticleFilter()
-    unique_articles = dedup_engine.process(all_articles)
+    if _reuse(checkpoint, "dedup", only_stage):
+        unique_articles, embeddings = checkpoint.load_dedup()
+        dedup_engine.defer_history(embeddings, [a.title for a in unique_articles])
+        print(f"\n♻️ 【階段 2/4】沿用 run {checkpoint.run_id} 的去重結果: {len(unique_articles)} 篇")
+    else:
+        print("\n🔬 【階段 2/4】語意去重中 ...")
+        with metrics.span("stage", stage="dedup"):
+            unique_articles = dedup_engine.process(all_articles)
+        embeddings = dedup_engine.last_embeddings
+        if checkpoint is not None:
+            checkpoint.save_dedup(unique_articles, embeddings)
+            checkpoint.invalidate_after("dedup")
+    if only_stage == "dedup":
+        return None
 
     # ── 階段 3：LLM 量化評分 ──
-    print(f"\n🧠 【階段 3/4】LLM 評分中 ({len(unique_articles)} 篇送入) ...")
-    all_scored = evaluate_events(unique_articles)
+    if _reuse(checkpoint, "score", only_stage):
+        all_scored = checkpoint.load_scores()
+        print(f"\n♻️ 【階段 3/4】沿用 run {checkpoint.run_id} 的評分結果: {len(all_scored)} 篇")
+        return all_scored
+
+    prescreener = PreScreener(dedup_engine.encode)
+    candidates, candidate_embs = prescreener.select(unique_articles, embeddings)
+
+    done = checkpoint.partial_scores() if checkpoint is not None else {}
+    remaining = [a for a in candidates if a.url not in done]
+    print(f"\n🧠 【階段 3/4】LLM 評分中 ({len(remaining)} 篇送入) ...")
+    if len(remaining) < len(candidates):
+        print(f"  ♻️ 沿用中斷前已完成的 {len(candidates) - len(remaining)} 篇評分")
+    failed: List[RawArticle] = []
+    with metrics.span("stage", stage="score"):
+        scored = evaluate_events(
+            remaining,
+            on_result=checkpoint.record_score if checkpoint else None,
+            on_error=failed.append,
+        )
+    if failed:
+        print(f"  ⚠️ {len(failed)} 篇評分失敗: {', '.join(a.title[:30] for a in failed[:5])}")
+        if checkpoint is not None:
+            # 已完成的評分留在 partial ledger；不寫入 score artifact，重跑時只補評失敗的文章
+            raise IncompleteStageError(f"run {checkpoint.run_id} 有 {len(failed)} 篇候選文章評分失敗")
+    all_scored = sorted(
+        [done[a.url] for a in candidates if a.url in done] + scored,
+        key=lambda s: s.evaluation.total_score,
+        reverse=True,
+    )
+    prescreener.record(candidates, candidate_embs, all_scored)
+    if checkpoint is not None:
+        checkpoint.save_scores(all_scored)
+        checkpoint.invalidate_after("score")
+    return all_scored
+
+
+def run_streamed(scheduler: IngestionScheduler, dedup_engine: ArticleFilter):
+    """管線模式：採集、去重與評分重疊進行。"""
+    print("\n📡🔬🧠 【階段 1-3/4】管線模式：採集、去重與評分同時進行 ...")
+    with metrics.span("stage", stage="pipeline"):
+        all_scored, stats = run_streaming_pipeline(scheduler, dedup_engine)
 
-    # ── 篩選與降級邏輯 ──
-    qualified = [s for s in all_scored if s.evaluation.is_qualified]
+    if not stats["raw"]:
+        _exit_without_articles(scheduler)
+    return all_scored
 
-    if qualified:
-        is_downgraded = False
-        top_articles = qualified[:3]
-        print(f"\n🏆 S 級情報命中！共 {len(qualified)} 篇達標，取前 3 名")
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Yoyo AI 商業情報系統 2.0")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="管線模式：採集、去重與評分同時進行，以縮短整體執行時間",
+    )
+    parser.add_argument(
+        "--sources",
+        default=None,
+        help="資料源設定檔路徑 (預設 sources.json，可用 SOURCES_CONFIG 設定)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量採集：依各資料源的游標與已見 URL 只處理上次執行後的新內容 (適合每小時執行)；"
+        "注意單次執行的簡報 top-N 只從這次的新增內容挑選，要整天累積候選請改用 --daemon",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="常駐服務模式：定期增量採集、整天累積候選，於排定時間廣播 (隱含 --incremental)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="常駐模式的採集間隔 (分鐘，預設 60，可用 DAEMON_INGEST_MINUTES 設定)",
+    )
+    parser.add_argument(
+        "--broadcast-at",
+        default=None,
+        help="常駐模式的廣播時間，逗號分隔的 HH:MM (預設 10:30，可用 DAEMON_BROADCAST_AT 設定)",
+    )
+    parser.add_argument(
+        "--run-id",
+        default=os.environ.get("PIPELINE_RUN_ID"),
+        help="啟用檢查點：各階段結果保存於此 run id 下，重跑時從上次完成的階段接續 (可用 PIPELINE_RUN_ID 設定)",
+    )
+    parser.add_argument(
+        "--stage",
+        choices=STAGES,
+        default=None,
+        help="只執行指定階段，以同一 run id 下前一階段的 artifact 為輸入 (需搭配 --run-id)",
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="啟用各階段耗時與計數器統計，結束時輸出 JSON 執行報告 (同 METRICS_ENABLED=1)",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=default_top_n(),
+        help="每日簡報收錄的文章數 (預設 3，可用 BRIEFING_TOP_N 設定)；過長時自動分段發送",
+    )
+    parser.add_argument(
+        "--audiences",
+        default=None,
+        help="受眾設定檔路徑 (預設 audiences.json，可用 AUDIENCES_CONFIG 設定)；不存在時全部群組收到同一份簡報",
+    )
+    args = parser.parse_args()
+    if args.stage and not args.run_id:
+        parser.error("--stage 需要搭配 --run-id")
+    if args.run_id and (args.stream or args.daemon):
+        parser.error("--run-id 僅支援分階段模式，不可與 --stream / --daemon 併用")
+    if args.metrics:
+        metrics.enable()
+
+    print("=" * 60)
+    print("  🚀 Yoyo AI 商業情報系統 2.0 — 啟動")
+    print("=" * 60)
+
+    state = IngestState() if args.incremental or args.daemon else None
+    scheduler = IngestionScheduler(load_sources(args.sources), state=state)
+    print(f"  📋 資料源: {', '.join(s.name for s in scheduler.sources)}")
+    dedup_engine = ArticleFilter()
+    # 先讀受眾設定，設定有誤時在採集與評分之前就失敗
+    audiences = load_audiences(args.audiences, default_top_n=args.top)
+    print(f"  👥 受眾: {', '.join(p.name for p in audiences)}")
+
+    if args.daemon:
+        daemon_options = {"top_n": args.top, "audiences": audiences}
+        if args.interval is not None:
+            daemon_options["interval_minutes"] = args.interval
+        if args.broadcast_at:
+            daemon_options["broadcast_at"] = args.broadcast_at
+        run_daemon(scheduler, dedup_engine, **daemon_options)
+        exit(0)
+
+    checkpoint = RunCheckpoint(args.run_id) if args.run_id else None
+    if args.stream:
+        all_scored = run_streamed(scheduler, dedup_engine)
     else:
-        is_downgraded = True
-        top_articles = all_scored[:3]
-        print("\n⚠️ 今日無 S 級情報，啟動降級播報 (Top 3 潛力事件)")
+        try:
+            all_scored = run_staged(scheduler, dedup_engine, checkpoint, args.stage)
+        except FileNotFoundError as e:
+            print(f"\n❌ {e}，請先執行前一階段")
+            exit(1)
+        except IncompleteStageError as e:
+            dedup_engine.save_cache()
+            metrics.export()
+            print(f"\n❌ {e}，請以同一 run id 重跑以補齊")
+            exit(1)
+        if args.stage in ("ingest", "dedup", "score"):
+            dedup_engine.save_cache()
+            metrics.export()
+            print(f"\n✅ 已完成 {args.stage} 階段 (run {checkpoint.run_id})")
+            exit(0)
+
+    if checkpoint is not None and checkpoint.completed("broadcast") and args.stage != "broadcast":
+        print(f"\n✅ run {checkpoint.run_id} 已廣播過，不重複發送")
+        exit(0)
 
-    # ── 階段 4：格式化與廣播 ──
+    # ── 階段 4：依受眾篩選、格式化與廣播 ──
+    # 評分只做一次；每個受眾只是對同一份結果做挑選，挑選相同的受眾共用渲染好的訊息
     print("\n📢 【階段 4/4】格式化與廣播 ...")
-    message = format_daily_briefing(top_articles, is_downgraded=is_downgraded)
-    print("\n--- 預覽訊息 ---")
-    print(message)
-    print("--- 預覽結束 ---\n")
+    with metrics.span("stage", stage="format"):
+        briefings = plan_briefings(all_scored, audiences)
+    for briefing in briefings:
+        profile = briefing.profile
+        if briefing.is_downgraded:
+            print(f"\n⚠️ [{profile.name}] 無達標情報，啟動降級播報 (Top {len(briefing.articles)} 潛力事件)")
+        else:
+            print(f"\n🏆 [{profile.name}] 命中 {len(briefing.articles)} 篇達標情報 → {len(profile.chat_ids)} 個群組")
 
-    send_telegram_broadcast(message)
+    previewed = set()
+    for briefing in briefings:
+        if id(briefing.messages) in previewed:
+            continue
+        previewed.add(id(briefing.messages))
+        print(f"\n--- 預覽訊息 [{briefing.profile.name}] (共 {len(briefing.messages)} 則) ---")
+        print("\n\n".join(briefing.messages))
+        print("--- 預覽結束 ---\n")
+
+    with metrics.span("stage", stage="broadcast"):
+        stats = send_briefings(group_deliveries(briefings))
+    if not stats["failed"] and (stats["sent"] or stats["skipped"] or stats["dropped"]):
+        if checkpoint is not None:
+            checkpoint.save_broadcast({b.profile.name: b.messages for b in briefings}, stats)
+        dedup_engine.commit_history()
+        scheduler.commit()
+    else:
+        # 沒有全部送達：不寫入歷史索引與增量游標，重跑時這些事件仍會被採集與播報
+        print("\n⚠️ 廣播未全部送達，本輪不寫入歷史索引與增量游標")
+    metrics.export()
 
     print("\n" + "=" * 60)
     print("  🏁 Yoyo AI 全域情報系統 2.0 — 任務完成")
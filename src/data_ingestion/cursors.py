@@ -0,0 +1,56 @@
+import threading
+from typing import Dict
+
+from src.utils.bloom import BloomFilter
+from src.utils.local_cache import cache_path, load_json, save_json
+
+CURSORS_FILE = "ingest_cursors.json"
+SEEN_URLS_FILE = "seen_urls.npz"
+PREVIOUS_SEEN_URLS_FILE = "seen_urls.prev.npz"
+BLOOM_CAPACITY = 200_000
+BLOOM_ERROR_RATE = 0.001
+
+
+class IngestState:
+    """增量採集的持久化狀態：各資料源的游標 (high-water mark / GUID 集合) 與已見 URL 的 Bloom filter。
+
+    Bloom filter 以兩代輪替：目前這代滿了就降為上一代，查詢時兩代都比對，
+    因此記憶體有上限，且最舊的 URL 會隨輪替自然淘汰。
+    與歷史索引相同，狀態只在 commit() 時落盤，失敗的執行不會讓文章被當成已處理。
+    """
+
+    def __init__(self):
+        self.cursors_path = cache_path(CURSORS_FILE)
+        self.bloom_path = cache_path(SEEN_URLS_FILE)
+        self.previous_path = cache_path(PREVIOUS_SEEN_URLS_FILE)
+        self._cursors: Dict[str, dict] = load_json(self.cursors_path, {})
+        self.seen = BloomFilter.load(self.bloom_path) or BloomFilter(BLOOM_CAPACITY, BLOOM_ERROR_RATE)
+        self.previous = BloomFilter.load(self.previous_path)
+        self._lock = threading.Lock()
+        self._rotated = False
+
+    def cursor(self, source_name: str) -> dict:
+        """回傳資料源的游標 dict；資料源直接就地更新，由 commit() 一併保存。"""
+        return self._cursors.setdefault(source_name, {})
+
+    def is_seen(self, url: str) -> bool:
+        return url in self.seen or (self.previous is not None and url in self.previous)
+
+    def mark_new(self, url: str) -> bool:
+        """URL 未見過時記錄並回傳 True；已見過 (含 Bloom 誤判) 回傳 False。"""
+        with self._lock:
+            if self.is_seen(url):
+                return False
+            if self.seen.is_full:
+                self.previous, self.seen = self.seen, BloomFilter(BLOOM_CAPACITY, BLOOM_ERROR_RATE)
+                self._rotated = True
+            self.seen.add(url)
+            return True
+
+    def commit(self) -> None:
+        with self._lock:
+            save_json(self.cursors_path, self._cursors)
+            if self._rotated and self.previous is not None:
+                self.previous.save(self.previous_path)
+                self._rotated = False
+            self.seen.save(self.bloom_path)
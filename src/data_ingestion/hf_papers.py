@@ -0,0 +1,63 @@
+import os
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+import requests
+
+from src.models.article_batch import make_article
+from src.models.schemas import RawArticle
+from src.utils import metrics
+
+# 預設 API 位址；抓取時讀取 HF_API_BASE 覆寫 (例如指向本地替身伺服器)
+HF_API_BASE = "https://huggingface.co/api"
+HF_PAPER_URL = "https://huggingface.co/papers/{}"
+REQUEST_TIMEOUT = 15
+SOURCE_NAME = "HF Daily Papers"
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+    except ValueError:
+        return None
+
+
+def iter_hf_daily_papers(date: Optional[str] = None, limit: int = 50,
+                         min_upvotes: int = 0) -> Iterator[RawArticle]:
+    """抓取 Hugging Face Daily Papers (預設為最新一天)，依社群投票數由高到低產出。"""
+    params = {"limit": limit}
+    if date:
+        params["date"] = date
+
+    with metrics.span("http_request", source="hf_papers"):
+        api_base = os.environ.get("HF_API_BASE") or HF_API_BASE
+        resp = requests.get(f"{api_base}/daily_papers", params=params, timeout=REQUEST_TIMEOUT)
+    resp.raise_for_status()
+
+    items = resp.json()
+    items.sort(key=lambda item: (item.get("paper") or {}).get("upvotes", 0), reverse=True)
+    for item in items[:limit]:
+        paper = item.get("paper") or {}
+        paper_id = paper.get("id")
+        title = (item.get("title") or paper.get("title") or "").strip()
+        if not paper_id or not title or paper.get("upvotes", 0) < min_upvotes:
+            continue
+        published = _parse_time(item.get("publishedAt")) or _parse_time(paper.get("publishedAt"))
+        summary = item.get("summary") or paper.get("summary") or title
+        yield make_article(
+            title=title,
+            url=HF_PAPER_URL.format(paper_id),
+            source=SOURCE_NAME,
+            published_at=published or datetime.now(timezone.utc),
+            content_snippet=" ".join(summary.split())[:500],
+        )
+
+
+def fetch_hf_daily_papers(date: Optional[str] = None, limit: int = 50,
+                          min_upvotes: int = 0) -> List[RawArticle]:
+    """抓取 Hugging Face Daily Papers，回傳 RawArticle 列表。"""
+    articles = list(iter_hf_daily_papers(date=date, limit=limit, min_upvotes=min_upvotes))
+    print(f"[HF Papers] 抓取完成：共 {len(articles)} 篇論文")
+    return articles
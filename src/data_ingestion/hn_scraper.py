@@ -1,14 +1,20 @@
+import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
 from datetime import datetime, timezone, timedelta
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from src.models.article_batch import make_article
 from src.models.schemas import RawArticle
+from src.utils import metrics
 
-HN_TOP_STORIES_URL = "https://hacker-news.firebaseio.com/v0/topstories.json"
-HN_ITEM_URL = "https://hacker-news.firebaseio.com/v0/item/{}.json"
+# 預設 API 位址；抓取時讀取 HN_API_BASE 覆寫，可指向本地的替身伺服器 (例如 benchmarks 的 mock server)
+HN_API_BASE = "https://hacker-news.firebaseio.com/v0"
 
 AI_KEYWORDS = re.compile(
     r"\b(launch|show.hn|funding|startup|revenue|acquisition|"
@@ -17,57 +23,193 @@ AI_KEYWORDS = re.compile(
 )
 
 REQUEST_TIMEOUT = 10
-MAX_IDS_TO_SCAN = 120
+MAX_IDS_TO_SCAN = 500
 
+# 並發抓取設定：共用同一個 keep-alive Session，避免每個 item 重新建立連線
+MAX_WORKERS = 32
+STAGE_TIMEOUT = 60
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.5
 
-def fetch_hn_ai_stories(hours: int = 24) -> List[RawArticle]:
-    """從 Hacker News 抓取過去 N 小時內與 AI 相關的熱門文章。"""
+
+def _build_session(pool_size: int) -> requests.Session:
+    """建立連線池大小與並發數一致的共用 Session。"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _is_retryable(error: requests.RequestException) -> bool:
+    """連線錯誤、逾時與 5xx / 429 可能是暫時性的；其他 4xx 或內容錯誤重試也不會成功。"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, "response", None)
+    if isinstance(error, requests.HTTPError) and response is not None:
+        return response.status_code >= 500 or response.status_code == 429
+    return False
+
+
+def _get_json(session: requests.Session, url: str, deadline: float):
+    """對暫時性錯誤做有限次數的退避重試，且不會超過整體階段的截止時間。"""
+    for attempt in range(MAX_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("已超過階段截止時間")
+        try:
+            with metrics.span("http_request", source="hn"):
+                resp = session.get(url, timeout=min(REQUEST_TIMEOUT, remaining))
+                resp.raise_for_status()
+            return resp.json()
+        except requests.RequestException as e:
+            if attempt == MAX_RETRIES or not _is_retryable(e):
+                raise
+            metrics.incr("retries", source="hn")
+            # 退避時間同樣受截止時間限制；醒來後由迴圈開頭的檢查結束重試
+            time.sleep(min(RETRY_BACKOFF * (2 ** attempt), max(0.0, deadline - time.monotonic())))
+
+
+def _close_when_idle(executor: ThreadPoolExecutor, session: requests.Session) -> None:
+    """取消尚未開始的請求；仍在執行的 worker 可能還在使用 Session，等它們結束後才在背景關閉。"""
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    def close() -> None:
+        executor.shutdown(wait=True)
+        session.close()
+
+    threading.Thread(target=close, name="hn-session-close", daemon=True).start()
+
+
+def _to_article(item: Optional[dict], story_id: int, cutoff: datetime) -> Optional[RawArticle]:
+    """將 HN item 轉為 RawArticle；不符合時間窗口或關鍵字者回傳 None。"""
+    if not item or item.get("type") != "story":
+        return None
+
+    title = item.get("title", "")
+    url = item.get("url", f"https://news.ycombinator.com/item?id={story_id}")
+    timestamp = item.get("time", 0)
+    published = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+    if published < cutoff:
+        return None
+
+    if not AI_KEYWORDS.search(title):
+        return None
+
+    snippet = item.get("text", "") or title
+    return make_article(
+        title=title,
+        url=url,
+        source="Hacker News",
+        published_at=published,
+        content_snippet=snippet[:500],
+    )
+
+
+def _iter_ranked_stories(
+    hours: int, max_workers: int, stage_timeout: float, cursor: Optional[dict] = None
+) -> Iterator[Tuple[int, RawArticle]]:
+    """依抓取完成的先後順序產出 (Top Stories 排名, 文章)。
+
+    傳入 cursor 時為增量模式：HN item id 隨建立時間遞增，因此 id 不大於 floor_id
+    (上次看到的、已超出時間窗口的最大 id) 的 story 必定也在窗口外；
+    seen 則記錄窗口內已檢查過的 id，兩者都不再重新下載。
+
+    游標只在本地副本上更新，結束 (或產生器被關閉) 時一次寫回；符合條件的文章要等
+    呼叫端取走、要求下一篇時才記為已看過，未被取用的文章下次仍會重新抓取。
+    """
     cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-    articles: List[RawArticle] = []
+    deadline = time.monotonic() + stage_timeout
+    session = _build_session(max_workers)
+    api_base = os.environ.get("HN_API_BASE") or HN_API_BASE
 
     try:
-        resp = requests.get(HN_TOP_STORIES_URL, timeout=REQUEST_TIMEOUT)
-        resp.raise_for_status()
-        story_ids: list = resp.json()
+        story_ids: list = _get_json(session, f"{api_base}/topstories.json", deadline)
     except Exception as e:
         print(f"[HN] 無法取得 Top Stories 列表: {e}")
-        return articles
+        session.close()
+        return
 
-    for story_id in story_ids[:MAX_IDS_TO_SCAN]:
-        try:
-            item_resp = requests.get(
-                HN_ITEM_URL.format(story_id), timeout=REQUEST_TIMEOUT
-            )
-            item_resp.raise_for_status()
-            item = item_resp.json()
-        except Exception as e:
-            print(f"[HN] 無法取得 story {story_id}: {e}")
-            continue
-
-        if not item or item.get("type") != "story":
-            continue
-
-        title = item.get("title", "")
-        url = item.get("url", f"https://news.ycombinator.com/item?id={story_id}")
-        timestamp = item.get("time", 0)
-        published = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-
-        if published < cutoff:
-            continue
-
-        if not AI_KEYWORDS.search(title):
-            continue
-
-        snippet = item.get("text", "") or title
-        articles.append(
-            RawArticle(
-                title=title,
-                url=url,
-                source="Hacker News",
-                published_at=published,
-                content_snippet=snippet[:500],
-            )
-        )
-
-    print(f"[HN] 抓取完成：共 {len(articles)} 篇 AI 相關文章")
-    return articles
+    story_ids = story_ids[:MAX_IDS_TO_SCAN]
+    floor_id = 0
+    seen: dict = {}
+    if cursor is not None:
+        floor_id = cursor.get("floor_id", 0)
+        seen = dict(cursor.get("seen", {}))
+        scanned = len(story_ids)
+        story_ids = [sid for sid in story_ids if sid > floor_id and str(sid) not in seen]
+        metrics.incr("cursor_skipped", scanned - len(story_ids), source="hn")
+        print(f"[HN] 增量模式：{scanned} 則中 {scanned - len(story_ids)} 則已處理過，略過")
+
+    fetched = 0
+    found = 0
+    completed = 0
+    expired = 0
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {
+        executor.submit(_get_json, session, f"{api_base}/item/{sid}.json", deadline): (rank, sid)
+        for rank, sid in enumerate(story_ids)
+    }
+
+    try:
+        for future in as_completed(futures, timeout=max(0.0, deadline - time.monotonic())):
+            rank, story_id = futures[future]
+            completed += 1
+            try:
+                item = future.result()
+            except TimeoutError:
+                expired += 1
+                continue
+            except Exception as e:
+                print(f"[HN] 無法取得 story {story_id}: {e}")
+                continue
+
+            fetched += 1
+            item_time = item.get("time") if item else None
+            if item_time and item_time < cutoff.timestamp():
+                floor_id = max(floor_id, story_id)
+            article = _to_article(item, story_id, cutoff)
+            if article:
+                found += 1
+                yield rank, article
+            # 走到這裡代表文章已被取用 (或本來就不符合條件)，才記為已看過
+            if item_time:
+                seen[str(story_id)] = item_time
+    except FuturesTimeoutError:
+        expired += len(futures) - completed
+    finally:
+        _close_when_idle(executor, session)
+        if cursor is not None:
+            cursor["floor_id"] = floor_id
+            cursor["seen"] = {k: v for k, v in seen.items() if int(k) > floor_id and v >= cutoff.timestamp()}
+
+    metrics.incr("articles_fetched", found, source="hn")
+    if expired:
+        metrics.incr("deadline_skipped", expired, source="hn")
+        print(f"[HN] ⚠️ 超過階段時限 {stage_timeout}s，略過 {expired} 個未完成的 story")
+    print(f"[HN] 抓取完成：掃描 {fetched}/{len(story_ids)} 則，共 {found} 篇 AI 相關文章")
+
+
+def iter_hn_ai_stories(
+    hours: int = 24,
+    max_workers: int = MAX_WORKERS,
+    stage_timeout: float = STAGE_TIMEOUT,
+    cursor: Optional[dict] = None,
+) -> Iterator[RawArticle]:
+    """串流版本：每抓到一篇符合條件的文章就立即產出，供管線模式邊抓邊處理。"""
+    for _, article in _iter_ranked_stories(hours, max_workers, stage_timeout, cursor):
+        yield article
+
+
+def fetch_hn_ai_stories(
+    hours: int = 24,
+    max_workers: int = MAX_WORKERS,
+    stage_timeout: float = STAGE_TIMEOUT,
+    cursor: Optional[dict] = None,
+) -> List[RawArticle]:
+    """從 Hacker News 並發抓取過去 N 小時內與 AI 相關的熱門文章；傳入 cursor 時只抓新 story。"""
+    ranked = list(_iter_ranked_stories(hours, max_workers, stage_timeout, cursor))
+    # 依 Top Stories 原始排名輸出，與序列版本的順序一致
+    ranked.sort(key=lambda pair: pair[0])
+    return [article for _, article in ranked]
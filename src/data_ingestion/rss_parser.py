@@ -1,10 +1,21 @@
+import os
+import threading
 import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta
-from typing import List
+from email.utils import parsedate_to_datetime
+from typing import Iterator, List, Optional, Tuple
 
 import feedparser
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
 
+from src.models.article_batch import ArticleBatch
 from src.models.schemas import RawArticle
+from src.utils import metrics
+from src.utils.local_cache import cache_path, load_json, save_json
 
 DEFAULT_FEEDS = [
     {"url": "https://techcrunch.com/category/artificial-intelligence/feed/", "name": "TechCrunch AI"},
@@ -16,6 +27,22 @@ DEFAULT_FEEDS = [
     {"url": "https://nvidianews.nvidia.com/releases.xml", "name": "NVIDIA Newsroom"},
 ]
 
+REQUEST_TIMEOUT = 15
+MAX_WORKERS = 16
+FEED_CACHE_FILE = "rss_feed_cache.json"
+USER_AGENT = "Mozilla/5.0 (compatible; YoyoAIBriefing/2.0)"
+SUMMARY_MAX_CHARS = 500
+# 串流解析：邊下載邊解析，超過位元組上限即停止下載；RSS_STREAM_PARSE=0 時改回整份交給 feedparser。
+# RSS_STREAM_PARSE / RSS_MAX_FEED_BYTES 於抓取時才讀取，讓 load_dotenv() 載入的 .env 也能生效
+MAX_FEED_BYTES = 2 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+# 依時間排序的 feed 連續遇到這麼多篇超出時間窗口的 entry 就停止解析 (容忍少數置頂文章)
+STALE_ENTRIES_TO_STOP = 3
+
+_ITEM_TAGS = {"item", "entry"}
+_SUMMARY_TAGS = ("description", "summary", "encoded", "content")
+_DATE_TAGS = ("pubDate", "published", "updated", "date")
+
 
 def _parse_published(entry) -> datetime | None:
     """嘗試從 RSS entry 中解析發布時間。"""
@@ -31,45 +58,358 @@ def _parse_published(entry) -> datetime | None:
     return None
 
 
-def fetch_official_rss(hours: int = 24) -> List[RawArticle]:
-    """從預設的官方 RSS feeds 抓取過去 N 小時內的文章。"""
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-    articles: List[RawArticle] = []
+def _parse_entries(content: bytes) -> Optional[List[dict]]:
+    """解析 feed 內容為精簡的 entry dict 列表；完全無法解析時回傳 None。"""
+    feed = feedparser.parse(content)
+    if feed.bozo and not feed.entries:
+        return None
+
+    entries = []
+    for entry in feed.entries:
+        published = _parse_published(entry)
+        if not published:
+            continue
+        entries.append(
+            {
+                "id": entry.get("id") or entry.get("link", ""),
+                "title": entry.get("title", "無標題"),
+                "url": entry.get("link", ""),
+                "summary": entry.get("summary", entry.get("description", ""))[:SUMMARY_MAX_CHARS],
+                "published": published.timestamp(),
+            }
+        )
+    return entries
+
 
-    for feed_info in DEFAULT_FEEDS:
-        feed_url = feed_info["url"]
-        feed_name = feed_info["name"]
+def _local_name(tag) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
 
+
+def _parse_date(text: str) -> Optional[datetime]:
+    """解析 RFC 822 (RSS pubDate) 或 ISO 8601 (Atom / dc:date) 時間，無時區時視為 UTC。"""
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        parsed = parsedate_to_datetime(text)
+    except (TypeError, ValueError, IndexError):
         try:
-            feed = feedparser.parse(feed_url)
-        except Exception as e:
-            print(f"[RSS] 解析 {feed_name} 失敗: {e}")
-            continue
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _element_entry(item: ET.Element) -> Optional[dict]:
+    """從單一 <item> / <entry> 元素取出精簡 entry dict；摘要在此直接截斷，不保留完整 HTML。"""
+    fields = {}
+    link = ""
+    for child in item:
+        name = _local_name(child.tag)
+        if name == "link":
+            # Atom 以 href 屬性給連結，優先取 rel="alternate" (或未標 rel) 的那一個
+            href = child.get("href")
+            if href is None:
+                link = link or (child.text or "").strip()
+            elif child.get("rel", "alternate") == "alternate" and not link:
+                link = href.strip()
+        elif name not in fields:
+            fields[name] = "".join(child.itertext()) if len(child) else (child.text or "")
+
+    published = None
+    for name in _DATE_TAGS:
+        if name in fields:
+            published = _parse_date(fields[name])
+            if published:
+                break
+    if not published:
+        return None
+
+    summary = next((fields[name] for name in _SUMMARY_TAGS if fields.get(name)), "")
+    return {
+        "id": (fields.get("guid") or fields.get("id") or link).strip(),
+        "title": fields.get("title", "").strip() or "無標題",
+        "url": link,
+        "summary": summary.strip()[:SUMMARY_MAX_CHARS],
+        "published": published.timestamp(),
+    }
+
+
+def _stream_entries(resp: requests.Response, cutoff: Optional[datetime]) -> Tuple[Optional[List[dict]], bool]:
+    """以 XMLPullParser 邊下載邊解析 feed，每處理完一個 entry 就釋放其元素。
+
+    回傳 (entries, 是否完整)。下載量超過 RSS_MAX_FEED_BYTES (預設 MAX_FEED_BYTES) 時停止並保留已解析的 entry；依時間排序的 feed
+    連續遇到 STALE_ENTRIES_TO_STOP 篇早於 cutoff 的 entry 即提前結束，這兩種情況都不算完整。
+    XML 不合法 (例如未定義的 HTML 實體) 或找不到任何 entry 時，改以 feedparser 解析已下載的內容；
+    原始位元組只保留到第一個 entry 解析成功為止，之後才遇到的解析錯誤只回傳已解析的部分 (不完整)。
+    """
+    max_bytes = int(os.environ.get("RSS_MAX_FEED_BYTES") or MAX_FEED_BYTES)
+    parser = ET.XMLPullParser(events=("end",))
+    threshold = cutoff.timestamp() if cutoff else None
+    chunks: Optional[List[bytes]] = []
+    entries: List[dict] = []
+    n_items = 0
+    stale = 0
+    ordered = True
+    size = 0
+    stopped = False
+    stream = resp.iter_content(CHUNK_SIZE)
+
+    def fallback() -> Optional[List[dict]]:
+        """補齊尚未下載的內容 (同樣受位元組上限限制) 後交給 feedparser。"""
+        nonlocal size
+        if size < max_bytes:
+            for rest in stream:
+                chunks.append(rest)
+                size += len(rest)
+                if size >= max_bytes:
+                    break
+        metrics.incr("feed_parse_fallback")
+        return _parse_entries(b"".join(chunks))
+
+    try:
+        for chunk in stream:
+            if chunks is not None:
+                chunks.append(chunk)
+            size += len(chunk)
+            parser.feed(chunk)
+            for _, elem in parser.read_events():
+                if _local_name(elem.tag) not in _ITEM_TAGS:
+                    continue
+                n_items += 1
+                # 已確認能以串流方式解析出 entry，不再需要為 feedparser 保留原始內容
+                chunks = None
+                entry = _element_entry(elem)
+                elem.clear()
+                if entry is None:
+                    continue
+                if entries and entry["published"] > entries[-1]["published"]:
+                    ordered = False
+                entries.append(entry)
+                if threshold is not None and entry["published"] < threshold:
+                    stale += 1
+                    if ordered and stale >= STALE_ENTRIES_TO_STOP:
+                        stopped = True
+                        break
+                else:
+                    stale = 0
+            if stopped:
+                metrics.incr("feed_early_stop")
+                return entries, False
+            if size >= max_bytes:
+                metrics.incr("feed_truncated")
+                print(f"[RSS] feed 超過 {max_bytes} bytes，只解析前段內容")
+                if not n_items:
+                    return _parse_entries(b"".join(chunks)), False
+                return entries, False
+        parser.close()
+    except ET.ParseError:
+        if chunks is None:
+            metrics.incr("feed_parse_partial")
+            print(f"[RSS] feed 第 {n_items} 個 entry 之後的 XML 不合法，只保留已解析的內容")
+            return entries, False
+        return fallback(), size < max_bytes
+
+    if not n_items:
+        return fallback(), True
+    return entries, True
+
+
+def _fetch_feed(session: requests.Session, feed_info: dict, cached: Optional[dict],
+                cutoff: Optional[datetime] = None) -> Optional[dict]:
+    """以條件式 GET 抓取單一 feed；304 時直接沿用快取的 entries，不重新下載與解析。"""
+    feed_name = feed_info["name"]
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("modified"):
+            headers["If-Modified-Since"] = cached["modified"]
+
+    stream_parse = os.environ.get("RSS_STREAM_PARSE", "1") != "0"
+    try:
+        with metrics.span("http_request", source="rss"):
+            resp = session.get(feed_info["url"], headers=headers, timeout=REQUEST_TIMEOUT, stream=stream_parse)
+        with resp:
+            if resp.status_code == 304 and cached:
+                metrics.incr("feed_not_modified")
+                print(f"[RSS] {feed_name} 未更新 (304)，沿用快取")
+                return cached
+            resp.raise_for_status()
+            with metrics.span("feed_parse"):
+                if stream_parse:
+                    entries, complete = _stream_entries(resp, cutoff)
+                else:
+                    entries, complete = _parse_entries(resp.content), True
+    except Exception as e:
+        metrics.incr("fetch_errors", source="rss")
+        print(f"[RSS] 解析 {feed_name} 失敗: {e}")
+        return None
+
+    if entries is None:
+        print(f"[RSS] {feed_name} 回傳異常且無內容，跳過")
+        return None
+
+    print(f"[RSS] {feed_name} 解析完成")
+    if not complete:
+        # 截斷或提前停止的結果不能在 304 時代表整份 feed：不記錄驗證器，下次仍完整下載
+        return {"etag": None, "modified": None, "entries": entries}
+    return {
+        "etag": resp.headers.get("ETag"),
+        "modified": resp.headers.get("Last-Modified"),
+        "entries": entries,
+    }
 
-        if feed.bozo and not feed.entries:
-            print(f"[RSS] {feed_name} 回傳異常且無內容，跳過")
-            continue
 
-        for entry in feed.entries:
-            published = _parse_published(entry)
-            if not published or published < cutoff:
+def _guid(entry: dict) -> str:
+    return entry.get("id") or entry["url"]
+
+
+def _new_entries(entries: List[dict], seen_guids: Optional[dict]) -> List[dict]:
+    """增量模式：只保留未見過的 GUID (seen_guids 為 None 時原樣回傳)；這裡不標記已看過。
+
+    串流模式只標記已被取用的文章，較新的 entry 已見過不代表較舊的也都見過，因此逐筆過濾而不在第一個已見過處停止。
+    """
+    if seen_guids is None:
+        return entries
+    fresh = [entry for entry in entries if _guid(entry) not in seen_guids]
+    metrics.incr("cursor_skipped", len(entries) - len(fresh), source="rss")
+    return fresh
+
+
+def _entries_to_batch(feed_info: dict, entries: List[dict], cutoff: datetime) -> Tuple[ArticleBatch, List[str]]:
+    """把快取格式的 entry 列表直接轉為欄式批次，並以向量化比較套用時間窗口；一併回傳與批次逐列對齊的 GUID。"""
+    batch = ArticleBatch(
+        titles=[e["title"] for e in entries],
+        urls=[e["url"] for e in entries],
+        sources=[feed_info["name"]] * len(entries),
+        timestamps=[e["published"] for e in entries],
+        snippets=[e["summary"] for e in entries],
+    )
+    keep = np.flatnonzero(batch.timestamps >= cutoff.timestamp())
+    if len(keep) == len(batch):
+        return batch, [_guid(e) for e in entries]
+    return batch.take(keep), [_guid(entries[i]) for i in keep]
+
+
+def _open_cursor(cursor: Optional[dict]) -> Optional[dict]:
+    """複製游標中各 feed 的已見 GUID；抓取期間只更新這份本地副本，結束時由 _close_cursor 寫回。"""
+    if cursor is None:
+        return None
+    return {url: dict(seen) for url, seen in cursor.get("feeds", {}).items()}
+
+
+def _close_cursor(cursor: Optional[dict], seen_by_feed: Optional[dict], cutoff: datetime) -> None:
+    """把本地副本寫回游標，並淘汰已超出時間窗口的 GUID。"""
+    if cursor is None:
+        return
+    threshold = cutoff.timestamp()
+    cursor["feeds"] = {
+        url: {guid: ts for guid, ts in seen.items() if ts >= threshold} for url, seen in seen_by_feed.items()
+    }
+
+
+def _iter_feed_results(
+    feeds: List[dict], max_workers: int, use_cache: bool, cutoff: Optional[datetime] = None
+) -> Iterator[Tuple[int, dict, dict]]:
+    """並發抓取所有 feed，依完成先後產出 (feed 序號, feed_info, 結果)，結束時寫回快取。"""
+    cache_file = cache_path(FEED_CACHE_FILE) if use_cache else None
+    feed_cache: dict = load_json(cache_file, {}) if cache_file else {}
+
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {
+        executor.submit(_fetch_feed, session, info, feed_cache.get(info["url"]), cutoff): (order, info)
+        for order, info in enumerate(feeds)
+    }
+    try:
+        for future in as_completed(futures):
+            order, feed_info = futures[future]
+            result = future.result()
+            if result is None:
                 continue
+            feed_cache[feed_info["url"]] = result
+            metrics.incr("feed_entries", len(result["entries"]))
+            yield order, feed_info, result
+    finally:
+        # 取消尚未開始的 feed；仍在下載的 worker 可能還在使用 Session，等它們結束後才在背景關閉
+        executor.shutdown(wait=False, cancel_futures=True)
+        threading.Thread(
+            target=lambda: (executor.shutdown(wait=True), session.close()), name="rss-session-close", daemon=True
+        ).start()
+        if cache_file:
+            save_json(cache_file, feed_cache)
 
-            title = entry.get("title", "無標題")
-            url = entry.get("link", "")
-            summary = entry.get("summary", entry.get("description", ""))
-
-            articles.append(
-                RawArticle(
-                    title=title,
-                    url=url,
-                    source=feed_name,
-                    published_at=published,
-                    content_snippet=summary[:500],
-                )
-            )
 
-        print(f"[RSS] {feed_name} 解析完成")
+def iter_official_rss(
+    hours: int = 24,
+    feeds: Optional[List[dict]] = None,
+    max_workers: int = MAX_WORKERS,
+    use_cache: bool = True,
+    cursor: Optional[dict] = None,
+) -> Iterator[RawArticle]:
+    """串流版本：每個 feed 一抓完就立即產出其文章，供管線模式邊抓邊處理。
+
+    增量模式下文章要等呼叫端取走、要求下一篇時才記為已看過，游標在結束 (或產生器被關閉) 時一次寫回；
+    中途停止時未被取用的文章下次仍會產出。
+    """
+    feeds = feeds if feeds is not None else DEFAULT_FEEDS
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+    seen_by_feed = _open_cursor(cursor)
+    try:
+        for _, feed_info, result in _iter_feed_results(feeds, max_workers, use_cache, cutoff):
+            seen = seen_by_feed.setdefault(feed_info["url"], {}) if seen_by_feed is not None else None
+            batch, guids = _entries_to_batch(feed_info, _new_entries(result["entries"], seen), cutoff)
+            for i, guid in enumerate(guids):
+                yield batch.article(i)
+                if seen is not None:
+                    seen[guid] = float(batch.timestamps[i])
+    finally:
+        _close_cursor(cursor, seen_by_feed, cutoff)
+
+
+def fetch_official_rss_batch(
+    hours: int = 24,
+    feeds: Optional[List[dict]] = None,
+    max_workers: int = MAX_WORKERS,
+    use_cache: bool = True,
+    cursor: Optional[dict] = None,
+) -> ArticleBatch:
+    """並發抓取官方 RSS feeds 過去 N 小時內的文章，並以 ETag / Last-Modified 快取未變動的 feed。
+
+    傳入 cursor 時為增量模式，只回傳各 feed 中尚未見過的 GUID。
+    """
+    feeds = feeds if feeds is not None else DEFAULT_FEEDS
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+    seen_by_feed = _open_cursor(cursor)
+
+    # 依 DEFAULT_FEEDS 的順序組合結果，與序列版本一致
+    results = sorted(_iter_feed_results(feeds, max_workers, use_cache, cutoff), key=lambda r: r[0])
+    batches = []
+    for _, feed_info, result in results:
+        seen = seen_by_feed.setdefault(feed_info["url"], {}) if seen_by_feed is not None else None
+        batch, guids = _entries_to_batch(feed_info, _new_entries(result["entries"], seen), cutoff)
+        if seen is not None:
+            seen.update(zip(guids, batch.timestamps.tolist()))
+        batches.append(batch)
+    batch = ArticleBatch.concat(batches)
+    _close_cursor(cursor, seen_by_feed, cutoff)
+
+    print(f"[RSS] 抓取完成：共 {len(batch)} 篇文章")
+    return batch
+
 
-    print(f"[RSS] 抓取完成：共 {len(articles)} 篇文章")
-    return articles
+def fetch_official_rss(
+    hours: int = 24,
+    feeds: Optional[List[dict]] = None,
+    max_workers: int = MAX_WORKERS,
+    use_cache: bool = True,
+    cursor: Optional[dict] = None,
+) -> List[RawArticle]:
+    """同 fetch_official_rss_batch，但回傳 RawArticle 列表。"""
+    return fetch_official_rss_batch(hours, feeds, max_workers, use_cache, cursor).to_articles()
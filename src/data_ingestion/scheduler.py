@@ -0,0 +1,127 @@
+import asyncio
+import contextlib
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from src.data_ingestion.cursors import IngestState
+from src.data_ingestion.sources import Source, load_sources
+from src.models.schemas import RawArticle
+from src.utils import metrics
+from src.utils.local_cache import cache_path, load_json, save_json
+
+HEALTH_FILE = "source_health.json"
+MAX_PARALLEL_SOURCES = 8
+
+Emit = Callable[[str, RawArticle], Awaitable[None]]
+
+
+class CircuitBreaker:
+    """跨執行保存的資料源斷路器：連續失敗達門檻後，在冷卻期內直接略過該資料源。
+
+    冷卻期過後放行一次 (half-open)；成功即重置，失敗則重新計時。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or cache_path(HEALTH_FILE)
+        self._state: Dict[str, dict] = load_json(self.path, {})
+
+    def allow(self, source: Source) -> bool:
+        state = self._state.get(source.name)
+        return not state or time.time() >= state.get("open_until", 0)
+
+    def record_success(self, source: Source) -> None:
+        self._state.pop(source.name, None)
+
+    def record_failure(self, source: Source, error: str) -> None:
+        state = self._state.setdefault(source.name, {"failures": 0, "open_until": 0})
+        state["failures"] += 1
+        state["last_error"] = error
+        if state["failures"] >= source.failure_threshold:
+            state["open_until"] = time.time() + source.cooldown_minutes * 60
+
+    def save(self) -> None:
+        save_json(self.path, self._state)
+
+
+class IngestionScheduler:
+    """並發執行所有資料源：各自有逾時與斷路器，單一資料源卡住不會拖慢其他來源。
+
+    傳入 IngestState 時為增量模式：資料源依各自的游標只抓新內容，
+    已見過的 URL 由 Bloom filter 擋下；狀態在 commit() 時才保存。
+    """
+
+    def __init__(self, sources: Optional[List[Source]] = None, max_parallel: int = MAX_PARALLEL_SOURCES,
+                 breaker: Optional[CircuitBreaker] = None, state: Optional[IngestState] = None):
+        self.sources = sources if sources is not None else load_sources()
+        self.max_parallel = max_parallel
+        self.breaker = breaker or CircuitBreaker()
+        self.state = state
+        for source in self.sources:
+            source.cursor = state.cursor(source.name) if state is not None else None
+
+    async def _run_source(self, source: Source, emit: Emit, semaphore: asyncio.Semaphore) -> dict:
+        if not self.breaker.allow(source):
+            print(f"  ⏸️ {source.name}: 斷路器開啟中，本輪略過")
+            metrics.incr("source_skipped", source=source.name)
+            return {"status": "skipped", "count": 0}
+
+        count = 0
+        duplicates = 0
+
+        async def consume() -> None:
+            nonlocal count, duplicates
+            async with contextlib.aclosing(source.fetch()) as articles:
+                async for article in articles:
+                    if self.state is not None and not self.state.mark_new(article.url):
+                        duplicates += 1
+                        continue
+                    await emit(source.name, article)
+                    count += 1
+
+        async with semaphore:
+            try:
+                with metrics.span("source_fetch", source=source.name):
+                    await asyncio.wait_for(consume(), timeout=source.timeout)
+            except asyncio.TimeoutError:
+                self.breaker.record_failure(source, f"timeout after {source.timeout}s")
+                metrics.incr("source_failures", source=source.name, reason="timeout")
+                print(f"  ⏱️ {source.name}: 超過 {source.timeout:.0f}s 逾時，保留已取得的 {count} 篇")
+                return {"status": "timeout", "count": count}
+            except Exception as e:
+                self.breaker.record_failure(source, str(e))
+                metrics.incr("source_failures", source=source.name, reason="error")
+                print(f"  ❌ {source.name} 失敗: {e}")
+                return {"status": "error", "count": count}
+
+        self.breaker.record_success(source)
+        metrics.incr("articles_ingested", count, source=source.name)
+        metrics.incr("seen_url_skipped", duplicates, source=source.name)
+        suffix = f" (略過 {duplicates} 篇已處理過的 URL)" if duplicates else ""
+        print(f"  ✅ {source.name}: {count} 篇{suffix}")
+        return {"status": "ok", "count": count}
+
+    async def run(self, emit: Emit) -> Dict[str, dict]:
+        """並發執行所有資料源，每篇文章一產出就交給 emit；回傳各資料源的狀態與篇數。"""
+        semaphore = asyncio.Semaphore(max(1, self.max_parallel))
+        try:
+            reports = await asyncio.gather(
+                *(self._run_source(source, emit, semaphore) for source in self.sources)
+            )
+        finally:
+            self.breaker.save()
+        return {source.name: report for source, report in zip(self.sources, reports)}
+
+    def collect(self) -> Dict[str, List[RawArticle]]:
+        """同步介面：執行所有資料源，依設定順序回傳各自的文章列表。"""
+        results: Dict[str, List[RawArticle]] = {source.name: [] for source in self.sources}
+
+        async def emit(name: str, article: RawArticle) -> None:
+            results[name].append(article)
+
+        asyncio.run(self.run(emit))
+        return results
+
+    def commit(self) -> None:
+        """整輪流程成功後保存增量游標與已見 URL。"""
+        if self.state is not None:
+            self.state.commit()
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Type
+
+from src.data_ingestion.hf_papers import iter_hf_daily_papers
+from src.data_ingestion.hn_scraper import iter_hn_ai_stories
+from src.data_ingestion.rss_parser import iter_official_rss
+from src.models.schemas import RawArticle
+
+# 預設設定檔；load_sources() 呼叫時讀取 SOURCES_CONFIG 覆寫
+SOURCES_CONFIG = "sources.json"
+DEFAULT_TIMEOUT = 90.0
+
+# 找不到設定檔時使用的預設資料源
+DEFAULT_SOURCES = [
+    {"name": "Hacker News", "type": "hn", "params": {"hours": 24}},
+    {"name": "RSS Feeds", "type": "rss", "params": {"hours": 24}},
+]
+
+_REGISTRY: Dict[str, Type["Source"]] = {}
+_END = object()
+
+
+def register_source(type_name: str) -> Callable[[Type["Source"]], Type["Source"]]:
+    """註冊資料源外掛，設定檔中以 "type" 欄位引用。"""
+    def decorator(cls: Type["Source"]) -> Type["Source"]:
+        _REGISTRY[type_name] = cls
+        cls.type_name = type_name
+        return cls
+    return decorator
+
+
+def registered_types() -> List[str]:
+    return sorted(_REGISTRY)
+
+
+class Source:
+    """資料源外掛介面：fetch() 為非同步產生器，逐篇產出 RawArticle。
+
+    timeout 為整個資料源的時間上限；max_workers 是該資料源可使用的並發請求數，
+    failure_threshold / cooldown_minutes 控制排程器的斷路器；
+    增量模式下排程器會把持久化的 cursor dict 指派給資料源，由資料源自行讀寫。
+    """
+
+    type_name = ""
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_workers: Optional[int] = None,
+        failure_threshold: int = 3,
+        cooldown_minutes: float = 360,
+        params: Optional[dict] = None,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.failure_threshold = failure_threshold
+        self.cooldown_minutes = cooldown_minutes
+        self.params = params or {}
+        self.cursor: Optional[dict] = None
+
+    def fetch(self) -> AsyncIterator[RawArticle]:
+        raise NotImplementedError
+
+
+class ThreadedSource(Source):
+    """把同步 iterator 包成非同步資料源。
+
+    在 daemon 執行緒中走訪 iterate()，逐篇轉交給事件迴圈；
+    逾時或取消時直接放棄該執行緒 (不等待它結束)，因此卡住的資料源不會拖住整個程序。
+    """
+
+    def iterate(self) -> Iterable[RawArticle]:
+        raise NotImplementedError
+
+    async def fetch(self) -> AsyncIterator[RawArticle]:
+        loop = asyncio.get_running_loop()
+        items: asyncio.Queue = asyncio.Queue()
+        abandoned = threading.Event()
+
+        def put(item) -> None:
+            try:
+                loop.call_soon_threadsafe(items.put_nowait, item)
+            except RuntimeError:
+                abandoned.set()  # 事件迴圈已關閉
+
+        def worker() -> None:
+            try:
+                for article in self.iterate():
+                    if abandoned.is_set():
+                        return
+                    put(article)
+                put(_END)
+            except BaseException as e:
+                put(e)
+
+        threading.Thread(target=worker, name=f"source-{self.name}", daemon=True).start()
+        try:
+            while True:
+                item = await items.get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            abandoned.set()
+
+
+@register_source("hn")
+class HackerNewsSource(ThreadedSource):
+    def iterate(self) -> Iterable[RawArticle]:
+        kwargs = dict(self.params, cursor=self.cursor)
+        if self.max_workers:
+            kwargs["max_workers"] = self.max_workers
+        return iter_hn_ai_stories(**kwargs)
+
+
+@register_source("rss")
+class RssSource(ThreadedSource):
+    def iterate(self) -> Iterable[RawArticle]:
+        kwargs = dict(self.params, cursor=self.cursor)
+        if self.max_workers:
+            kwargs["max_workers"] = self.max_workers
+        return iter_official_rss(**kwargs)
+
+
+@register_source("hf_papers")
+class HfPapersSource(ThreadedSource):
+    def iterate(self) -> Iterable[RawArticle]:
+        return iter_hf_daily_papers(**self.params)
+
+
+def build_source(config: dict) -> Source:
+    """依單筆設定建立資料源外掛。"""
+    options = dict(config)
+    type_name = options.pop("type")
+    options.pop("enabled", None)
+    if type_name not in _REGISTRY:
+        raise ValueError(f"未知的資料源類型 {type_name!r}，可用: {', '.join(registered_types())}")
+    options.setdefault("name", type_name)
+    return _REGISTRY[type_name](**options)
+
+
+def load_sources(path: Optional[str] = None) -> List[Source]:
+    """讀取資料源設定檔 (JSON)；檔案不存在時使用 DEFAULT_SOURCES，並略過 enabled=false 的項目。"""
+    path = path or os.environ.get("SOURCES_CONFIG") or SOURCES_CONFIG
+    configs = DEFAULT_SOURCES
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        configs = data.get("sources", []) if isinstance(data, dict) else data
+    return [build_source(c) for c in configs if c.get("enabled", True)]
@@ -0,0 +1,82 @@
+from typing import List
+
+import numpy as np
+
+BLOCK_SIZE = 512
+
+
+def normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """將每列向量正規化為單位長度，之後內積即為 cosine 相似度。"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+class GreedyClusterer:
+    """向量化的貪婪式分群：依序把每篇文章併入最相似的代表，或成為新的代表。
+
+    語意與逐篇 cos_sim 迴圈完全一致 (相似度需嚴格大於門檻，同分時取最早的代表)，
+    但相似度改以分塊矩陣乘法計算，記憶體上限為 block_size × 代表數。
+    可重複呼叫 add()，以微批次方式累積分群結果。
+    """
+
+    def __init__(self, threshold: float, dim: int | None = None, block_size: int = BLOCK_SIZE):
+        self.threshold = threshold
+        self.block_size = block_size
+        self._reps = np.zeros((0, dim or 0), dtype=np.float32)
+        self._count = 0
+        self.rep_ids: List[int] = []
+        self._next_id = 0
+
+    @property
+    def rep_matrix(self) -> np.ndarray:
+        return self._reps[: self._count]
+
+    def _append_reps(self, vectors: np.ndarray) -> None:
+        needed = self._count + len(vectors)
+        if self._reps.shape[1] != vectors.shape[1]:
+            self._reps = np.zeros((max(needed, 16), vectors.shape[1]), dtype=np.float32)
+        elif needed > len(self._reps):
+            grown = np.zeros((max(needed, 2 * len(self._reps)), vectors.shape[1]), dtype=np.float32)
+            grown[: self._count] = self._reps[: self._count]
+            self._reps = grown
+        self._reps[self._count : needed] = vectors
+        self._count = needed
+
+    def add(self, embeddings: np.ndarray) -> np.ndarray:
+        """加入一批 embedding，回傳每列所屬代表的全域編號 (自己成為代表時即為自身編號)。"""
+        vectors = normalize_rows(embeddings)
+        assignments = np.empty(len(vectors), dtype=np.int64)
+
+        for start in range(0, len(vectors), self.block_size):
+            block = vectors[start : start + self.block_size]
+            # 與既有代表的相似度一次算完；區塊內新產生的代表則用區塊自身的 Gram 矩陣
+            existing = block @ self.rep_matrix.T if self._count else None
+            gram = block @ block.T
+            new_local: List[int] = []
+
+            for i in range(len(block)):
+                best_score, best_rep = -np.inf, -1
+                if existing is not None:
+                    j = int(np.argmax(existing[i]))
+                    best_score, best_rep = float(existing[i, j]), self.rep_ids[j]
+                if new_local:
+                    sims = gram[i, new_local]
+                    j = int(np.argmax(sims))
+                    if float(sims[j]) > best_score:
+                        best_score, best_rep = float(sims[j]), self._next_id + start + new_local[j]
+
+                global_id = self._next_id + start + i
+                if best_rep >= 0 and best_score > self.threshold:
+                    assignments[start + i] = best_rep
+                else:
+                    assignments[start + i] = global_id
+                    new_local.append(i)
+
+            if new_local:
+                self._append_reps(block[new_local])
+                self.rep_ids.extend(self._next_id + start + i for i in new_local)
+
+        self._next_id += len(vectors)
+        return assignments
@@ -1,83 +1,218 @@
-import re
-from typing import List
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
-from sentence_transformers import SentenceTransformer, util
 
+from src.filtering.clustering import GreedyClusterer
+from src.filtering.embedding_cache import EmbeddingCache
+from src.filtering.encoders import default_backend, load_encoder
+from src.filtering.exact_dedup import ExactDeduper
+from src.filtering.history_index import HistoryIndex
+from src.filtering.text_cleaning import SNIPPET_MAX_CHARS, TITLE_MAX_CHARS, clean_texts
+from src.models.article_batch import ArticleBatch
 from src.models.schemas import RawArticle
-
-_HTML_TAG_RE = re.compile(r"<[^>]+>")
-_WHITESPACE_RE = re.compile(r"\s+")
-_GARBLED_RE = re.compile(r"[^\x00-\x7F\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]+")
-
-
-def clean_text(text: str) -> str:
-    """移除 HTML 標籤、亂碼，並將連續空白壓縮為單一空格。"""
-    text = _HTML_TAG_RE.sub("", text)
-    text = _GARBLED_RE.sub("", text)
-    text = _WHITESPACE_RE.sub(" ", text)
-    return text.strip()
+from src.utils import metrics
 
 
 class ArticleFilter:
     SIMILARITY_THRESHOLD = 0.65
-
-    def __init__(self):
-        print("[Dedup] 載入語意模型 all-MiniLM-L6-v2 ...")
-        self.model = SentenceTransformer("all-MiniLM-L6-v2")
-        print("[Dedup] 模型載入完成")
-
-    def process(self, articles: List[RawArticle]) -> List[RawArticle]:
+    HISTORY_THRESHOLD = 0.65
+    MODEL_NAME = "all-MiniLM-L6-v2"
+
+    def __init__(self, use_cache: bool = True, use_history: bool = True, backend: Optional[str] = None,
+                 use_simhash: bool = True):
+        self.backend = backend or default_backend()
+        self.use_simhash = use_simhash
+        self._model = None
+        # 量化 ONNX 模型的向量與 torch 版略有差異，快取依後端分開保存
+        cache_name = self.MODEL_NAME if self.backend == "torch" else f"{self.MODEL_NAME}-{self.backend}"
+        self.embedding_cache = EmbeddingCache(cache_name) if use_cache else None
+        self.history = HistoryIndex() if use_history else None
+        self._pending_history: List[tuple] = []
+        # 與最近一次 process() 回傳結果逐列對齊的 embedding，供評分前的預篩選重用
+        self.last_embeddings = np.zeros((0, 0), dtype=np.float32)
+
+    @property
+    def model(self):
+        """延遲載入語意模型；快取涵蓋所有輸入時整輪都不會 import torch。"""
+        if self._model is None:
+            print(f"[Dedup] 載入語意模型 {self.MODEL_NAME} ({self.backend}) ...")
+            self._model = load_encoder(self.MODEL_NAME, self.backend)
+            print("[Dedup] 模型載入完成")
+        return self._model
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        model = self.model
+        with metrics.span("embedding_batch", backend=self.backend):
+            embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        metrics.incr("embeddings_computed", len(texts))
+        return embeddings
+
+    def encode(self, texts: List[str], persist: bool = True) -> np.ndarray:
+        """計算 embedding；啟用快取時只有新文字會真正送進模型。"""
+        if self.embedding_cache is None:
+            return self._encode_texts(texts)
+
+        cache = self.embedding_cache
+        hits, misses = cache.hits, cache.misses
+        embeddings = cache.encode(texts, self._encode_texts)
+        metrics.incr("cache_hits", cache.hits - hits, cache="embedding")
+        metrics.incr("cache_misses", cache.misses - misses, cache="embedding")
+        print(f"[Dedup] Embedding 快取命中 {cache.hits - hits} 篇 / 新計算 {cache.misses - misses} 篇")
+        if persist:
+            cache.save()
+        return embeddings
+
+    def save_cache(self) -> None:
+        if self.embedding_cache is not None:
+            self.embedding_cache.save()
+
+    def clean(self, articles: Union[List[RawArticle], ArticleBatch]) -> Tuple[ArticleBatch, List[str]]:
+        """整欄清洗標題與摘要，回傳保留文章的新批次及其用於 embedding 的文字 (不修改輸入)。
+
+        清洗同時記錄每篇的估計 token 數，評分階段會沿用。
+        """
+        batch = articles if isinstance(articles, ArticleBatch) else ArticleBatch.from_articles(articles)
+        titles, title_tokens = clean_texts(batch.titles, TITLE_MAX_CHARS)
+        snippets, snippet_tokens = clean_texts(batch.snippets, SNIPPET_MAX_CHARS)
+        combined = [f"{t} {s}" for t, s in zip(titles, snippets)]
+        keep = [i for i, text in enumerate(combined) if len(text) >= 30]
+
+        cleaned = batch.take(keep)
+        cleaned.titles = [titles[i] for i in keep]
+        cleaned.snippets = [snippets[i] for i in keep]
+        cleaned.token_counts = np.array([title_tokens[i] + snippet_tokens[i] for i in keep], dtype=np.int32)
+        return cleaned, [combined[i] for i in keep]
+
+    def stream(self) -> "DedupStream":
+        """建立增量去重狀態，可分多個微批次餵入文章。"""
+        return DedupStream(self)
+
+    def process(self, articles: Union[List[RawArticle], ArticleBatch]) -> List[RawArticle]:
         """對文章列表進行清洗、語意去重，回傳高純度結果。"""
+        self.last_embeddings = np.zeros((0, 0), dtype=np.float32)
         if not articles:
             return []
 
-        cleaned_articles: List[RawArticle] = []
-        texts: List[str] = []
+        stream = self.stream()
+        result = stream.add(articles, verbose=True)
+        self.save_cache()
+        self.last_embeddings = stream.embeddings
+        return result
 
-        for article in articles:
-            cleaned_snippet = clean_text(article.content_snippet)
-            cleaned_title = clean_text(article.title)
+    def drop_seen_events(self, articles: List[RawArticle], embeddings: np.ndarray) -> tuple:
+        """與歷史索引比對，剔除近期已處理過的事件；其餘留待 commit_history() 寫入索引。"""
+        matches = self.history.query(embeddings, self.HISTORY_THRESHOLD)
+        kept: List[RawArticle] = []
+        kept_rows: List[int] = []
 
-            combined = f"{cleaned_title} {cleaned_snippet}"
-            if len(combined) < 30:
+        for row, (article, (hist_idx, score)) in enumerate(zip(articles, matches)):
+            if hist_idx >= 0:
+                print(f"[Dedup] 跨日重複 ({score:.2f})：{article.title[:40]} ≈ {self.history.titles[hist_idx][:40]}")
                 continue
-
-            article.content_snippet = cleaned_snippet
-            article.title = cleaned_title
-            cleaned_articles.append(article)
-            texts.append(combined)
-
-        if not cleaned_articles:
+            kept.append(article)
+            kept_rows.append(row)
+
+        self.defer_history(embeddings[kept_rows], [a.title for a in kept])
+        metrics.incr("history_dropped", len(articles) - len(kept))
+        if len(kept) < len(articles):
+            print(f"[Dedup] 跨日去重：剔除 {len(articles) - len(kept)} 篇近期已出現的事件 (歷史索引 {len(self.history)} 筆)")
+        return kept, embeddings[kept_rows]
+
+    def defer_history(self, embeddings: np.ndarray, titles: List[str]) -> None:
+        """登記待寫入歷史索引的事件；從檢查點讀回去重結果時也由此補登。"""
+        if self.history is not None and len(titles):
+            self._pending_history.append((embeddings, titles))
+
+    def commit_history(self) -> None:
+        """在整個流程成功後才把本輪事件寫入歷史索引，避免失敗重跑時誤判為重複。"""
+        if self.history is None or not self._pending_history:
+            return
+        for embeddings, titles in self._pending_history:
+            self.history.add(embeddings, titles)
+        self._pending_history = []
+        self.history.save()
+
+
+class DedupStream:
+    """增量去重狀態：多個微批次共用同一組群代表，後到的重複文章會併入先前的代表。
+
+    清洗與分群都在 ArticleBatch 上整欄進行，只有群代表會轉成 RawArticle。
+    同一 URL、同一標題或 SimHash 近乎相同的文章先由 ExactDeduper 直接合併，不進入 embedding 與分群。
+    """
+
+    def __init__(self, engine: ArticleFilter):
+        self.engine = engine
+        self.clusterer = GreedyClusterer(engine.SIMILARITY_THRESHOLD)
+        self.exact = ExactDeduper(use_simhash=engine.use_simhash)
+        self.representatives: List[RawArticle] = []
+        self._n_members = 0
+        # 全域成員序號 → 群代表；GreedyClusterer 回傳的代表序號必定在此表中
+        self._reps: Dict[int, RawArticle] = {}
+        self._rep_embeddings: List[np.ndarray] = []
+        # 全域成員序號 → 所屬群代表的成員序號，供快速通道命中的文章找到最終代表
+        self._member_rep: List[int] = []
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """與 representatives 逐列對齊的 embedding。"""
+        if not self._rep_embeddings:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(self._rep_embeddings)
+
+    def add(self, articles: Union[List[RawArticle], ArticleBatch], verbose: bool = False) -> List[RawArticle]:
+        """加入一批文章，回傳其中新出現 (非重複) 的事件代表。"""
+        metrics.incr("dedup_articles_in", len(articles))
+        with metrics.span("clean"):
+            cleaned, texts = self.engine.clean(articles)
+        if not len(cleaned):
             return []
 
-        print(f"[Dedup] 清洗後剩餘 {len(cleaned_articles)} 篇，開始計算 Embedding ...")
-        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-
-        cluster_reps: List[int] = []
-        cluster_embs: List[np.ndarray] = []
-
-        for idx, emb in enumerate(embeddings):
-            if not cluster_reps:
-                cluster_reps.append(idx)
-                cluster_embs.append(emb)
-                continue
-
-            sims = util.cos_sim(emb, np.array(cluster_embs))[0].numpy()
-            best_match = int(np.argmax(sims))
-            best_score = float(sims[best_match])
-
-            if best_score > self.SIMILARITY_THRESHOLD:
-                rep_idx = cluster_reps[best_match]
-                rep_article = cleaned_articles[rep_idx]
-                dup_article = cleaned_articles[idx]
-                if dup_article.source not in rep_article.similar_sources:
-                    rep_article.similar_sources.append(dup_article.source)
-            else:
-                cluster_reps.append(idx)
-                cluster_embs.append(emb)
-
-        result = [cleaned_articles[i] for i in cluster_reps]
-        deduped = len(cleaned_articles) - len(result)
-        print(f"[Dedup] 去重完成：合併了 {deduped} 篇重複文章，最終保留 {len(result)} 篇")
+        offset = self._n_members
+        with metrics.span("exact_dedup"):
+            unique_rows, duplicates = self.exact.add(cleaned.urls, cleaned.titles, texts, offset)
+        metrics.incr("exact_dedup_merges", len(duplicates))
+
+        if verbose:
+            print(f"[Dedup] 清洗後剩餘 {len(cleaned)} 篇，快速通道合併 {len(duplicates)} 篇，"
+                  f"其餘 {len(unique_rows)} 篇開始計算 Embedding ...")
+        result: List[RawArticle] = []
+        new_rows: List[int] = []
+        embeddings = np.zeros((0, 0), dtype=np.float32)
+        if unique_rows:
+            embeddings = self.engine.encode([texts[row] for row in unique_rows], persist=False)
+            self._n_members += len(unique_rows)
+            with metrics.span("cluster"):
+                assignments = self.clusterer.add(embeddings)
+            self._member_rep.extend(int(rep_idx) for rep_idx in assignments)
+
+            new_rows = [k for k, rep_idx in enumerate(assignments) if rep_idx == offset + k]
+            result = [cleaned.article(unique_rows[k]) for k in new_rows]
+            for k, article in zip(new_rows, result):
+                self._reps[offset + k] = article
+
+            for k, rep_idx in enumerate(assignments):
+                if rep_idx != offset + k:
+                    self._merge_source(rep_idx, cleaned.sources[unique_rows[k]])
+
+        for row, member in duplicates.items():
+            self._merge_source(self._member_rep[member], cleaned.sources[row])
+
+        metrics.incr("dedup_merges", len(cleaned) - len(result))
+        if verbose:
+            deduped = len(cleaned) - len(result)
+            print(f"[Dedup] 去重完成：合併了 {deduped} 篇重複文章，最終保留 {len(result)} 篇")
+
+        result_embeddings = embeddings[new_rows]
+        if result and self.engine.history is not None:
+            result, result_embeddings = self.engine.drop_seen_events(result, result_embeddings)
+
+        metrics.incr("dedup_articles_out", len(result))
+        self.representatives.extend(result)
+        if len(result_embeddings):
+            self._rep_embeddings.append(result_embeddings)
         return result
+
+    def _merge_source(self, rep_idx: int, source: str) -> None:
+        rep_article = self._reps[rep_idx]
+        if source not in rep_article.similar_sources:
+            rep_article.similar_sources.append(source)
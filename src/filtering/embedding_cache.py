@@ -0,0 +1,119 @@
+import hashlib
+import os
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from src.utils.local_cache import cache_path, load_json, save_json
+
+MAX_AGE_DAYS = 7
+
+
+def text_key(model_name: str, text: str) -> str:
+    """以模型名稱 + 清洗後文字計算快取鍵，換模型時自動失效。"""
+    return hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """以 memory-mapped float32 矩陣 + hash→row 索引保存的本地 Embedding 快取。"""
+
+    def __init__(self, model_name: str, max_age_days: float = MAX_AGE_DAYS):
+        slug = model_name.replace("/", "_")
+        self.model_name = model_name
+        self.max_age = max_age_days * 86400
+        self.matrix_path = cache_path(f"embeddings_{slug}.npy")
+        self.index_path = cache_path(f"embeddings_{slug}.index.json")
+
+        index = load_json(self.index_path, {}) or {}
+        self._rows: Dict[str, list] = index.get("rows", {})
+        self._matrix = None
+        if self._rows and os.path.exists(self.matrix_path):
+            try:
+                self._matrix = np.load(self.matrix_path, mmap_mode="r")
+            except Exception as e:
+                print(f"[EmbCache] 讀取快取矩陣失敗，重新建立: {e}")
+                self._rows = {}
+        else:
+            self._rows = {}
+
+        self._pending_keys: List[str] = []
+        self._pending_vecs: List[np.ndarray] = []
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._rows) + len(self._pending_keys)
+
+    def encode(self, texts: List[str], encoder: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """回傳 texts 的 embedding；只有快取未命中的文字才會交給 encoder 計算。"""
+        now = time.time()
+        keys = [text_key(self.model_name, t) for t in texts]
+        found: Dict[int, np.ndarray] = {}
+        missing: List[int] = []
+        pending = dict(zip(self._pending_keys, self._pending_vecs))
+
+        for i, key in enumerate(keys):
+            entry = self._rows.get(key)
+            if entry is not None:
+                entry[1] = now
+                found[i] = self._matrix[entry[0]]
+            elif key in pending:
+                found[i] = pending[key]
+            else:
+                missing.append(i)
+
+        self.hits += len(found)
+        self.misses += len(missing)
+
+        if missing:
+            unique: Dict[str, int] = {}
+            for i in missing:
+                unique.setdefault(keys[i], i)
+            new_vecs = np.asarray(encoder([texts[i] for i in unique.values()]), dtype=np.float32)
+            for key, vec in zip(unique, new_vecs):
+                pending[key] = vec
+                self._pending_keys.append(key)
+                self._pending_vecs.append(vec)
+            for i in missing:
+                found[i] = pending[keys[i]]
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([np.asarray(found[i], dtype=np.float32) for i in range(len(texts))])
+
+    def save(self) -> None:
+        """淘汰超過保存期限的列並壓實矩陣，連同新增的 embedding 一起寫回磁碟。"""
+        now = time.time()
+        kept = [(k, v) for k, v in self._rows.items() if now - v[1] <= self.max_age]
+        evicted = len(self._rows) - len(kept)
+
+        if not self._pending_keys and not evicted:
+            save_json(self.index_path, {"model": self.model_name, "rows": self._rows})
+            return
+
+        blocks = []
+        rows: Dict[str, list] = {}
+        if kept and self._matrix is not None:
+            old_rows = np.array([v[0] for _, v in kept], dtype=np.int64)
+            blocks.append(np.asarray(self._matrix[old_rows], dtype=np.float32))
+            for new_row, (key, value) in enumerate(kept):
+                rows[key] = [new_row, value[1]]
+        if self._pending_keys:
+            blocks.append(np.stack(self._pending_vecs).astype(np.float32))
+            offset = len(rows)
+            for j, key in enumerate(self._pending_keys):
+                rows[key] = [offset + j, now]
+
+        matrix = np.concatenate(blocks) if blocks else np.zeros((0, 0), dtype=np.float32)
+        tmp_path = self.matrix_path + ".tmp.npy"
+        np.save(tmp_path, matrix)
+        os.replace(tmp_path, self.matrix_path)
+        save_json(self.index_path, {"model": self.model_name, "rows": rows})
+
+        self._rows = rows
+        self._matrix = np.load(self.matrix_path, mmap_mode="r") if rows else None
+        self._pending_keys = []
+        self._pending_vecs = []
+        if evicted:
+            print(f"[EmbCache] 淘汰 {evicted} 筆過期 embedding，目前保存 {len(rows)} 筆")
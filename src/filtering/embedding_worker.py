@@ -0,0 +1,86 @@
+import argparse
+import io
+import json
+import os
+import signal
+import socketserver
+import threading
+from typing import Optional
+
+import numpy as np
+
+from src.filtering.encoders import default_backend, recv_frame, send_frame, load_local_model
+
+
+class _EncodeHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server: EmbeddingWorker = self.server
+        try:
+            message = json.loads(recv_frame(self.request).decode("utf-8"))
+        except Exception:
+            return
+
+        if message.get("op") == "ping":
+            reply = {"model": server.model_name, "backend": server.backend}
+            send_frame(self.request, json.dumps(reply).encode("utf-8"))
+            return
+
+        if message.get("model") != server.model_name or message.get("backend") != server.backend:
+            send_frame(self.request, b"")
+            return
+
+        with server.lock:
+            embeddings = server.model.encode(
+                message.get("texts", []), convert_to_numpy=True, show_progress_bar=False
+            )
+        buffer = io.BytesIO()
+        np.save(buffer, np.asarray(embeddings, dtype=np.float32), allow_pickle=False)
+        send_frame(self.request, buffer.getvalue())
+
+
+class EmbeddingWorker(socketserver.ThreadingUnixStreamServer):
+    """常駐的 embedding 服務：模型只載入一次，之後每次執行都透過 Unix socket 重用。"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, model_name: str, backend: Optional[str] = None):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _EncodeHandler)
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.lock = threading.Lock()
+        self.backend = backend or default_backend()
+        print(f"[Worker] 載入語意模型 {model_name} ({self.backend}) ...")
+        self.model = load_local_model(model_name, self.backend)
+        print(f"[Worker] 模型載入完成，監聽 {socket_path}")
+
+    def server_bind(self):
+        """以 0600 權限建立 socket 檔，只有啟動 worker 的使用者能連線。"""
+        previous = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(previous)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="常駐 embedding worker")
+    parser.add_argument("--socket", required=True)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backend", default=default_backend(), choices=["torch", "onnx"])
+    args = parser.parse_args()
+
+    worker = EmbeddingWorker(args.socket, args.model, args.backend)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=worker.shutdown).start())
+    try:
+        worker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.server_close()
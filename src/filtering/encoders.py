@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+# 以下設定皆於使用時才讀取環境變數，讓 main() 中 load_dotenv() 載入的 .env 也能生效
+# EMBEDDING_BACKEND — torch：sentence-transformers 預設後端；onnx：ONNX Runtime 量化模型，CPU 冷啟動與推論都較快
+EMBEDDING_BACKEND = "torch"
+# EMBEDDING_ONNX_FILE
+ONNX_MODEL_FILE = "onnx/model_quint8_avx2.onnx"
+# EMBEDDING_WORKER_SOCKET 設定後優先使用常駐的 embedding worker (Unix socket)，模型只需在 worker 中載入一次；
+# EMBEDDING_WORKER_AUTOSTART=1 時連不上會自動啟動
+WORKER_STARTUP_TIMEOUT = 60
+SOCKET_TIMEOUT = 120
+
+
+def send_frame(sock: socket.socket, payload: bytes) -> None:
+    sock.sendall(struct.pack("!I", len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("embedding worker 連線中斷")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (size,) = struct.unpack("!I", _recv_exact(sock, 4))
+    return _recv_exact(sock, size)
+
+
+def default_backend() -> str:
+    return os.environ.get("EMBEDDING_BACKEND") or EMBEDDING_BACKEND
+
+
+def load_local_model(model_name: str, backend: Optional[str] = None):
+    """在本行程內載入 SentenceTransformer；只有真正需要計算 embedding 時才 import torch。"""
+    from sentence_transformers import SentenceTransformer
+
+    if (backend or default_backend()) == "onnx":
+        onnx_file = os.environ.get("EMBEDDING_ONNX_FILE") or ONNX_MODEL_FILE
+        return SentenceTransformer(
+            model_name, backend="onnx", model_kwargs={"file_name": onnx_file}
+        )
+    return SentenceTransformer(model_name)
+
+
+class RemoteEncoder:
+    """透過 Unix socket 呼叫常駐 embedding worker，介面與 SentenceTransformer.encode 相同。"""
+
+    def __init__(self, socket_path: str, model_name: str, backend: str):
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.backend = backend
+
+    def ping(self) -> bool:
+        """確認 worker 存活，且載入的是同一個模型與後端 (量化 ONNX 與 torch 的向量不可混用)。"""
+        try:
+            reply = json.loads(self._request({"op": "ping"}).decode("utf-8"))
+        except (OSError, ValueError):
+            return False
+        return reply.get("model") == self.model_name and reply.get("backend") == self.backend
+
+    def _request(self, message: dict) -> bytes:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(SOCKET_TIMEOUT)
+            sock.connect(self.socket_path)
+            send_frame(sock, json.dumps(message, ensure_ascii=False).encode("utf-8"))
+            return recv_frame(sock)
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, show_progress_bar: bool = False) -> np.ndarray:
+        payload = self._request(
+            {"op": "encode", "model": self.model_name, "backend": self.backend, "texts": list(texts)}
+        )
+        if not payload:
+            raise RuntimeError("embedding worker 載入的模型與請求不符")
+        return np.load(io.BytesIO(payload), allow_pickle=False)
+
+
+def _spawn_worker(socket_path: str, model_name: str, backend: str) -> None:
+    subprocess.Popen(
+        [sys.executable, "-m", "src.filtering.embedding_worker",
+         "--socket", socket_path, "--model", model_name, "--backend", backend],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def load_encoder(model_name: str, backend: Optional[str] = None):
+    """回傳具備 encode() 的編碼器：優先連線常駐 worker，否則在本行程載入模型。"""
+    backend = backend or default_backend()
+    worker_socket = os.environ.get("EMBEDDING_WORKER_SOCKET", "")
+    if worker_socket:
+        remote = RemoteEncoder(worker_socket, model_name, backend)
+        if remote.ping():
+            print(f"[Dedup] 使用常駐 embedding worker ({worker_socket})")
+            return remote
+        if os.environ.get("EMBEDDING_WORKER_AUTOSTART", "") == "1":
+            print("[Dedup] 啟動常駐 embedding worker ...")
+            _spawn_worker(worker_socket, model_name, backend)
+            deadline = time.monotonic() + WORKER_STARTUP_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(0.5)
+                if remote.ping():
+                    return remote
+            print("[Dedup] ⚠️ worker 啟動逾時，改為本地載入模型")
+
+    return load_local_model(model_name, backend)
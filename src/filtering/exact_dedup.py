@@ -0,0 +1,135 @@
+import hashlib
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+# 追蹤用查詢參數：前綴比對 (utm_*) 與完整名稱比對
+_TRACKING_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = {"ref", "ref_src", "ref_url", "fbclid", "gclid", "mc_cid", "mc_eid", "cmpid"}
+# 正規化後的標題至少要這麼長才以雜湊直接判定重複，避免 "Show HN" 之類短標題誤併
+MIN_TITLE_CHARS = 20
+# SimHash 漢明距離不超過此值即視為近乎相同；64 位元切成 4 段，距離 ≤ 3 時至少一段完全相同
+SIMHASH_DISTANCE = 3
+SIMHASH_BANDS = 4
+# shingle 數太少時 SimHash 不穩定，略過近似比對
+MIN_SHINGLES = 8
+
+_WORD_RE = re.compile(r"\w+")
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+_BAND_BITS = 64 // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+_BIT_WEIGHTS = np.uint64(1) << np.arange(64, dtype=np.uint64)
+
+
+def canonical_url(url: str) -> str:
+    """URL 正規化：統一 scheme 與主機名稱大小寫、去掉 www. 與 fragment、移除追蹤參數並排序查詢字串。"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        # port 不是合法數字 (例如 "example.com:abc")：保留原始 netloc，不讓單一壞 URL 中斷整批去重
+        host, port = parts.netloc.lower(), None
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PREFIXES) and k.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https" if parts.scheme in ("http", "https", "") else parts.scheme,
+                       host, path, urlencode(query), ""))
+
+
+def normalize_title(title: str) -> str:
+    """標題正規化：不分大小寫，只保留文字與數字，空白壓縮為單一空格。"""
+    return " ".join(_WORD_RE.findall(title.casefold()))
+
+
+def _shingles(text: str) -> List[str]:
+    """英文以 3-gram 詞組為 shingle；中文沒有空白分詞，改用 4 字元 n-gram。"""
+    text = text.casefold()
+    if _CJK_RE.search(text):
+        compact = "".join(_WORD_RE.findall(text))
+        return [compact[i : i + 4] for i in range(len(compact) - 3)]
+    words = _WORD_RE.findall(text)
+    return [" ".join(words[i : i + 3]) for i in range(len(words) - 2)]
+
+
+def simhash(text: str) -> Optional[int]:
+    """64 位元 SimHash；shingle 不足 MIN_SHINGLES 時回傳 None。"""
+    shingles = set(_shingles(text))
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # 每個位元上 1 的票數過半即設為 1
+    votes = ((hashes[:, None] & _BIT_WEIGHTS) != 0).sum(axis=0)
+    return int(_BIT_WEIGHTS[votes * 2 > len(hashes)].sum())
+
+
+class ExactDeduper:
+    """語意去重前的快速通道：以 dict 查找合併同一 URL、同一標題或 SimHash 近乎相同的文章。
+
+    每篇文章以成員編號登記；後續命中的文章直接對應到先前的成員，不必再計算 embedding。
+    SimHash 以分段 (band) 索引查找候選，再以漢明距離確認。
+    """
+
+    def __init__(self, use_simhash: bool = True):
+        self.use_simhash = use_simhash
+        self._keys: Dict[str, int] = {}
+        self._bands: List[Dict[int, List[Tuple[int, int]]]] = [{} for _ in range(SIMHASH_BANDS)]
+
+    def _near(self, fingerprint: int) -> Optional[int]:
+        for band, index in enumerate(self._bands):
+            for other, member in index.get((fingerprint >> (band * _BAND_BITS)) & _BAND_MASK, ()):
+                if (fingerprint ^ other).bit_count() <= SIMHASH_DISTANCE:
+                    return member
+        return None
+
+    def _add_fingerprint(self, fingerprint: int, member: int) -> None:
+        for band, index in enumerate(self._bands):
+            index.setdefault((fingerprint >> (band * _BAND_BITS)) & _BAND_MASK, []).append((fingerprint, member))
+
+    def add(self, urls: Sequence[str], titles: Sequence[str], texts: Sequence[str],
+            first_id: int) -> Tuple[List[int], Dict[int, int]]:
+        """登記一批文章，回傳 (需送語意去重的列, {重複列: 對應的成員編號})。
+
+        新文章依序取得成員編號 first_id, first_id + 1, ...，與之後送進分群的順序一致。
+        """
+        unique: List[int] = []
+        duplicates: Dict[int, int] = {}
+
+        for row, (url, title, text) in enumerate(zip(urls, titles, texts)):
+            keys = ["u:" + canonical_url(url)] if url else []
+            norm_title = normalize_title(title)
+            if len(norm_title) >= MIN_TITLE_CHARS:
+                keys.append("t:" + hashlib.blake2b(norm_title.encode("utf-8"), digest_size=16).hexdigest())
+            fingerprint = simhash(text) if self.use_simhash else None
+
+            member = next((self._keys[k] for k in keys if k in self._keys), None)
+            if member is None and fingerprint is not None:
+                member = self._near(fingerprint)
+
+            if member is None:
+                member = first_id + len(unique)
+                unique.append(row)
+                if fingerprint is not None:
+                    self._add_fingerprint(fingerprint, member)
+            else:
+                duplicates[row] = member
+            # 重複文章的其他鍵也指向同一成員，讓轉載鏈 (A 同 URL、B 同標題) 也能一併合併
+            for key in keys:
+                self._keys.setdefault(key, member)
+
+        return unique, duplicates
@@ -0,0 +1,161 @@
+import os
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.filtering.clustering import normalize_rows
+from src.utils.local_cache import cache_path, load_json, save_json
+
+RETENTION_DAYS = 7
+MIN_TRAIN_SIZE = 256
+N_PROBE = 8
+KMEANS_ITERATIONS = 10
+
+
+def _spherical_kmeans(vectors: np.ndarray, k: int, seed: int = 42) -> np.ndarray:
+    """在單位向量上跑簡易 k-means，回傳正規化後的群中心。"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)]
+    for _ in range(KMEANS_ITERATIONS):
+        labels = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(k):
+            members = vectors[labels == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = normalize_rows(centroids)
+    return centroids
+
+
+class HistoryIndex:
+    """過去已播報事件代表的本地 IVF 向量索引，用於跨日去重。
+
+    向量依最近的群中心分桶，查詢時只掃描最相近的 N_PROBE 個桶；
+    資料量小於 MIN_TRAIN_SIZE 時直接暴力比對。超過保存期限的條目在載入與每次 add() 時淘汰，
+    常駐服務中長期存在的索引也不會無限成長。
+    """
+
+    def __init__(self, name: str = "history_index", retention_days: float = RETENTION_DAYS):
+        self.retention = retention_days * 86400
+        self.arrays_path = cache_path(f"{name}.npz")
+        self.meta_path = cache_path(f"{name}.json")
+
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.added_at = np.zeros(0, dtype=np.float64)
+        self.titles: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._trained_size = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def _load(self) -> None:
+        if not os.path.exists(self.arrays_path):
+            return
+        try:
+            with np.load(self.arrays_path) as data:
+                vectors = data["vectors"]
+                added_at = data["added_at"]
+            meta = load_json(self.meta_path, {}) or {}
+            titles = meta.get("titles", [])
+        except Exception as e:
+            print(f"[History] 讀取歷史索引失敗，重新建立: {e}")
+            return
+        if len(titles) != len(vectors):
+            print("[History] 歷史索引與描述資料不一致，重新建立")
+            return
+
+        self.vectors = vectors.astype(np.float32)
+        self.added_at = added_at
+        self.titles = titles
+        self._expire()
+        self._train()
+
+    def _expire(self) -> bool:
+        """淘汰超過保存期限的條目，回傳是否有條目被移除 (移除後倒排桶需要重建)。"""
+        keep = self.added_at >= time.time() - self.retention
+        if keep.all():
+            return False
+        self.vectors = self.vectors[keep]
+        self.added_at = self.added_at[keep]
+        self.titles = [t for t, k in zip(self.titles, keep) if k]
+        return True
+
+    def _train(self) -> None:
+        """資料量足夠時以 sqrt(n) 個群中心重新建立倒排桶。"""
+        n = len(self.vectors)
+        if n < MIN_TRAIN_SIZE:
+            self.centroids = None
+            self._lists = []
+            self._trained_size = 0
+            return
+        k = max(1, int(np.sqrt(n)))
+        self.centroids = _spherical_kmeans(self.vectors, k)
+        self._lists = [[] for _ in range(k)]
+        self._assign(0)
+        self._trained_size = n
+
+    def _assign(self, start: int) -> None:
+        labels = np.argmax(self.vectors[start:] @ self.centroids.T, axis=1)
+        for offset, label in enumerate(labels):
+            self._lists[label].append(start + offset)
+
+    def query(self, vectors: np.ndarray, threshold: float) -> List[Tuple[int, float]]:
+        """回傳每個查詢向量在歷史中最相似的條目 (index, score)；未超過門檻者 index 為 -1。"""
+        vectors = normalize_rows(vectors)
+        results: List[Tuple[int, float]] = [(-1, 0.0)] * len(vectors)
+        if not len(self) or not len(vectors) or vectors.shape[1] != self.vectors.shape[1]:
+            return results
+
+        if self.centroids is None:
+            sims = vectors @ self.vectors.T
+            for i, row in enumerate(sims):
+                j = int(np.argmax(row))
+                if row[j] > threshold:
+                    results[i] = (j, float(row[j]))
+            return results
+
+        n_probe = min(N_PROBE, len(self.centroids))
+        probes = np.argsort(-(vectors @ self.centroids.T), axis=1)[:, :n_probe]
+        for i, vec in enumerate(vectors):
+            candidates = np.fromiter(
+                (idx for p in probes[i] for idx in self._lists[p]), dtype=np.int64
+            )
+            if not len(candidates):
+                continue
+            sims = self.vectors[candidates] @ vec
+            j = int(np.argmax(sims))
+            if sims[j] > threshold:
+                results[i] = (int(candidates[j]), float(sims[j]))
+        return results
+
+    def add(self, vectors: np.ndarray, titles: List[str]) -> None:
+        """加入新的事件代表並淘汰過期條目；有條目被淘汰或資料量較上次訓練翻倍時重建群中心。"""
+        if not len(vectors):
+            return
+        expired = self._expire()
+        vectors = normalize_rows(vectors)
+        if len(self.vectors) and self.vectors.shape[1] != vectors.shape[1]:
+            print("[History] 向量維度改變，清空歷史索引")
+            self.vectors = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            self.added_at = np.zeros(0, dtype=np.float64)
+            self.titles = []
+            self.centroids = None
+
+        start = len(self.vectors)
+        self.vectors = vectors if not start else np.concatenate([self.vectors, vectors])
+        self.added_at = np.concatenate([self.added_at, np.full(len(vectors), time.time())])
+        self.titles.extend(titles)
+
+        if expired or self.centroids is None or len(self.vectors) >= 2 * self._trained_size:
+            self._train()
+        else:
+            self._assign(start)
+
+    def save(self) -> None:
+        tmp_path = self.arrays_path + ".tmp.npz"
+        np.savez(tmp_path, vectors=self.vectors, added_at=self.added_at)
+        os.replace(tmp_path, self.arrays_path)
+        save_json(self.meta_path, {"titles": self.titles})
@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+from src.utils.rate_limit import estimate_tokens
+
+TITLE_MAX_CHARS = 300
+SNIPPET_MAX_CHARS = 500
+# 解析前先截斷原始 HTML，避免超大 summary 拖慢解析
+RAW_MAX_CHARS = 20_000
+# 篇數達門檻才分派到多個行程；小批次時行程啟動成本高於收益。
+# 呼叫時才讀取 CLEAN_PARALLEL_THRESHOLD / CLEAN_PROCESSES (預設為 CPU 數)
+PARALLEL_THRESHOLD = 2000
+# 呼叫端 (排程器、HN / RSS 的連線池、daemon) 此時通常已有其他執行緒在跑，fork 可能複製到被鎖住的鎖而卡死；
+# 改用 forkserver (不支援時用 spawn) 從乾淨的行程啟動 worker
+_MP_CONTEXT = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_GARBLED_RE = re.compile(r"[^\x00-\x7F\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]+")
+_SKIP_TAGS = {"script", "style", "noscript", "template"}
+_BLOCK_TAGS = {"p", "br", "div", "li", "tr", "td", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote"}
+
+
+class _Enough(Exception):
+    pass
+
+
+class _TextExtractor(HTMLParser):
+    """串流 HTML 解析：只收集可見文字，累積到上限就中止解析。"""
+
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.parts: List[str] = []
+        self.size = 0
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self.parts.append(data)
+        self.size += len(data)
+        if self.size >= self.limit:
+            raise _Enough
+
+
+def strip_html(text: str, limit: Optional[int] = None) -> str:
+    """移除 HTML 標籤並解碼實體；取得約 limit 字元的文字後即停止解析。"""
+    if "<" not in text and "&" not in text:
+        return text
+    # 預留空白壓縮與亂碼過濾的餘裕
+    parser = _TextExtractor(limit * 2 if limit else RAW_MAX_CHARS)
+    try:
+        parser.feed(text[:RAW_MAX_CHARS])
+        # 結尾不完整的標籤 (常見於 RAW_MAX_CHARS 截斷處) 不當作文字輸出
+        if not parser.rawdata.startswith("<"):
+            parser.close()
+    except _Enough:
+        pass
+    return "".join(parser.parts)
+
+
+def clean_text(text: str, max_chars: Optional[int] = None) -> str:
+    """移除 HTML 標籤、亂碼，並將連續空白壓縮為單一空格；可選擇截斷至 max_chars。"""
+    text = strip_html(text, max_chars)
+    text = _GARBLED_RE.sub("", text)
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return text[:max_chars] if max_chars else text
+
+
+def _clean_chunk(texts: List[str], max_chars: Optional[int]) -> List[str]:
+    return [clean_text(t, max_chars) for t in texts]
+
+
+def clean_texts(texts: List[str], max_chars: Optional[int] = None,
+                processes: Optional[int] = None) -> Tuple[List[str], List[int]]:
+    """批次清洗文字，回傳 (清洗後文字, 估計 token 數)。
+
+    篇數達 CLEAN_PARALLEL_THRESHOLD (預設 PARALLEL_THRESHOLD) 時切塊分派到行程池；token 數以 estimate_tokens 計算，
+    供 LLM 分批與成本估算直接沿用。
+    """
+    processes = processes or int(os.environ.get("CLEAN_PROCESSES") or 0) or os.cpu_count() or 1
+    threshold = int(os.environ.get("CLEAN_PARALLEL_THRESHOLD") or PARALLEL_THRESHOLD)
+    if processes > 1 and len(texts) >= threshold:
+        chunk = -(-len(texts) // (processes * 4))
+        chunks = [texts[i : i + chunk] for i in range(0, len(texts), chunk)]
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context(_MP_CONTEXT)) as pool:
+            cleaned = [t for part in pool.map(partial(_clean_chunk, max_chars=max_chars), chunks) for t in part]
+    else:
+        cleaned = _clean_chunk(texts, max_chars)
+    return cleaned, [estimate_tokens(t) for t in cleaned]
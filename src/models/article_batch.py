@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.models.schemas import RawArticle
+
+
+def _timestamp(moment: datetime) -> float:
+    """UNIX timestamp；沒有時區的 datetime 一律視為 UTC (與採集端一致)，不受主機時區影響。"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def make_article(title: str, url: str, source: str, published_at: datetime,
+                 content_snippet: str, similar_sources: Optional[List[str]] = None,
+                 token_count: Optional[int] = None) -> RawArticle:
+    """以 model_construct 建立 RawArticle，略過驗證；僅用於欄位型別已確定的內部資料。"""
+    return RawArticle.model_construct(
+        title=title,
+        url=url,
+        source=source,
+        published_at=published_at,
+        content_snippet=content_snippet,
+        similar_sources=similar_sources if similar_sources is not None else [],
+        token_count=token_count,
+    )
+
+
+class ArticleBatch:
+    """欄式 (columnar) 文章批次：採集與去重的熱路徑以整欄操作，不為每篇文章建立 Pydantic 物件。
+
+    字串欄位以 list 保存，發布時間為 float64 UNIX timestamp 陣列，token 數為 int32 陣列 (-1 表示未計算)；
+    只有在 API 邊界 (評分、廣播) 才透過 to_articles() 轉回 RawArticle。
+    """
+
+    __slots__ = ("titles", "urls", "sources", "timestamps", "snippets", "similar_sources", "token_counts")
+
+    def __init__(
+        self,
+        titles: Optional[List[str]] = None,
+        urls: Optional[List[str]] = None,
+        sources: Optional[List[str]] = None,
+        timestamps: Optional[Sequence[float]] = None,
+        snippets: Optional[List[str]] = None,
+        similar_sources: Optional[List[List[str]]] = None,
+        token_counts: Optional[Sequence[int]] = None,
+    ):
+        self.titles = titles if titles is not None else []
+        self.urls = urls if urls is not None else []
+        self.sources = sources if sources is not None else []
+        self.timestamps = np.asarray(timestamps if timestamps is not None else [], dtype=np.float64)
+        self.snippets = snippets if snippets is not None else []
+        self.similar_sources = similar_sources if similar_sources is not None else [[] for _ in self.titles]
+        self.token_counts = np.asarray(
+            token_counts if token_counts is not None else np.full(len(self.titles), -1), dtype=np.int32
+        )
+        lengths = {len(self.titles), len(self.urls), len(self.sources), len(self.timestamps),
+                   len(self.snippets), len(self.similar_sources), len(self.token_counts)}
+        if len(lengths) > 1:
+            raise ValueError(f"ArticleBatch 欄位長度不一致: {sorted(lengths)}")
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @classmethod
+    def from_articles(cls, articles: Iterable[RawArticle]) -> "ArticleBatch":
+        articles = list(articles)
+        return cls(
+            titles=[a.title for a in articles],
+            urls=[a.url for a in articles],
+            sources=[a.source for a in articles],
+            timestamps=[_timestamp(a.published_at) for a in articles],
+            snippets=[a.content_snippet for a in articles],
+            similar_sources=[list(a.similar_sources) for a in articles],
+            token_counts=[a.token_count if a.token_count is not None else -1 for a in articles],
+        )
+
+    @classmethod
+    def concat(cls, batches: Iterable["ArticleBatch"]) -> "ArticleBatch":
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls()
+        return cls(
+            titles=[t for b in batches for t in b.titles],
+            urls=[u for b in batches for u in b.urls],
+            sources=[s for b in batches for s in b.sources],
+            timestamps=np.concatenate([b.timestamps for b in batches]),
+            snippets=[s for b in batches for s in b.snippets],
+            similar_sources=[s for b in batches for s in b.similar_sources],
+            token_counts=np.concatenate([b.token_counts for b in batches]),
+        )
+
+    def take(self, indices: Sequence[int]) -> "ArticleBatch":
+        """依索引取出子批次 (共用字串物件，不複製內容)。"""
+        indices = [int(i) for i in indices]
+        return ArticleBatch(
+            titles=[self.titles[i] for i in indices],
+            urls=[self.urls[i] for i in indices],
+            sources=[self.sources[i] for i in indices],
+            timestamps=self.timestamps[indices] if indices else [],
+            snippets=[self.snippets[i] for i in indices],
+            similar_sources=[self.similar_sources[i] for i in indices],
+            token_counts=self.token_counts[indices] if indices else [],
+        )
+
+    def since(self, cutoff: datetime) -> "ArticleBatch":
+        """以向量化比較保留發布時間不早於 cutoff 的文章；沒有時區的 cutoff 視為 UTC。"""
+        keep = np.flatnonzero(self.timestamps >= _timestamp(cutoff))
+        return self if len(keep) == len(self) else self.take(keep)
+
+    def article(self, index: int) -> RawArticle:
+        return make_article(
+            title=self.titles[index],
+            url=self.urls[index],
+            source=self.sources[index],
+            published_at=datetime.fromtimestamp(float(self.timestamps[index]), tz=timezone.utc),
+            content_snippet=self.snippets[index],
+            similar_sources=self.similar_sources[index],
+            token_count=int(self.token_counts[index]) if self.token_counts[index] >= 0 else None,
+        )
+
+    def to_articles(self) -> List[RawArticle]:
+        """轉回 RawArticle 列表；與批次共用 similar_sources 串列，合併來源會同步反映。"""
+        return [self.article(i) for i in range(len(self))]
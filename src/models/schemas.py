@@ -11,6 +11,8 @@ class RawArticle(BaseModel):
     published_at: datetime
     content_snippet: str
     similar_sources: list[str] = []
+    # 清洗階段估計的 title + content_snippet token 數，供評分分批與成本估算沿用
+    token_count: Optional[int] = None
 
 
 class EvaluationResult(BaseModel):
@@ -0,0 +1,185 @@
+import json
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.models.schemas import ScoredArticle
+from src.notifications.broadcaster import format_daily_briefing_messages, target_chat_ids
+from src.utils import metrics
+
+# 預設值；使用時讀取 AUDIENCES_CONFIG / BRIEFING_TOP_N 覆寫
+AUDIENCES_CONFIG = "audiences.json"
+DEFAULT_TOP_N = 3
+
+
+def default_top_n() -> int:
+    return int(os.environ.get("BRIEFING_TOP_N") or DEFAULT_TOP_N)
+
+
+class AudienceProfile:
+    """受眾設定：決定從共用的評分結果中挑哪些文章、送到哪些群組。
+
+    sources 只收錄來自這些來源的文章 (合併來源 similar_sources 也算)，exclude_sources 排除主要來源；
+    min_score 是達標門檻 (預設沿用 LLM 的 is_qualified)；topic_weights 為關鍵字 → 加權分，
+    只影響排序。沒有達標文章時，allow_downgrade 決定是否改送總分最高的 top_n 篇。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        chat_ids: Optional[List[str]] = None,
+        top_n: Optional[int] = None,
+        min_score: Optional[float] = None,
+        sources: Optional[List[str]] = None,
+        exclude_sources: Optional[List[str]] = None,
+        topic_weights: Optional[Dict[str, float]] = None,
+        allow_downgrade: bool = True,
+    ):
+        self.name = name
+        self.chat_ids = [str(c) for c in chat_ids] if chat_ids is not None else target_chat_ids()
+        self.top_n = top_n if top_n is not None else default_top_n()
+        self.min_score = min_score
+        self.sources = set(sources) if sources else None
+        self.exclude_sources = set(exclude_sources or ())
+        self.topic_weights = {k.casefold(): float(v) for k, v in (topic_weights or {}).items()}
+        self.allow_downgrade = allow_downgrade
+
+    def select(self, scored: List[ScoredArticle],
+               columns: Optional["ScoredColumns"] = None) -> Tuple[List[ScoredArticle], bool]:
+        """挑選此受眾的簡報文章，回傳 (文章, 是否降級)；與 select_briefing 的降級語意一致。
+
+        columns 為 plan_briefings 為所有受眾共用的欄式視圖；單獨呼叫時才臨時建立。
+        """
+        columns = columns if columns is not None else ScoredColumns(scored)
+        mask = np.ones(len(scored), dtype=bool)
+        if self.sources is not None:
+            mask &= columns.origin_mask(self.sources)
+        if self.exclude_sources:
+            mask &= ~columns.source_mask(self.exclude_sources)
+
+        rank = columns.scores
+        if self.topic_weights:
+            rank = rank + sum(weight * columns.keyword_mask(keyword) for keyword, weight in self.topic_weights.items())
+        rows = np.flatnonzero(mask)
+        # 穩定排序：沒有加權時維持輸入 (已依總分排序) 的原始順序
+        rows = rows[np.argsort(-rank[rows], kind="stable")]
+
+        qualified = columns.qualified if self.min_score is None else columns.scores >= self.min_score
+        top = rows[qualified[rows]][: self.top_n]
+        if len(top):
+            return [scored[i] for i in top], False
+        if not self.allow_downgrade:
+            return [], False
+        return [scored[i] for i in rows[: self.top_n]], True
+
+
+class ScoredColumns:
+    """評分結果的欄式視圖：分數、達標旗標、來源與關鍵字命中只計算一次，供所有受眾以向量化方式挑選。"""
+
+    def __init__(self, scored: List[ScoredArticle]):
+        self.scored = scored
+        self.scores = np.array([s.evaluation.total_score for s in scored], dtype=np.float64)
+        self.qualified = np.array([s.evaluation.is_qualified for s in scored], dtype=bool)
+        self._sources = np.array([s.article.source for s in scored], dtype=object)
+        self._texts: Optional[List[str]] = None
+        self._origins: Dict[str, np.ndarray] = {}
+        self._keywords: Dict[str, np.ndarray] = {}
+
+    def source_mask(self, names: Set[str]) -> np.ndarray:
+        """主要來源屬於 names 的文章。"""
+        return np.isin(self._sources, list(names))
+
+    def origin_mask(self, names: Set[str]) -> np.ndarray:
+        """主要來源或合併來源 (similar_sources) 屬於 names 的文章。"""
+        mask = np.zeros(len(self.scored), dtype=bool)
+        for name in names:
+            if name not in self._origins:
+                self._origins[name] = np.array(
+                    [s.article.source == name or name in s.article.similar_sources for s in self.scored],
+                    dtype=bool,
+                )
+            mask |= self._origins[name]
+        return mask
+
+    def keyword_mask(self, keyword: str) -> np.ndarray:
+        """標題或戰略簡報中出現 keyword (不分大小寫) 的文章。"""
+        if keyword not in self._keywords:
+            if self._texts is None:
+                self._texts = [
+                    f"{s.article.title} {s.evaluation.executive_summary or ''}".casefold() for s in self.scored
+                ]
+            self._keywords[keyword] = np.array([keyword in text for text in self._texts], dtype=bool)
+        return self._keywords[keyword]
+
+
+class AudienceBriefing:
+    """單一受眾的挑選結果與渲染後訊息；選到相同文章的受眾共用同一份 messages。"""
+
+    __slots__ = ("profile", "articles", "is_downgraded", "messages")
+
+    def __init__(self, profile: AudienceProfile, articles: List[ScoredArticle],
+                 is_downgraded: bool, messages: List[str]):
+        self.profile = profile
+        self.articles = articles
+        self.is_downgraded = is_downgraded
+        self.messages = messages
+
+    @property
+    def content_key(self) -> str:
+        """簡報內容的識別：收錄文章的 URL 與是否降級，與渲染後的文字 (日期、摘要措辭) 無關。"""
+        return json.dumps([[a.article.url for a in self.articles], self.is_downgraded])
+
+
+def plan_briefings(scored: List[ScoredArticle], profiles: List[AudienceProfile]) -> List[AudienceBriefing]:
+    """對共用的評分結果逐一套用受眾設定；挑選結果相同的受眾只渲染一次訊息。
+
+    scored 需已依總分由高到低排序。沒有選到任何文章的受眾會被略過。
+    """
+    rendered: Dict[tuple, List[str]] = {}
+    briefings: List[AudienceBriefing] = []
+    with metrics.span("audience_plan"):
+        columns = ScoredColumns(scored)
+        for profile in profiles:
+            articles, is_downgraded = profile.select(scored, columns)
+            if not articles:
+                print(f"[受眾] {profile.name}: 沒有符合條件的文章，本輪不發送")
+                continue
+            key = (tuple(a.article.url for a in articles), is_downgraded)
+            if key not in rendered:
+                rendered[key] = format_daily_briefing_messages(articles, is_downgraded=is_downgraded)
+            briefings.append(AudienceBriefing(profile, articles, is_downgraded, rendered[key]))
+    metrics.incr("audience_renders", len(rendered))
+    print(f"[受眾] {len(briefings)} 個受眾，共渲染 {len(rendered)} 組不同的簡報")
+    return briefings
+
+
+def group_deliveries(briefings: List[AudienceBriefing]) -> List[Tuple[List[str], List[str], str]]:
+    """把共用同一份訊息的受眾合併成 (訊息, 群組, 內容識別) 組合，交給 send_briefings 一次發送。"""
+    groups: Dict[int, Tuple[List[str], List[str], str]] = {}
+    for briefing in briefings:
+        _, chat_ids, _ = groups.setdefault(
+            id(briefing.messages), (briefing.messages, [], briefing.content_key)
+        )
+        for chat_id in briefing.profile.chat_ids:
+            if chat_id not in chat_ids:
+                chat_ids.append(chat_id)
+    return list(groups.values())
+
+
+def load_audiences(path: Optional[str] = None, default_top_n: Optional[int] = None) -> List[AudienceProfile]:
+    """讀取受眾設定檔 (JSON)；檔案不存在時以 TARGET_CHAT_IDS 建立單一預設受眾，並略過 enabled=false 的項目。"""
+    path = path or os.environ.get("AUDIENCES_CONFIG") or AUDIENCES_CONFIG
+    if not os.path.exists(path):
+        return [AudienceProfile("default", top_n=default_top_n)]
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    configs = data.get("audiences", []) if isinstance(data, dict) else data
+    profiles = []
+    for config in configs:
+        options = dict(config)
+        if not options.pop("enabled", True):
+            continue
+        options.setdefault("top_n", default_top_n)
+        profiles.append(AudienceProfile(**options))
+    return profiles
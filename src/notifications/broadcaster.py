@@ -1,66 +1,326 @@
+import hashlib
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List
+from html import escape
+from string import Template
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
+import requests
 import telebot
+from telebot import apihelper
 
 from src.models.schemas import ScoredArticle
+from src.utils import metrics
+from src.utils.local_cache import cache_path, load_json, save_json
+from src.utils.rate_limit import TokenBucket
 
+# Telegram 限制：全域約 30 則/秒，同一群組約 20 則/分鐘；發送時才讀取
+# TELEGRAM_MAX_WORKERS / TELEGRAM_GLOBAL_PER_SECOND / TELEGRAM_PER_CHAT_PER_MINUTE 覆寫以下預設值
+MAX_WORKERS = 8
+GLOBAL_PER_SECOND = 25.0
+PER_CHAT_PER_MINUTE = 20.0
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0
+# 重試也不會成功的群組錯誤 (400 chat not found、403 bot 被踢出或封鎖)：記為 dropped，不阻擋本輪完成
+PERMANENT_ERROR_CODES = (400, 403)
+OUTBOX_FILE = "telegram_outbox.json"
+OUTBOX_TTL_SECONDS = 2 * 86400
+MESSAGE_LIMIT = 4096
+
+# 預先編譯的訊息模板；欄位在代入前都經過 HTML 跳脫
+_HEADER = Template("🤖 <b>Yoyo AI 全域情報 (2.0 嚴格版)</b> | $today\n")
+_CONTINUED = Template("🤖 <b>Yoyo AI 全域情報 (續 $part/$total)</b> | $today\n")
+_DOWNGRADED = Template(
+    "⚠️ <i>今日雷達未偵測到 S 級情報，"
+    "啟動降級播報 (顯示 Top $count 潛力事件)。</i>\n"
+)
+_ITEM = Template(
+    '<b>[$score分] $title</b>\n'
+    '來源: $source | <a href="$url">🔗 閱讀原文</a>\n'
+    '🔥 <b>戰略簡報:</b> $summary\n'
+    '━━━━━━━━━━'
+)
+_FOOTER = "\n💬 <i>(此報告由 2.0 系統自動產出)</i>"
+
+
+def _tg_len(text: str) -> int:
+    """Telegram 以 UTF-16 code unit 計算長度 (emoji 佔 2)。"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _truncate_to_fit(render: Callable[[str], str], text: str, budget: int) -> str:
+    """二分搜尋 text 最長可保留的前綴，使 render(前綴 + "…") 不超過 budget。
+
+    長度以跳脫後的 UTF-16 code unit 計算 (與 Telegram 一致)，截斷發生在跳脫前，不會切斷實體；
+    Python 字串以 code point 切片，也不會拆開 emoji 的代理對。
+    """
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if _tg_len(render(text[:mid] + "…")) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + "…"
+
+
+def _render_item(article: ScoredArticle, budget: int) -> str:
+    """渲染單篇文章；超出 budget 時先截短摘要，摘要只剩 "…" 仍放不下時再截短標題 (URL 不截斷)。"""
+    ev = article.evaluation
+    a = article.article
+    fields = {
+        "score": ev.total_score,
+        "source": escape(a.source, quote=False),
+        "url": escape(a.url, quote=True),
+    }
+
+    def render(title: str, summary: str) -> str:
+        return _ITEM.substitute(fields, title=escape(title, quote=False), summary=escape(summary, quote=False))
+
+    title = a.title
+    summary = ev.executive_summary or ev.reasoning[:80]
+    item = render(title, summary)
+    if _tg_len(item) <= budget:
+        return item
+    if _tg_len(render(title, "…")) > budget:
+        title = _truncate_to_fit(lambda t: render(t, "…"), title, budget)
+    summary = _truncate_to_fit(lambda s: render(title, s), summary, budget)
+    return render(title, summary)
 
-def format_daily_briefing(articles: List[ScoredArticle], is_downgraded: bool = False) -> str:
-    """將評分後的文章格式化為 HTML 廣播訊息。"""
-    today = datetime.now().strftime("%Y-%m-%d")
-    lines = [f"🤖 <b>Yoyo AI 全域情報 (2.0 嚴格版)</b> | {today}\n"]
 
+def _briefing_blocks(articles: List[ScoredArticle], is_downgraded: bool, budget: int) -> List[str]:
+    blocks = [_HEADER.substitute(today=datetime.now().strftime("%Y-%m-%d"))]
     if is_downgraded:
-        lines.append(
-            "⚠️ <i>今日雷達未偵測到 S 級情報，"
-            "啟動降級播報 (顯示 Top 3 潛力事件)。</i>\n"
-        )
+        blocks.append(_DOWNGRADED.substitute(count=len(articles)))
+    blocks.extend(_render_item(article, budget) for article in articles)
+    blocks.append(_FOOTER)
+    return blocks
+
+
+def select_briefing(scored: List[ScoredArticle], top_n: int = 3) -> Tuple[List[ScoredArticle], bool]:
+    """挑選簡報文章：有達標 (S 級) 文章時取前 top_n 篇，否則降級為總分最高的 top_n 篇。
+
+    回傳 (文章, 是否降級)；輸入需已依總分由高到低排序。
+    """
+    qualified = [s for s in scored if s.evaluation.is_qualified]
+    if qualified:
+        return qualified[:top_n], False
+    return scored[:top_n], True
+
+
+def format_daily_briefing_messages(articles: List[ScoredArticle], is_downgraded: bool = False,
+                                   limit: int = MESSAGE_LIMIT) -> List[str]:
+    """將評分後的文章格式化為一或多則 HTML 訊息，每則都不超過 Telegram 的長度上限。
+
+    以文章為單位貪婪地裝入訊息，標籤永遠不會被拆到兩則訊息；
+    第二則起加上「續」標頭與頁碼。
+    """
+    today = datetime.now().strftime("%Y-%m-%d")
+    reserve = _tg_len(_CONTINUED.substitute(today=today, part=99, total=99)) + 1
+    blocks = _briefing_blocks(articles, is_downgraded, limit - reserve)
+
+    parts: List[List[str]] = [[]]
+    size = 0
+    for block in blocks:
+        block_len = _tg_len(block) + 1
+        budget = limit if len(parts) == 1 else limit - reserve
+        if parts[-1] and size + block_len > budget:
+            parts.append([])
+            size = 0
+        parts[-1].append(block)
+        size += block_len
+
+    total = len(parts)
+    messages = []
+    for number, part in enumerate(parts, start=1):
+        if number > 1:
+            part = [_CONTINUED.substitute(today=today, part=number, total=total)] + part
+        messages.append("\n".join(part))
+    return messages
+
+
+def format_daily_briefing(articles: List[ScoredArticle], is_downgraded: bool = False) -> str:
+    """將評分後的文章格式化為單一 HTML 廣播訊息 (不分段)。"""
+    return "\n".join(_briefing_blocks(articles, is_downgraded, MESSAGE_LIMIT))
+
+
+class _Outbox:
+    """記錄每個群組已送出的分段數，廣播中途崩潰後重跑時從斷點續送、不重複發送。
+
+    同一次發送可包含多組不同的訊息 (例如不同受眾的簡報)，各以內容識別 (通常是收錄文章的 URL)
+    的雜湊為批次 id，重新渲染 (例如跨過午夜、日期標頭改變) 也不會被當成新的簡報重送；
+    進度在每則訊息送出後立即落盤，只有「已送出但尚未落盤」的那一則在崩潰時可能重送。
+    """
+
+    def __init__(self):
+        self.path = cache_path(OUTBOX_FILE)
+        self._lock = threading.Lock()
+        now = time.time()
+        data = load_json(self.path, {})
+        self._data = {
+            key: entry for key, entry in data.items()
+            if now - entry.get("created_at", 0) < OUTBOX_TTL_SECONDS
+        }
+
+    def open(self, identity: Union[str, List[str]]) -> str:
+        broadcast_id = hashlib.sha1(json.dumps(identity, ensure_ascii=False).encode("utf-8")).hexdigest()
+        with self._lock:
+            self._data.setdefault(broadcast_id, {"created_at": time.time(), "progress": {}})
+        return broadcast_id
 
-    for article in articles:
-        ev = article.evaluation
-        a = article.article
-        summary = ev.executive_summary or ev.reasoning[:80]
+    def sent_parts(self, broadcast_id: str, chat_id: str) -> int:
+        return self._data[broadcast_id]["progress"].get(chat_id, 0)
 
-        lines.append(
-            f'<b>[{ev.total_score}分] {a.title}</b>\n'
-            f'來源: {a.source} | <a href="{a.url}">🔗 閱讀原文</a>\n'
-            f'🔥 <b>戰略簡報:</b> {summary}\n'
-            f'━━━━━━━━━━'
-        )
+    def mark(self, broadcast_id: str, chat_id: str, parts_sent: int) -> None:
+        with self._lock:
+            self._data[broadcast_id]["progress"][chat_id] = parts_sent
+            save_json(self.path, self._data)
+
+    def finish(self, complete: Dict[str, bool]) -> None:
+        """全部群組都送達的批次即移除；有失敗的批次保留，下次執行只補送失敗的群組。"""
+        with self._lock:
+            for broadcast_id, done in complete.items():
+                if done:
+                    self._data.pop(broadcast_id, None)
+            save_json(self.path, self._data)
+
+
+def _retry_after(error: apihelper.ApiTelegramException) -> float:
+    parameters = (error.result_json or {}).get("parameters") or {}
+    return float(parameters.get("retry_after", RETRY_BACKOFF))
+
+
+def _send_with_retry(bot: telebot.TeleBot, chat_id: str, text: str,
+                     global_bucket: TokenBucket, chat_bucket: TokenBucket) -> None:
+    """送出單則訊息；429 依 retry_after 暫停該群組，5xx 與網路錯誤以指數退避重試。"""
+    for attempt in range(MAX_RETRIES + 1):
+        chat_bucket.acquire()
+        global_bucket.acquire()
+        try:
+            with metrics.span("telegram_send"):
+                bot.send_message(
+                    chat_id,
+                    text,
+                    parse_mode="HTML",
+                    disable_web_page_preview=True,
+                )
+            return
+        except apihelper.ApiTelegramException as e:
+            if attempt >= MAX_RETRIES or (e.error_code != 429 and e.error_code < 500):
+                raise
+            metrics.incr("telegram_retries", reason=str(e.error_code))
+            if e.error_code == 429:
+                chat_bucket.pause(_retry_after(e))
+            else:
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+        except (requests.RequestException, apihelper.ApiHTTPException):
+            if attempt >= MAX_RETRIES:
+                raise
+            metrics.incr("telegram_retries", reason="network")
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
 
-    lines.append("\n💬 <i>(此報告由 2.0 系統自動產出)</i>")
-    return "\n".join(lines)
 
+def target_chat_ids() -> List[str]:
+    """從 TARGET_CHAT_IDS (逗號分隔) 讀取預設廣播群組，去除重複並保留順序。"""
+    raw = os.environ.get("TARGET_CHAT_IDS", "")
+    return list(dict.fromkeys(cid.strip() for cid in raw.split(",") if cid.strip()))
 
-def send_telegram_broadcast(message: str):
-    """將訊息廣播至所有 Telegram 群組。"""
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name) or default)
+
+
+def send_briefings(deliveries: List[tuple], max_workers: Optional[int] = None) -> Dict[str, int]:
+    """一次發送多組簡報：deliveries 為 (訊息列表, 群組列表[, 內容識別]) 的組合，各組訊息送往各自的群組。
+
+    所有組合共用同一個執行緒池與全域速率上限，同一群組內的分段依序送出；
+    送出進度以內容識別記錄在 outbox 以便崩潰後續送，未提供時以訊息內容代替。永久性錯誤 (PERMANENT_ERROR_CODES) 的群組記為 dropped
+    並在 outbox 標記為完成，之後不再重送；只有暫時性錯誤計入 failed。
+    """
     token = os.environ.get("TELEGRAM_BOT_TOKEN") or os.environ.get("TELEGRAM_TOKEN")
-    chat_ids_raw = os.environ.get("TARGET_CHAT_IDS", "")
+    stats = {"sent": 0, "skipped": 0, "dropped": 0, "failed": 0}
 
     if not token:
         print("[廣播] ⚠️ 未設定 TELEGRAM_BOT_TOKEN，跳過發送")
-        return
+        return stats
 
-    if not chat_ids_raw:
-        print("[廣播] ⚠️ 未設定 TARGET_CHAT_IDS，跳過發送")
-        return
+    # 測試時可指向本地替身 Bot API，例如 TELEGRAM_API_URL=http://127.0.0.1:8081
+    api_url = os.environ.get("TELEGRAM_API_URL")
+    if api_url:
+        apihelper.API_URL = api_url.rstrip("/") + "/bot{0}/{1}"
+    if max_workers is None:
+        max_workers = int(_env_float("TELEGRAM_MAX_WORKERS", MAX_WORKERS))
+    global_per_second = _env_float("TELEGRAM_GLOBAL_PER_SECOND", GLOBAL_PER_SECOND)
+    per_chat_per_minute = _env_float("TELEGRAM_PER_CHAT_PER_MINUTE", PER_CHAT_PER_MINUTE)
 
     bot = telebot.TeleBot(token)
-    chat_ids = [cid.strip() for cid in chat_ids_raw.split(",") if cid.strip()]
+    outbox = _Outbox()
+    global_bucket = TokenBucket(global_per_second * 60, capacity=global_per_second)
+    tasks = []
+    for messages, chat_ids, *identity in deliveries:
+        if messages and chat_ids:
+            broadcast_id = outbox.open(identity[0] if identity else messages)
+            tasks.extend((broadcast_id, messages, chat_id) for chat_id in dict.fromkeys(chat_ids))
+    if not tasks:
+        print("[廣播] ⚠️ 沒有任何要發送的群組")
+        return stats
+    complete = {broadcast_id: True for broadcast_id, _, _ in tasks}
+    # 每群組的速率上限 (與 429 暫停) 由送往該群組的所有簡報共用，不同受眾的簡報疊加時也不會超速
+    chat_buckets = {
+        chat_id: TokenBucket(per_chat_per_minute, capacity=1) for chat_id in dict.fromkeys(c for _, _, c in tasks)
+    }
 
-    print(f"[廣播] 開始發送至 {len(chat_ids)} 個群組 ...")
-    for chat_id in chat_ids:
-        try:
-            bot.send_message(
-                chat_id,
-                message,
-                parse_mode="HTML",
-                disable_web_page_preview=True,
-            )
-            print(f"  ✅ 已發送至: {chat_id}")
-        except Exception as e:
-            print(f"  ❌ 發送至 {chat_id} 失敗: {e}")
-
-    print("[廣播] 發送完畢")
+    def deliver(broadcast_id: str, messages: List[str], chat_id: str) -> int:
+        start = outbox.sent_parts(broadcast_id, chat_id)
+        for index in range(start, len(messages)):
+            _send_with_retry(bot, chat_id, messages[index], global_bucket, chat_buckets[chat_id])
+            outbox.mark(broadcast_id, chat_id, index + 1)
+        return start
+
+    print(f"[廣播] 開始發送至 {len(chat_buckets)} 個群組 ({len(complete)} 組簡報) ...")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks)))) as pool:
+        futures = {pool.submit(deliver, *task): task for task in tasks}
+        for future in as_completed(futures):
+            broadcast_id, messages, chat_id = futures[future]
+            try:
+                already_sent = future.result()
+            except Exception as e:
+                if isinstance(e, apihelper.ApiTelegramException) and e.error_code in PERMANENT_ERROR_CODES:
+                    stats["dropped"] += 1
+                    outbox.mark(broadcast_id, chat_id, len(messages))
+                    metrics.incr("telegram_dropped", reason=str(e.error_code))
+                    print(f"  🚫 群組 {chat_id} 無法送達 ({e.error_code})，已略過且不再重送: {e.description}")
+                    continue
+                stats["failed"] += 1
+                complete[broadcast_id] = False
+                metrics.incr("telegram_failed")
+                print(f"  ❌ 發送至 {chat_id} 失敗: {e}")
+                continue
+            if already_sent >= len(messages):
+                stats["skipped"] += 1
+                print(f"  ⏭️ 已於先前執行送達: {chat_id}")
+            else:
+                stats["sent"] += 1
+                metrics.incr("telegram_sent")
+                print(f"  ✅ 已發送至: {chat_id}")
+
+    outbox.finish(complete)
+    print(f"[廣播] 發送完畢 (成功 {stats['sent']}，略過 {stats['skipped']}，"
+          f"無法送達 {stats['dropped']}，失敗 {stats['failed']})")
+    return stats
+
+
+def send_telegram_broadcast(messages: Union[str, List[str]],
+                            max_workers: Optional[int] = None) -> Dict[str, int]:
+    """將訊息 (或依序送出的多則分段訊息) 並發廣播至 TARGET_CHAT_IDS 的所有群組。"""
+    chat_ids = target_chat_ids()
+    if not chat_ids:
+        print("[廣播] ⚠️ 未設定 TARGET_CHAT_IDS，跳過發送")
+        return {"sent": 0, "skipped": 0, "dropped": 0, "failed": 0}
+    if isinstance(messages, str):
+        messages = [messages]
+    return send_briefings([(messages, chat_ids)], max_workers)
@@ -0,0 +1,157 @@
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.models.article_batch import ArticleBatch
+from src.models.schemas import EvaluationResult, RawArticle, ScoredArticle
+from src.utils.local_cache import cache_path, load_json, save_json
+
+RUNS_DIR = "runs"
+# artifact 格式有不相容變更時遞增；版本不符的 artifact 一律視為不存在而重新計算
+ARTIFACT_VERSION = 2
+STAGES = ("ingest", "dedup", "score", "broadcast")
+
+_SAFE_ID_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class IncompleteStageError(RuntimeError):
+    """階段中有項目未完成 (例如部分文章評分失敗)：不寫入 artifact，重跑同一 run id 時只補做缺少的部分。"""
+
+
+def _batch_columns(batch: ArticleBatch) -> dict:
+    return {
+        "titles": batch.titles,
+        "urls": batch.urls,
+        "sources": batch.sources,
+        "timestamps": batch.timestamps.tolist(),
+        "snippets": batch.snippets,
+        "similar_sources": batch.similar_sources,
+        "token_counts": batch.token_counts.tolist(),
+    }
+
+
+def _columns_batch(columns: dict) -> ArticleBatch:
+    return ArticleBatch(**columns)
+
+
+class RunCheckpoint:
+    """單次執行的階段性檢查點：每個階段完成後寫入一份帶版本的 artifact，並記錄在 manifest。
+
+    以同一個 run id 重跑時，已完成的階段直接讀回 artifact；評分階段另有逐篇追加的
+    partial ledger，中途失敗後只需評分尚未完成的文章。artifact 皆以欄式 JSON 保存，
+    embedding 另存為 .npy。
+    """
+
+    def __init__(self, run_id: str, root: Optional[str] = None):
+        self.run_id = _SAFE_ID_RE.sub("_", run_id)
+        self.dir = os.path.join(root or cache_path(RUNS_DIR), self.run_id)
+        os.makedirs(self.dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        manifest = load_json(self.manifest_path, {})
+        if manifest and manifest.get("version") != ARTIFACT_VERSION:
+            print(f"[Checkpoint] run {self.run_id} 的 artifact 版本 {manifest.get('version')} 不相容，重新開始")
+            manifest = {}
+        self.manifest = manifest or {"run_id": self.run_id, "version": ARTIFACT_VERSION, "stages": {}}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def completed(self, stage: str) -> bool:
+        return stage in self.manifest["stages"]
+
+    def _mark(self, stage: str, items: int) -> None:
+        self.manifest["stages"][stage] = {"completed_at": time.time(), "items": items}
+        save_json(self.manifest_path, self.manifest)
+
+    def invalidate_after(self, stage: str) -> None:
+        """重新執行某一階段後，之後各階段的 artifact 都已過時，從 manifest 移除。"""
+        later = STAGES[STAGES.index(stage) + 1 :]
+        for name in later:
+            self.manifest["stages"].pop(name, None)
+        if "score" in later:
+            self.clear_partial_scores()
+        save_json(self.manifest_path, self.manifest)
+
+    def _load_artifact(self, stage: str) -> dict:
+        data = load_json(self._path(f"{stage}.json"))
+        if not data or data.get("version") != ARTIFACT_VERSION:
+            raise FileNotFoundError(f"run {self.run_id} 沒有可用的 {stage} 階段 artifact")
+        return data
+
+    def _save_artifact(self, stage: str, items: int, **payload) -> None:
+        save_json(self._path(f"{stage}.json"), {"version": ARTIFACT_VERSION, "stage": stage, **payload})
+        self._mark(stage, items)
+
+    # ── 採集 ──
+
+    def save_ingest(self, batch: ArticleBatch) -> None:
+        self._save_artifact("ingest", len(batch), articles=_batch_columns(batch))
+
+    def load_ingest(self) -> ArticleBatch:
+        return _columns_batch(self._load_artifact("ingest")["articles"])
+
+    # ── 去重 ──
+
+    def save_dedup(self, articles: List[RawArticle], embeddings: np.ndarray) -> None:
+        path = self._path("dedup_embeddings.npy")
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, np.asarray(embeddings, dtype=np.float32))
+        os.replace(tmp_path, path)
+        self._save_artifact("dedup", len(articles), articles=_batch_columns(ArticleBatch.from_articles(articles)))
+
+    def load_dedup(self) -> Tuple[List[RawArticle], np.ndarray]:
+        articles = _columns_batch(self._load_artifact("dedup")["articles"]).to_articles()
+        embeddings = np.load(self._path("dedup_embeddings.npy"))
+        if len(embeddings) != len(articles):
+            raise FileNotFoundError(f"run {self.run_id} 的 dedup embedding 與文章數不一致")
+        return articles, embeddings
+
+    # ── 評分 ──
+
+    @property
+    def _partial_path(self) -> str:
+        return self._path("score.partial.jsonl")
+
+    def record_score(self, article: RawArticle, evaluation: EvaluationResult) -> None:
+        """逐篇追加評分結果；程序中斷時最多遺失正在寫入的那一行。"""
+        line = ScoredArticle(article=article, evaluation=evaluation).model_dump_json()
+        with open(self._partial_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def partial_scores(self) -> Dict[str, ScoredArticle]:
+        """讀回上次中斷前已完成的評分，以 URL 為鍵；寫到一半的最後一行會被略過。"""
+        done: Dict[str, ScoredArticle] = {}
+        if not os.path.exists(self._partial_path):
+            return done
+        with open(self._partial_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    scored = ScoredArticle.model_validate(json.loads(line))
+                except Exception:
+                    continue
+                done[scored.article.url] = scored
+        return done
+
+    def clear_partial_scores(self) -> None:
+        if os.path.exists(self._partial_path):
+            os.remove(self._partial_path)
+
+    def save_scores(self, scored: List[ScoredArticle]) -> None:
+        self._save_artifact("score", len(scored), scored=[s.model_dump(mode="json") for s in scored])
+        self.clear_partial_scores()
+
+    def load_scores(self) -> List[ScoredArticle]:
+        return [ScoredArticle.model_validate(s) for s in self._load_artifact("score")["scored"]]
+
+    # ── 廣播 ──
+
+    def save_broadcast(self, messages: Dict[str, List[str]], stats: Dict[str, int]) -> None:
+        """messages 為受眾名稱 → 該受眾收到的訊息。"""
+        self._save_artifact("broadcast", len(messages), messages=messages, stats=stats, sent_at=time.time())
+
+    def load_broadcast(self) -> dict:
+        return self._load_artifact("broadcast")
@@ -0,0 +1,258 @@
+import asyncio
+import os
+import signal
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import openai
+
+from src.data_ingestion.scheduler import IngestionScheduler
+from src.filtering.dedup_engine import ArticleFilter
+from src.models.article_batch import ArticleBatch
+from src.models.schemas import RawArticle, ScoredArticle
+from src.notifications.audiences import AudienceProfile, group_deliveries, load_audiences, plan_briefings
+from src.notifications.broadcaster import send_briefings
+from src.scoring.eval_cache import EvaluationCache
+from src.scoring.llm_evaluator import RateLimiter, default_batch_size, default_concurrency, evaluate_events_async
+from src.utils import metrics
+from src.utils.local_cache import cache_path, load_json, save_json
+
+# 預設值；建構時讀取 DAEMON_INGEST_MINUTES / DAEMON_BROADCAST_AT / DAEMON_BROADCAST_ATTEMPTS 覆寫
+INGEST_INTERVAL_MINUTES = 60.0
+# 以逗號分隔的本地時間，例如 "10:30" 或 "08:00,18:00"
+BROADCAST_AT = "10:30"
+# 同一批候選最多嘗試廣播的時段數；有群組一直失敗時，之後放棄重送並開始新的一天
+BROADCAST_ATTEMPTS = 2
+STATE_FILE = "daemon_state.json"
+
+
+def parse_broadcast_times(value: str) -> List[tuple]:
+    times = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        hour, minute = part.split(":")
+        times.append((int(hour), int(minute)))
+    if not times:
+        raise ValueError("至少需要一個廣播時間 (HH:MM)")
+    return sorted(times)
+
+
+def next_broadcast(times: List[tuple], now: Optional[datetime] = None) -> datetime:
+    """回傳 now 之後最近的一個廣播時間點 (本地時間)。"""
+    now = now or datetime.now()
+    for day in range(2):
+        base = now + timedelta(days=day)
+        for hour, minute in times:
+            candidate = base.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if candidate > now:
+                return candidate
+    raise AssertionError("unreachable")
+
+
+class BriefingDaemon:
+    """常駐服務模式：每 N 分鐘增量採集一次，整天累積去重與評分結果，在排定時間廣播。
+
+    語意模型、embedding / 評分快取、OpenAI client 與速率限制器、當日的分群狀態都常駐記憶體，
+    每輪只處理新內容。當日候選在每輪結束時落盤，崩潰或收到 SIGTERM 後重啟可從原處接續。
+    """
+
+    def __init__(
+        self,
+        scheduler: IngestionScheduler,
+        dedup_engine: ArticleFilter,
+        interval_minutes: Optional[float] = None,
+        broadcast_at: Optional[str] = None,
+        top_n: int = 3,
+        max_concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        audiences: Optional[List[AudienceProfile]] = None,
+        broadcast_attempts: Optional[int] = None,
+    ):
+        self.scheduler = scheduler
+        self.engine = dedup_engine
+        if interval_minutes is None:
+            interval_minutes = float(os.environ.get("DAEMON_INGEST_MINUTES") or INGEST_INTERVAL_MINUTES)
+        self.interval = interval_minutes * 60
+        self.broadcast_times = parse_broadcast_times(broadcast_at or os.environ.get("DAEMON_BROADCAST_AT") or BROADCAST_AT)
+        self.top_n = top_n
+        self.audiences = audiences if audiences is not None else load_audiences(default_top_n=top_n)
+        self.max_concurrency = max_concurrency if max_concurrency is not None else default_concurrency()
+        self.batch_size = batch_size if batch_size is not None else default_batch_size()
+        if broadcast_attempts is None:
+            broadcast_attempts = int(os.environ.get("DAEMON_BROADCAST_ATTEMPTS") or BROADCAST_ATTEMPTS)
+        self.broadcast_attempts = max(1, broadcast_attempts)
+        self.state_path = cache_path(STATE_FILE)
+
+        self.stream = dedup_engine.stream()
+        self.candidates: Dict[str, ScoredArticle] = {}
+        # 目前這批候選已經未全部送達的廣播時段數
+        self.failed_slots = 0
+        self._stop: Optional[asyncio.Event] = None
+
+    # ── 狀態保存 ──
+
+    def _load_state(self) -> None:
+        """讀回上次停止前累積的候選，並重新餵入分群狀態，讓重啟後的去重延續當日結果。"""
+        data = load_json(self.state_path, {})
+        restored = []
+        for item in data.get("candidates", []):
+            try:
+                restored.append(ScoredArticle.model_validate(item))
+            except Exception as e:
+                print(f"[Daemon] 略過無法還原的候選: {e}")
+        self.failed_slots = int(data.get("failed_slots", 0))
+        if not restored:
+            return
+        self.candidates = {s.article.url: s for s in restored}
+        self.stream.add(ArticleBatch.from_articles(s.article for s in restored))
+        print(f"[Daemon] 已還原 {len(restored)} 篇當日候選")
+
+    def _save_state(self) -> None:
+        """候選與增量游標一起保存，確保「已採集」與「已累積」兩者一致。"""
+        save_json(self.state_path, {
+            "saved_at": time.time(),
+            "candidates": [s.model_dump(mode="json") for s in self.candidates.values()],
+            "failed_slots": self.failed_slots,
+        })
+        self.scheduler.commit()
+        self.engine.save_cache()
+
+    # ── 每輪工作 ──
+
+    async def ingest_once(self, client: openai.AsyncOpenAI, limiter: RateLimiter,
+                          cache: Optional[EvaluationCache]) -> int:
+        """採集 → 增量去重 → 評分新事件，回傳本輪新增的候選數。"""
+        arrived: List[RawArticle] = []
+
+        async def emit(name: str, article: RawArticle) -> None:
+            arrived.append(article)
+
+        with metrics.span("daemon_tick"):
+            await self.scheduler.run(emit)
+            if not arrived:
+                print("[Daemon] 本輪沒有新文章")
+                self._save_state()
+                return 0
+
+            new_reps = await asyncio.to_thread(self.stream.add, ArticleBatch.from_articles(arrived))
+            scored = []
+            if new_reps:
+                scored = await evaluate_events_async(
+                    new_reps,
+                    max_concurrency=self.max_concurrency,
+                    client=client,
+                    limiter=limiter,
+                    cache=cache,
+                    batch_size=self.batch_size,
+                    report=False,
+                )
+            for item in scored:
+                self.candidates[item.article.url] = item
+            self._save_state()
+
+        print(f"[Daemon] 本輪採集 {len(arrived)} 篇 → 新事件 {len(new_reps)} 篇 → 累積候選 {len(self.candidates)} 篇")
+        return len(scored)
+
+    async def broadcast(self) -> bool:
+        """以當日累積的候選產出簡報並廣播，全部送達後寫入歷史索引並開始新的一天。
+
+        有群組發送失敗 (或根本沒有送出) 時保留候選與待寫入的歷史，下一個廣播時段重試，
+        已送達的群組由 outbox 略過；連續 broadcast_attempts 個時段都未全部送達則放棄重送、
+        寫入歷史並開始新的一天，避免永久失敗的群組讓同一批候選永遠累積。回傳是否已重置當日候選。
+        """
+        scored = sorted(self.candidates.values(), key=lambda s: s.evaluation.total_score, reverse=True)
+        if not scored:
+            print("[Daemon] 沒有任何候選，略過本次廣播")
+            return False
+
+        briefings = plan_briefings(scored, self.audiences)
+        with metrics.span("stage", stage="broadcast"):
+            stats = await asyncio.to_thread(send_briefings, group_deliveries(briefings))
+        if stats["failed"] or not (stats["sent"] or stats["skipped"] or stats["dropped"]):
+            self.failed_slots += 1
+            if self.failed_slots < self.broadcast_attempts:
+                print(f"[Daemon] ⚠️ 廣播未全部送達 (失敗 {stats['failed']})，候選保留至下次廣播 "
+                      f"({self.failed_slots}/{self.broadcast_attempts})")
+                self._save_state()
+                return False
+            print(f"[Daemon] ⚠️ 連續 {self.failed_slots} 個廣播時段未全部送達，放棄重送失敗的群組")
+
+        self.engine.commit_history()
+        self.candidates = {}
+        self.failed_slots = 0
+        self.stream = self.engine.stream()
+        self._save_state()
+        print(f"[Daemon] 已重置當日候選 (下次廣播 {next_broadcast(self.broadcast_times):%Y-%m-%d %H:%M})")
+        return True
+
+    # ── 主迴圈 ──
+
+    def stop(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+
+    async def _sleep_until(self, deadline: float) -> bool:
+        """等待到 deadline (monotonic)；收到停止訊號時提前返回 True。"""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=max(0.0, deadline - time.monotonic()))
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def run(self) -> None:
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        self._load_state()
+        # 預先載入模型，之後每輪都不必再付出冷啟動成本
+        await asyncio.to_thread(lambda: self.engine.model)
+
+        client = openai.AsyncOpenAI(max_retries=0)
+        limiter = RateLimiter()
+        cache = EvaluationCache()
+        next_ingest = time.monotonic()
+        broadcast_at = next_broadcast(self.broadcast_times)
+        print(f"[Daemon] 啟動：每 {self.interval / 60:g} 分鐘採集一次，下次廣播 {broadcast_at:%Y-%m-%d %H:%M}")
+
+        try:
+            while not self._stop.is_set():
+                if datetime.now() >= broadcast_at:
+                    try:
+                        await self.broadcast()
+                    except Exception as e:
+                        print(f"[Daemon] ❌ 廣播失敗，候選保留至下次: {e}")
+                    broadcast_at = next_broadcast(self.broadcast_times)
+                    continue
+
+                if time.monotonic() >= next_ingest:
+                    try:
+                        await self.ingest_once(client, limiter, cache)
+                    except Exception as e:
+                        print(f"[Daemon] ❌ 本輪處理失敗: {e}")
+                    next_ingest = time.monotonic() + self.interval
+                    metrics.export()
+                    continue
+
+                until_broadcast = (broadcast_at - datetime.now()).total_seconds()
+                wake = min(next_ingest, time.monotonic() + max(0.0, until_broadcast))
+                if await self._sleep_until(wake):
+                    break
+        finally:
+            print("[Daemon] 收到停止訊號，保存狀態中 ...")
+            self._save_state()
+            cache.close()
+            await client.close()
+            metrics.export()
+            print("[Daemon] 已停止")
+
+
+def run_daemon(scheduler: IngestionScheduler, dedup_engine: ArticleFilter, **kwargs) -> None:
+    asyncio.run(BriefingDaemon(scheduler, dedup_engine, **kwargs).run())
@@ -0,0 +1,185 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import openai
+
+from src.data_ingestion.scheduler import IngestionScheduler
+from src.filtering.dedup_engine import ArticleFilter
+from src.models.schemas import RawArticle, ScoredArticle
+from src.scoring.eval_cache import EvaluationCache
+from src.scoring.llm_evaluator import (
+    RateLimiter,
+    default_batch_size,
+    default_concurrency,
+    evaluate_events_async,
+)
+
+MICRO_BATCH_SIZE = 32
+FLUSH_INTERVAL = 1.0
+RAW_QUEUE_SIZE = 256
+SCORE_QUEUE_SIZE = 8
+MAX_INFLIGHT_BATCHES = 4
+
+_DONE = object()
+
+
+def _produce(scheduler: IngestionScheduler, raw_queue: queue.Queue) -> None:
+    """在背景執行緒中執行採集排程，每篇文章一產出就放進佇列 (佇列滿時暫停該資料源 = 背壓)。"""
+
+    async def emit(name: str, article: RawArticle) -> None:
+        try:
+            raw_queue.put_nowait(article)
+        except queue.Full:
+            await asyncio.to_thread(raw_queue.put, article)
+
+    try:
+        asyncio.run(scheduler.run(emit))
+    except Exception as e:
+        print(f"  ❌ 採集排程失敗: {e}")
+    finally:
+        raw_queue.put(_DONE)
+
+
+def _dedup_worker(
+    dedup_engine: ArticleFilter,
+    raw_queue: queue.Queue,
+    score_queue: queue.Queue,
+    stats: dict,
+    micro_batch_size: int,
+    flush_interval: float,
+) -> None:
+    """把到達的文章湊成微批次做增量去重，新事件代表直接送入評分佇列。"""
+    stream = dedup_engine.stream()
+    batch: List[RawArticle] = []
+    last_flush = time.monotonic()
+
+    def flush() -> None:
+        nonlocal batch, last_flush
+        if batch:
+            stats["raw"] += len(batch)
+            new_reps = stream.add(batch)
+            if new_reps:
+                score_queue.put(new_reps)
+            batch = []
+        last_flush = time.monotonic()
+
+    try:
+        while True:
+            timeout = max(0.0, flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = raw_queue.get(timeout=timeout)
+            except queue.Empty:
+                flush()
+                continue
+
+            if item is _DONE:
+                break
+            batch.append(item)
+
+            if len(batch) >= micro_batch_size:
+                flush()
+        flush()
+    except Exception as e:
+        print(f"[Pipeline] ❌ 去重階段失敗: {e}")
+    finally:
+        dedup_engine.save_cache()
+        stats["unique"] = len(stream.representatives)
+        score_queue.put(_DONE)
+
+
+async def _score_worker(
+    score_queue: queue.Queue,
+    cache: Optional[EvaluationCache],
+    max_concurrency: int,
+    batch_size: int,
+) -> List[ScoredArticle]:
+    """持續從評分佇列取出微批次並發評分；同時進行的微批次數量有上限。"""
+    client = openai.AsyncOpenAI(max_retries=0)
+    limiter = RateLimiter()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    in_flight = asyncio.Semaphore(MAX_INFLIGHT_BATCHES)
+    tasks: List[asyncio.Task] = []
+
+    try:
+        while True:
+            await in_flight.acquire()
+            batch = await asyncio.to_thread(score_queue.get)
+            if batch is _DONE:
+                in_flight.release()
+                break
+
+            task = asyncio.create_task(
+                evaluate_events_async(
+                    batch,
+                    client=client,
+                    limiter=limiter,
+                    cache=cache,
+                    batch_size=batch_size,
+                    semaphore=semaphore,
+                    report=False,
+                )
+            )
+            task.add_done_callback(lambda _: in_flight.release())
+            tasks.append(task)
+
+        results = await asyncio.gather(*tasks)
+    finally:
+        await client.close()
+
+    return [scored for chunk in results for scored in chunk]
+
+
+def run_streaming_pipeline(
+    scheduler: IngestionScheduler,
+    dedup_engine: ArticleFilter,
+    max_concurrency: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    micro_batch_size: int = MICRO_BATCH_SIZE,
+    flush_interval: float = FLUSH_INTERVAL,
+    use_cache: bool = True,
+) -> Tuple[List[ScoredArticle], dict]:
+    """管線模式：採集、去重與評分同時進行，回傳依總分排序的結果與各階段計數。
+
+    採集排程器並發執行所有資料源並逐篇產出文章，去重執行緒以微批次增量分群，
+    新事件代表立即進入有界的評分佇列；佇列滿時上游會阻塞，形成背壓。最後統一依總分排序。
+
+    與分階段模式的差異：
+    - 沒有全量候選可排序，因此不套用 PreScreener 的 top-K 預篩選，去重後的事件全部送 LLM 評分；
+      事件數超過 top-K 時成本較高，簡報也可能選到分階段模式會先篩掉的文章。
+    - 群代表是每群中最先抵達的文章，而抵達順序取決於各資料源完成的先後，
+      同一事件的代表 (標題、URL、主要來源) 可能與分階段模式不同。
+    只有在事件數不超過 top-K、且文章抵達順序與分階段模式相同時，兩者的輸出才一致。
+    """
+    max_concurrency = max_concurrency if max_concurrency is not None else default_concurrency()
+    batch_size = batch_size if batch_size is not None else default_batch_size()
+    raw_queue: queue.Queue = queue.Queue(maxsize=RAW_QUEUE_SIZE)
+    score_queue: queue.Queue = queue.Queue(maxsize=SCORE_QUEUE_SIZE)
+    stats = {"raw": 0, "unique": 0}
+
+    producer = threading.Thread(target=_produce, args=(scheduler, raw_queue), daemon=True)
+    dedup_thread = threading.Thread(
+        target=_dedup_worker,
+        args=(dedup_engine, raw_queue, score_queue, stats, micro_batch_size, flush_interval),
+        daemon=True,
+    )
+    producer.start()
+    dedup_thread.start()
+
+    cache = EvaluationCache() if use_cache else None
+    try:
+        scored = asyncio.run(_score_worker(score_queue, cache, max_concurrency, batch_size))
+    finally:
+        if cache:
+            cache.close()
+    dedup_thread.join()
+
+    scored.sort(key=lambda s: s.evaluation.total_score, reverse=True)
+    qualified_count = sum(1 for s in scored if s.evaluation.is_qualified)
+    print(
+        f"[Pipeline] 管線完成：採集 {stats['raw']} 篇 → 去重後 {stats['unique']} 篇 → "
+        f"評分 {len(scored)} 篇 / {qualified_count} 篇達標 (>=65)"
+    )
+    return scored, stats
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from src.models.schemas import EvaluationResult
+from src.utils.local_cache import cache_path
+
+TTL_DAYS = 3
+DB_FILE = "llm_eval_cache.sqlite3"
+
+
+def make_key(payload: dict, system_prompt: str, model: str, temperature: float) -> str:
+    """以正規化後的文章內容 + prompt + 模型設定計算快取鍵，任一項變動都會失效。"""
+    normalized = {k: " ".join(str(v).split()) for k, v in sorted(payload.items())}
+    raw = json.dumps(
+        [normalized, system_prompt, model, temperature],
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """以 SQLite 保存已驗證的 EvaluationResult，命中時完全跳過 API 呼叫。"""
+
+    def __init__(self, path: Optional[str] = None, ttl_days: float = TTL_DAYS):
+        self.ttl = ttl_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or cache_path(DB_FILE), check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS evaluations (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """
+        )
+        self.evict_expired()
+
+    def get(self, *keys: str) -> Optional[EvaluationResult]:
+        """依序查詢各個鍵，回傳第一筆未過期且能通過驗證的結果；無論查了幾個鍵都只計一次命中或未命中。"""
+        for key in keys:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT result FROM evaluations WHERE key = ? AND created_at >= ?",
+                    (key, time.time() - self.ttl),
+                ).fetchone()
+            if row is None:
+                continue
+            try:
+                result = EvaluationResult.model_validate_json(row[0])
+            except Exception:
+                continue
+            self.hits += 1
+            return result
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: EvaluationResult) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO evaluations (key, result, created_at) VALUES (?, ?, ?)",
+                (key, result.model_dump_json(), time.time()),
+            )
+            self._conn.commit()
+
+    def evict_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM evaluations WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+        return cur.rowcount
+
+    def totals(self) -> dict:
+        """回傳跨執行累計的命中 / 未命中次數。"""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, value FROM counters").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        """將本次的命中統計累加進資料庫並關閉連線。"""
+        with self._lock:
+            for name, value in (("hits", self.hits), ("misses", self.misses)):
+                self._conn.execute(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (name, value),
+                )
+            self._conn.commit()
+            self._conn.close()
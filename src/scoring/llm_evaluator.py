@@ -1,9 +1,31 @@
+import asyncio
 import json
-from typing import List
+import os
+from typing import Callable, Dict, List, Optional, Tuple
 
 import openai
 
 from src.models.schemas import RawArticle, EvaluationResult, ScoredArticle
+from src.scoring.eval_cache import EvaluationCache, make_key
+from src.utils import metrics
+from src.utils.rate_limit import TokenBucket, estimate_tokens
+
+MODEL = "gpt-4o-mini"
+TEMPERATURE = 0.3
+
+# 並發與速率限制的預設值，可依帳號的 OpenAI tier 以環境變數調整 (呼叫時才讀取，.env 載入後才生效)
+MAX_CONCURRENCY = 8
+REQUESTS_PER_MINUTE = 500
+TOKENS_PER_MINUTE = 200000
+MAX_RETRIES = 4
+RETRY_BACKOFF = 1.0
+EXPECTED_COMPLETION_TOKENS = 400
+# 每個請求包含的文章數；大於 1 時共用一份 system prompt，以降低每篇的 prompt token
+BATCH_SIZE = 1
+# 單一批次請求的估計 prompt token 上限，避免長摘要把批次撐得過大
+BATCH_MAX_TOKENS = 6000
+# 每篇文章在 JSON payload 中除了 title / snippet 以外的鍵名、來源與 id 等額外 token
+PAYLOAD_OVERHEAD_TOKENS = 20
 
 SYSTEM_PROMPT = (
     "你是一位矽谷頂尖創投 (VC) 兼華爾街科技產業分析師。"
@@ -30,50 +52,342 @@ SYSTEM_PROMPT = (
 )
 
 
-def evaluate_events(articles: List[RawArticle]) -> List[ScoredArticle]:
-    """用 LLM 對每篇文章進行量化評分，回傳達標且排序後的結果。"""
-    client = openai.OpenAI()
-    total = len(articles)
-    scored: List[ScoredArticle] = []
-
-    for i, article in enumerate(articles, 1):
-        print(f"[Scoring] 正在評分 {i}/{total} — {article.title[:50]}...")
-
-        user_payload = json.dumps(
-            {
-                "title": article.title,
-                "source": article.source,
-                "content_snippet": article.content_snippet,
-            },
-            ensure_ascii=False,
-        )
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + (
+    "\n\n【批次模式】：\n"
+    '本次輸入為 {"articles": [{"id": ..., "title": ..., "source": ..., "content_snippet": ...}, ...]}，'
+    "請對每篇文章各自獨立評分，評分標準與格式要求完全相同。\n"
+    '你必須回覆 {"results": [...]}，陣列中每個元素是上述單篇 JSON 格式並額外帶上對應的 "id"，'
+    "每個輸入 id 恰好對應一筆結果，不可遺漏或合併。"
+)
+
+# 系統提示詞固定不變，token 數只算一次
+_SYSTEM_PROMPT_TOKENS = estimate_tokens(SYSTEM_PROMPT)
+_BATCH_SYSTEM_PROMPT_TOKENS = estimate_tokens(BATCH_SYSTEM_PROMPT)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name) or default)
+
+
+def default_concurrency() -> int:
+    """SCORING_CONCURRENCY，未設定時為 MAX_CONCURRENCY。"""
+    return _env_int("SCORING_CONCURRENCY", MAX_CONCURRENCY)
+
+
+def default_batch_size() -> int:
+    """SCORING_BATCH_SIZE，未設定時為 BATCH_SIZE。"""
+    return _env_int("SCORING_BATCH_SIZE", BATCH_SIZE)
+
+
+class RateLimiter:
+    """同時限制每分鐘請求數與 token 數的雙 bucket 限流器；未指定的上限讀取 OPENAI_RPM / OPENAI_TPM。"""
+
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.requests = TokenBucket(rpm if rpm is not None else _env_int("OPENAI_RPM", REQUESTS_PER_MINUTE))
+        self.tokens = TokenBucket(tpm if tpm is not None else _env_int("OPENAI_TPM", TOKENS_PER_MINUTE))
+
+    async def acquire(self, tokens: int) -> None:
+        await self.requests.acquire_async(1)
+        await self.tokens.acquire_async(tokens)
+
+    def pause(self, seconds: float) -> None:
+        self.requests.pause(seconds)
+        self.tokens.pause(seconds)
+
+
+def _payload_fields(article: RawArticle) -> dict:
+    return {
+        "title": article.title,
+        "source": article.source,
+        "content_snippet": article.content_snippet,
+    }
+
+
+def _build_payload(article: RawArticle) -> str:
+    return json.dumps(_payload_fields(article), ensure_ascii=False)
+
+
+def article_tokens(article: RawArticle) -> int:
+    """估計單篇文章在 prompt 中的 token 數；優先沿用清洗階段算好的 token_count。"""
+    if article.token_count is not None:
+        return article.token_count + PAYLOAD_OVERHEAD_TOKENS
+    return estimate_tokens(article.title) + estimate_tokens(article.content_snippet) + PAYLOAD_OVERHEAD_TOKENS
+
+
+def _plan_batches(pending: List[int], articles: List[RawArticle], batch_size: int,
+                  max_tokens: Optional[int] = None) -> List[List[int]]:
+    """依篇數上限與估計 token 上限 (預設讀取 SCORING_BATCH_MAX_TOKENS)，貪婪地把待評文章切成批次。"""
+    if max_tokens is None:
+        max_tokens = _env_int("SCORING_BATCH_MAX_TOKENS", BATCH_MAX_TOKENS)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    tokens = 0
+    for idx in pending:
+        cost = article_tokens(articles[idx])
+        if current and (len(current) >= batch_size or tokens + cost > max_tokens):
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(idx)
+        tokens += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def cache_key(article: RawArticle, batched: bool = False) -> str:
+    """評分結果的快取鍵；批次與逐篇使用不同的系統提示詞，兩者的評分分開快取。"""
+    system_prompt = BATCH_SYSTEM_PROMPT if batched else SYSTEM_PROMPT
+    return make_key(_payload_fields(article), system_prompt, MODEL, TEMPERATURE)
+
 
+def _retry_after(error: openai.APIStatusError) -> Optional[float]:
+    """從 429 回應標頭讀出建議的等待秒數。"""
+    headers = error.response.headers if error.response is not None else {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+
+async def _request_json(
+    client: openai.AsyncOpenAI,
+    system_prompt: str,
+    user_payload: str,
+    cost: int,
+    limiter: RateLimiter,
+    semaphore: asyncio.Semaphore,
+    label: str,
+) -> Optional[str]:
+    """送出一次 JSON 模式請求；遇到 429 依 Retry-After 退避，其他暫時性錯誤以指數退避重試。"""
+    async with semaphore:
+        for attempt in range(MAX_RETRIES + 1):
+            await limiter.acquire(cost)
+            try:
+                with metrics.span("llm_request"):
+                    response = await client.chat.completions.create(
+                        model=MODEL,
+                        messages=[
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_payload},
+                        ],
+                        response_format={"type": "json_object"},
+                        temperature=TEMPERATURE,
+                    )
+                if response.usage is not None:
+                    metrics.incr("llm_tokens", response.usage.prompt_tokens, kind="prompt")
+                    metrics.incr("llm_tokens", response.usage.completion_tokens, kind="completion")
+                return response.choices[0].message.content
+
+            except openai.RateLimitError as e:
+                if attempt == MAX_RETRIES:
+                    print(f"  ❌ 評分失敗 (429 重試耗盡): {label}")
+                    return None
+                metrics.incr("retries", source="llm", reason="rate_limit")
+                wait = _retry_after(e) or RETRY_BACKOFF * (2 ** attempt)
+                print(f"  ⏳ 觸發速率限制，{wait:.1f}s 後重試: {label}")
+                limiter.pause(wait)
+
+            except (openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError) as e:
+                if attempt == MAX_RETRIES:
+                    print(f"  ❌ 評分失敗: {e}")
+                    return None
+                metrics.incr("retries", source="llm", reason="transient")
+                await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+
+            except Exception as e:
+                print(f"  ❌ 評分失敗: {e}")
+                return None
+    return None
+
+
+async def _score_article(
+    client: openai.AsyncOpenAI,
+    article: RawArticle,
+    limiter: RateLimiter,
+    semaphore: asyncio.Semaphore,
+) -> Optional[EvaluationResult]:
+    """對單篇文章呼叫 LLM 並驗證回傳的 JSON。"""
+    user_payload = _build_payload(article)
+    cost = _SYSTEM_PROMPT_TOKENS + article_tokens(article) + EXPECTED_COMPLETION_TOKENS
+    raw_json = await _request_json(
+        client, SYSTEM_PROMPT, user_payload, cost, limiter, semaphore, article.title[:50]
+    )
+    if raw_json is None:
+        return None
+    try:
+        return EvaluationResult.model_validate_json(raw_json)
+    except Exception as e:
+        print(f"  ❌ 評分結果格式錯誤: {e}")
+        return None
+
+
+async def _score_batch(
+    client: openai.AsyncOpenAI,
+    batch: List[Tuple[int, RawArticle]],
+    limiter: RateLimiter,
+    semaphore: asyncio.Semaphore,
+) -> Dict[int, EvaluationResult]:
+    """一次送出多篇文章，回傳能以 id 對應且通過驗證的結果；缺漏或格式錯誤者不會出現在結果中。"""
+    user_payload = json.dumps(
+        {"articles": [{"id": idx, **_payload_fields(article)} for idx, article in batch]},
+        ensure_ascii=False,
+    )
+    cost = (
+        _BATCH_SYSTEM_PROMPT_TOKENS
+        + sum(article_tokens(article) for _, article in batch)
+        + EXPECTED_COMPLETION_TOKENS * len(batch)
+    )
+    raw_json = await _request_json(
+        client, BATCH_SYSTEM_PROMPT, user_payload, cost, limiter, semaphore, f"批次 {len(batch)} 篇"
+    )
+    if raw_json is None:
+        return {}
+
+    try:
+        items = json.loads(raw_json).get("results", [])
+    except Exception as e:
+        print(f"  ⚠️ 批次回應無法解析: {e}")
+        return {}
+
+    expected = {str(idx): idx for idx, _ in batch}
+    results: Dict[int, EvaluationResult] = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        idx = expected.get(str(item.get("id")))
+        if idx is None or idx in results:
+            continue
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_payload},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3,
-            )
+            results[idx] = EvaluationResult.model_validate(item)
+        except Exception:
+            continue
+    return results
+
 
-            raw_json = response.choices[0].message.content
-            evaluation = EvaluationResult.model_validate_json(raw_json)
+async def evaluate_events_async(
+    articles: List[RawArticle],
+    max_concurrency: Optional[int] = None,
+    client: Optional[openai.AsyncOpenAI] = None,
+    limiter: Optional[RateLimiter] = None,
+    cache: Optional[EvaluationCache] = None,
+    batch_size: Optional[int] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    report: bool = True,
+    on_result: Optional[Callable[[RawArticle, EvaluationResult], None]] = None,
+    on_error: Optional[Callable[[RawArticle], None]] = None,
+) -> List[ScoredArticle]:
+    """並發評分所有文章，回傳依總分排序的結果；快取命中的文章不會呼叫 API。
+
+    batch_size > 1 時以多篇一組的 prompt 評分，批次中缺漏或驗證失敗的文章再逐篇重試。
+    串流模式會多次呼叫本函式並傳入共用的 client / limiter / semaphore，讓並發上限對整個管線生效。
+    on_result 會在每篇新評分完成時立即呼叫，供檢查點逐篇落盤；重試耗盡仍評分失敗的文章不會出現在
+    回傳結果中，而是逐篇傳給 on_error，呼叫端據此判斷結果是否完整。
+    max_concurrency / batch_size 未指定時讀取 SCORING_CONCURRENCY / SCORING_BATCH_SIZE。
+    """
+    max_concurrency = max_concurrency if max_concurrency is not None else default_concurrency()
+    batch_size = batch_size if batch_size is not None else default_batch_size()
+    own_client = client is None
+    client = client or openai.AsyncOpenAI(max_retries=0)
+    limiter = limiter or RateLimiter()
+    semaphore = semaphore or asyncio.Semaphore(max(1, max_concurrency))
+    total = len(articles)
+    done = 0
 
-            scored.append(
-                ScoredArticle(article=article, evaluation=evaluation)
+    batched = batch_size > 1
+    single_keys = [cache_key(a) if cache else None for a in articles]
+    batch_keys = [cache_key(a, batched=True) if cache and batched else None for a in articles]
+    # 批次模式先找批次評分，再找先前逐篇重試 (或逐篇模式) 留下的評分
+    evaluations: List[Optional[EvaluationResult]] = [
+        (cache.get(batch_key, single_key) if batch_key else cache.get(single_key)) if cache else None
+        for batch_key, single_key in zip(batch_keys, single_keys)
+    ]
+    pending = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+    if cache:
+        metrics.incr("cache_hits", total - len(pending), cache="llm")
+        metrics.incr("cache_misses", len(pending), cache="llm")
+
+    def record(idx: int, evaluation: Optional[EvaluationResult], key: Optional[str]) -> None:
+        nonlocal done
+        done += 1
+        if evaluation is None:
+            if on_error:
+                on_error(articles[idx])
+            return
+        evaluations[idx] = evaluation
+        if cache:
+            cache.put(key, evaluation)
+        if on_result:
+            on_result(articles[idx], evaluation)
+        tag = "✅ 達標" if evaluation.is_qualified else "—"
+        print(f"[Scoring] {done}/{len(pending)} {articles[idx].title[:50]}... -> 總分 {evaluation.total_score} {tag}")
+
+    try:
+        if batched and len(pending) > 1:
+            batches = _plan_batches(pending, articles, batch_size)
+            batch_results = await asyncio.gather(
+                *(_score_batch(client, [(i, articles[i]) for i in b], limiter, semaphore) for b in batches)
             )
-            tag = "✅ 達標" if evaluation.is_qualified else "—"
-            print(f"  -> 總分 {evaluation.total_score} {tag}")
+            for results in batch_results:
+                for idx, evaluation in results.items():
+                    record(idx, evaluation, batch_keys[idx])
 
-        except Exception as e:
-            print(f"  ❌ 評分失敗: {e}")
-            continue
+            retry = [i for i in pending if evaluations[i] is None]
+            metrics.incr("llm_batch_fallbacks", len(retry))
+            if retry:
+                print(f"[Scoring] 批次回應缺漏 {len(retry)} 篇，改為逐篇重試")
+        else:
+            retry = pending
 
+        singles = await asyncio.gather(
+            *(_score_article(client, articles[i], limiter, semaphore) for i in retry)
+        )
+        for idx, evaluation in zip(retry, singles):
+            record(idx, evaluation, single_keys[idx])
+    finally:
+        if own_client:
+            await client.close()
+
+    scored = [
+        ScoredArticle(article=article, evaluation=evaluation)
+        for article, evaluation in zip(articles, evaluations)
+        if evaluation is not None
+    ]
     scored.sort(key=lambda s: s.evaluation.total_score, reverse=True)
+    metrics.incr("articles_scored", len(scored))
+    if not report:
+        return scored
     qualified_count = sum(1 for s in scored if s.evaluation.is_qualified)
 
-    print(f"\n[Scoring] 評分完成：{len(scored)} 篇已評 / {qualified_count} 篇達標 (>=65)")
+    print(f"\n[Scoring] 評分完成：{len(scored)}/{total} 篇已評 / {qualified_count} 篇達標 (>=65)")
+    if cache:
+        print(f"[Scoring] 評分快取：命中 {cache.hits} 篇 / 未命中 {cache.misses} 篇")
     return scored
+
+
+def evaluate_events(
+    articles: List[RawArticle],
+    max_concurrency: Optional[int] = None,
+    use_cache: bool = True,
+    batch_size: Optional[int] = None,
+    on_result: Optional[Callable[[RawArticle, EvaluationResult], None]] = None,
+    on_error: Optional[Callable[[RawArticle], None]] = None,
+) -> List[ScoredArticle]:
+    """用 LLM 對每篇文章進行量化評分，回傳排序後的結果；評分失敗的文章傳給 on_error。"""
+    max_concurrency = max_concurrency if max_concurrency is not None else default_concurrency()
+    batch_size = batch_size if batch_size is not None else default_batch_size()
+    print(f"[Scoring] 並發評分 {len(articles)} 篇 (並發上限 {max_concurrency}，每批 {batch_size} 篇) ...")
+    cache = EvaluationCache() if use_cache else None
+    try:
+        return asyncio.run(
+            evaluate_events_async(
+                articles, max_concurrency=max_concurrency, cache=cache, batch_size=batch_size,
+                on_result=on_result, on_error=on_error,
+            )
+        )
+    finally:
+        if cache:
+            cache.close()
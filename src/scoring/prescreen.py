@@ -0,0 +1,153 @@
+import hashlib
+import os
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from src.filtering.clustering import normalize_rows
+from src.models.schemas import RawArticle, ScoredArticle
+from src.utils import metrics
+from src.utils.local_cache import cache_path
+
+# 送進 LLM 的候選上限預設值；建構時讀取 PRESCREEN_TOP_K 與 (選填) 最低預估分數 PRESCREEN_MIN_SCORE
+TOP_K = 40
+
+SAMPLES_FILE = "prescreen_samples.npz"
+MAX_SAMPLES = 5000
+# 每輪另外從 top-K 以外隨機抽幾篇送評，讓訓練樣本也涵蓋被篩掉的區間，避免模型只看過高分候選
+EXPLORE_SAMPLES = 3
+MIN_TRAIN_SAMPLES = 200
+RIDGE_LAMBDA = 1.0
+
+# 冷啟動時使用的原型句：與正向原型越近、與負向原型越遠，越可能是高分商業情報
+POSITIVE_PROTOTYPES = [
+    "AI startup raises Series A funding round led by venture capital",
+    "Big tech company acquires AI startup in billion dollar deal",
+    "Company launches new AI product with enterprise pricing and customers",
+    "AI tool cuts costs for businesses and automates workflows",
+    "Revenue growth and valuation of an AI company",
+    "Show HN: I built an AI product that solves a specific business problem",
+]
+NEGATIVE_PROTOTYPES = [
+    "Academic paper on theoretical machine learning without applications",
+    "Minor software update and bug fixes release notes",
+    "Personal blog post opinion essay",
+    "Tutorial on how to configure a programming library",
+    "Politics and general news unrelated to business",
+]
+
+
+class PreScreener:
+    """評分前的本地 CPU 預篩選：只把最有機會達標的候選送進 LLM。
+
+    累積足夠的歷史評分後改用 embedding → total_score 的 ridge 線性模型，
+    在此之前以正負原型句的 cosine 差距排序。訓練樣本以 URL 去重，
+    並包含每輪從 top-K 以外隨機抽出的 explore 篇，讓模型也學到被篩掉的那一端。
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], top_k: Optional[int] = None,
+                 min_score: Optional[float] = None, explore: int = EXPLORE_SAMPLES,
+                 samples_path: Optional[str] = None):
+        self.top_k = top_k if top_k is not None else int(os.environ.get("PRESCREEN_TOP_K") or TOP_K)
+        if min_score is None and os.environ.get("PRESCREEN_MIN_SCORE"):
+            min_score = float(os.environ["PRESCREEN_MIN_SCORE"])
+        self.min_score = min_score
+        self.explore = explore
+        self.samples_path = samples_path or cache_path(SAMPLES_FILE)
+        self._encode = encode
+        self._prototypes: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._weights: Optional[np.ndarray] = None
+        self._samples = self._load_samples()
+        self._fit()
+
+    def _load_samples(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """讀回 (embedding, 分數, URL)；舊版樣本檔沒有 URL 欄位時以空字串補齊。"""
+        if os.path.exists(self.samples_path):
+            try:
+                with np.load(self.samples_path) as data:
+                    scores = data["scores"]
+                    urls = data["urls"] if "urls" in data.files else np.full(len(scores), "")
+                    return data["embeddings"], scores, urls
+            except Exception as e:
+                print(f"[PreScreen] 讀取歷史樣本失敗: {e}")
+        return np.zeros((0, 0), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=str)
+
+    def _fit(self) -> None:
+        """樣本數足夠時以閉式解擬合 ridge 回歸 (含偏置項)。"""
+        embeddings, scores, _ = self._samples
+        if len(scores) < MIN_TRAIN_SAMPLES:
+            self._weights = None
+            return
+        x = np.hstack([normalize_rows(embeddings), np.ones((len(scores), 1), dtype=np.float32)])
+        reg = RIDGE_LAMBDA * np.eye(x.shape[1], dtype=np.float32)
+        reg[-1, -1] = 0.0
+        self._weights = np.linalg.solve(x.T @ x + reg, x.T @ scores.astype(np.float32))
+
+    def score(self, embeddings: np.ndarray) -> np.ndarray:
+        """回傳每篇文章的預估分數；有線性模型時單位為 total_score。"""
+        vectors = normalize_rows(embeddings)
+        if self._weights is not None and self._weights.shape[0] == vectors.shape[1] + 1:
+            return vectors @ self._weights[:-1] + self._weights[-1]
+
+        if self._prototypes is None:
+            self._prototypes = (
+                normalize_rows(self._encode(POSITIVE_PROTOTYPES)),
+                normalize_rows(self._encode(NEGATIVE_PROTOTYPES)),
+            )
+        positive, negative = self._prototypes
+        return (vectors @ positive.T).max(axis=1) - (vectors @ negative.T).max(axis=1)
+
+    def select(self, articles: List[RawArticle], embeddings: np.ndarray) -> Tuple[List[RawArticle], np.ndarray]:
+        """保留預估分數最高的 top_k 篇，聯集預估分數達 min_score 者與 explore 篇隨機探索樣本，維持原始順序回傳。
+
+        min_score 的單位是 total_score，只在線性模型擬合完成後生效；冷啟動的原型分數是 cosine 差距，無法比較。
+        """
+        if len(articles) <= self.top_k:
+            return articles, embeddings
+        if len(embeddings) != len(articles):
+            print("[PreScreen] ⚠️ embedding 與文章數量不符，略過預篩選")
+            return articles, embeddings
+
+        scores = self.score(embeddings)
+        selected = np.zeros(len(articles), dtype=bool)
+        selected[np.argsort(-scores, kind="stable")[: self.top_k]] = True
+        if self.min_score is not None and self._weights is not None:
+            selected |= scores >= self.min_score
+        rest = np.flatnonzero(~selected)
+        if self.explore and len(rest):
+            # 以輸入 URL 決定亂數種子：同一批輸入 (例如中斷後重跑) 抽到相同的探索樣本
+            digest = hashlib.blake2b("\n".join(a.url for a in articles).encode("utf-8"), digest_size=8).digest()
+            rng = np.random.default_rng(int.from_bytes(digest, "little"))
+            selected[rng.choice(rest, size=min(self.explore, len(rest)), replace=False)] = True
+        keep = np.flatnonzero(selected).tolist()
+
+        metrics.incr("prescreen_dropped", len(articles) - len(keep))
+        mode = "線性模型" if self._weights is not None else "原型比對"
+        print(f"[PreScreen] ({mode}) {len(articles)} 篇中保留 {len(keep)} 篇送入 LLM 評分")
+        return [articles[i] for i in keep], embeddings[keep]
+
+    def record(self, articles: List[RawArticle], embeddings: np.ndarray, scored: List[ScoredArticle]) -> None:
+        """把本輪 LLM 評分結果加入訓練樣本，供之後的執行擬合線性模型。
+
+        同一 URL 只保留最新一筆，評分快取命中的文章每輪重跑也不會被重複計入。
+        """
+        score_by_url = {s.article.url: s.evaluation.total_score for s in scored}
+        rows = list({a.url: i for i, a in enumerate(articles) if a.url in score_by_url}.values())
+        if not rows:
+            return
+
+        new_embs = np.asarray(embeddings[rows], dtype=np.float32)
+        new_scores = np.array([score_by_url[articles[i].url] for i in rows], dtype=np.float32)
+        new_urls = np.array([articles[i].url for i in rows], dtype=str)
+        old_embs, old_scores, old_urls = self._samples
+        if len(old_scores) and old_embs.shape[1] == new_embs.shape[1]:
+            older = ~np.isin(old_urls, new_urls)
+            new_embs = np.concatenate([old_embs[older], new_embs])[-MAX_SAMPLES:]
+            new_scores = np.concatenate([old_scores[older], new_scores])[-MAX_SAMPLES:]
+            new_urls = np.concatenate([old_urls[older], new_urls])[-MAX_SAMPLES:]
+
+        self._samples = (new_embs, new_scores, new_urls)
+        tmp_path = self.samples_path + ".tmp.npz"
+        np.savez(tmp_path, embeddings=new_embs, scores=new_scores, urls=new_urls)
+        os.replace(tmp_path, self.samples_path)
+        self._fit()
@@ -0,0 +1,77 @@
+import hashlib
+import math
+import os
+from typing import Optional
+
+import numpy as np
+
+
+class BloomFilter:
+    """以 numpy 位元陣列實作的 Bloom filter；只會誤判「看過」，不會漏判。
+
+    k 個雜湊位置以 blake2b 摘要的兩個 64-bit 整數做 double hashing 產生。
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.n_hashes = max(1, int(round(self.n_bits / capacity * math.log(2))))
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, key: str) -> np.ndarray:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return np.array([(h1 + i * h2) % self.n_bits for i in range(self.n_hashes)], dtype=np.int64)
+
+    def add(self, key: str) -> bool:
+        """加入 key；回傳加入前是否 (可能) 已存在。"""
+        positions = self._positions(key)
+        masks = (1 << (positions & 7)).astype(np.uint8)
+        present = bool(np.all(self.bits[positions >> 3] & masks))
+        if not present:
+            np.bitwise_or.at(self.bits, positions >> 3, masks)
+            self.count += 1
+        return present
+
+    def __contains__(self, key: str) -> bool:
+        positions = self._positions(key)
+        masks = (1 << (positions & 7)).astype(np.uint8)
+        return bool(np.all(self.bits[positions >> 3] & masks))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    def save(self, path: str) -> None:
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            bits=self.bits,
+            meta=np.array([self.capacity, self.n_bits, self.n_hashes, self.count], dtype=np.int64),
+            error_rate=np.array([self.error_rate]),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BloomFilter"]:
+        """讀取先前保存的 filter；檔案不存在或損毀時回傳 None。"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                capacity, n_bits, n_hashes, count = (int(v) for v in data["meta"])
+                bloom = cls(capacity, float(data["error_rate"][0]))
+                if (bloom.n_bits, bloom.n_hashes) != (n_bits, n_hashes):
+                    return None
+                bloom.bits = data["bits"].copy()
+                bloom.count = count
+                return bloom
+        except Exception as e:
+            print(f"[Bloom] 讀取 {path} 失敗: {e}")
+            return None
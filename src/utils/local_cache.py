@@ -0,0 +1,42 @@
+import json
+import os
+import tempfile
+from typing import Any
+
+# 所有本地快取與狀態檔的預設根目錄；cache_path() 每次呼叫時讀取 YOYO_CACHE_DIR 覆寫
+# (例如 CI 中掛載 actions/cache)，讓 load_dotenv() 載入的 .env 也能生效
+CACHE_DIR = ".cache"
+
+
+def cache_path(name: str) -> str:
+    """回傳快取目錄下的檔案路徑，並確保目錄存在。"""
+    directory = os.environ.get("YOYO_CACHE_DIR") or CACHE_DIR
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    """讀取 JSON 狀態檔；檔案不存在或損毀時回傳預設值。"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except Exception as e:
+        print(f"[Cache] 讀取 {path} 失敗，改用空快取: {e}")
+        return default
+
+
+def save_json(path: str, data: Any) -> None:
+    """以先寫暫存檔再 rename 的方式原子寫入 JSON，避免中斷時留下半個檔案。"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
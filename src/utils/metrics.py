@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from itertools import groupby
+from typing import Dict, Optional, Tuple
+
+from src.utils.local_cache import cache_path, save_json
+
+# 預設關閉；關閉時 span() 回傳共用的空 context manager，incr() 直接返回，幾乎沒有額外成本。
+# 未呼叫 enable() 時，第一次記錄才讀取 METRICS_ENABLED，讓 load_dotenv() 載入的 .env 也能生效；
+# 報告路徑 METRICS_REPORT_PATH / METRICS_PROMETHEUS_PATH 於 export() 時讀取。
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_enabled: Optional[bool] = None
+_lock = threading.Lock()
+_counters: Dict[LabelKey, float] = {}
+_timings: Dict[LabelKey, list] = {}
+_started_at = time.time()
+
+
+def _key(name: str, labels: dict) -> LabelKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("key", "start")
+
+    def __init__(self, key: LabelKey):
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        elapsed = time.perf_counter() - self.start
+        with _lock:
+            stats = _timings.setdefault(self.key, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            if exc_type is not None:
+                stats[3] += 1
+        return False
+
+
+def enable(flag: bool = True) -> None:
+    global _enabled
+    _enabled = flag
+
+
+def is_enabled() -> bool:
+    global _enabled
+    if _enabled is None:
+        _enabled = os.environ.get("METRICS_ENABLED", "") == "1"
+    return _enabled
+
+
+def span(name: str, **labels):
+    """量測一段程式的耗時：with span("llm_request", mode="batch"): ..."""
+    if not (_enabled if _enabled is not None else is_enabled()):
+        return _NULL_SPAN
+    return _Span(_key(name, labels))
+
+
+def incr(name: str, value: float = 1, **labels) -> None:
+    """累加計數器，例如文章數、快取命中、重試次數與 token 用量。"""
+    if not value or not (_enabled if _enabled is not None else is_enabled()):
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def reset() -> None:
+    global _started_at
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+        _started_at = time.time()
+
+
+def snapshot() -> dict:
+    """回傳目前所有計數器與耗時統計的 JSON 友善結構。"""
+    with _lock:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+        spans = [
+            {
+                "name": name,
+                "labels": dict(labels),
+                "count": count,
+                "total_seconds": round(total, 6),
+                "avg_seconds": round(total / count, 6) if count else 0.0,
+                "max_seconds": round(longest, 6),
+                "errors": errors,
+            }
+            for (name, labels), (count, total, longest, errors) in sorted(_timings.items())
+        ]
+    return {
+        "started_at": _started_at,
+        "wall_seconds": round(time.time() - _started_at, 3),
+        "counters": counters,
+        "spans": spans,
+    }
+
+
+def _prom_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def render_prometheus(prefix: str = "yoyo") -> str:
+    """輸出 Prometheus text exposition format，可交給 node_exporter textfile collector。
+
+    同一個 metric family 的樣本必須緊接在自己的 TYPE 行之後，不可與其他 family 交錯；
+    snapshot() 已依名稱排序，因此逐名稱分組輸出，summary 與 _max_seconds gauge 各自成段。
+    """
+    data = snapshot()
+    lines = []
+
+    for name, counters in groupby(data["counters"], key=lambda c: c["name"]):
+        metric = f"{prefix}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for counter in counters:
+            lines.append(f"{metric}{_prom_labels(counter['labels'])} {counter['value']}")
+
+    for name, items in groupby(data["spans"], key=lambda s: s["name"]):
+        items = list(items)
+        base = f"{prefix}_{name}_seconds"
+        lines.append(f"# TYPE {base} summary")
+        for item in items:
+            labels = _prom_labels(item["labels"])
+            lines.append(f"{base}_count{labels} {item['count']}")
+            lines.append(f"{base}_sum{labels} {item['total_seconds']}")
+        longest = f"{prefix}_{name}_max_seconds"
+        lines.append(f"# TYPE {longest} gauge")
+        for item in items:
+            lines.append(f"{longest}{_prom_labels(item['labels'])} {item['max_seconds']}")
+
+    lines.append(f"# TYPE {prefix}_run_wall_seconds gauge")
+    lines.append(f"{prefix}_run_wall_seconds {data['wall_seconds']}")
+    return "\n".join(lines) + "\n"
+
+
+def export(report_path: Optional[str] = None, prometheus_path: Optional[str] = None) -> Optional[str]:
+    """在執行結束時寫出 JSON 執行報告 (以及選填的 Prometheus 文字檔)，回傳報告路徑。"""
+    if not is_enabled():
+        return None
+    report_path = report_path or os.environ.get("METRICS_REPORT_PATH") or cache_path("run_report.json")
+    save_json(report_path, snapshot())
+    prometheus_path = prometheus_path or os.environ.get("METRICS_PROMETHEUS_PATH")
+    if prometheus_path:
+        with open(prometheus_path, "w", encoding="utf-8") as f:
+            f.write(render_prometheus())
+    print(f"[Metrics] 執行報告已寫入 {report_path}")
+    return report_path
@@ -0,0 +1,57 @@
+import asyncio
+import re
+import threading
+import time
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數：中日文約 1 字 1 token，其餘約 4 字元 1 token。"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+class TokenBucket:
+    """以固定速率補充的 token bucket，同時支援執行緒與 asyncio 呼叫端。"""
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _try_take(self, amount: float) -> float:
+        """嘗試扣除 amount；成功回傳 0，否則回傳建議等待秒數。"""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """收到 429 / Retry-After 時暫停整個 bucket，讓所有呼叫端一起退避。"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def acquire(self, amount: float = 1) -> None:
+        while True:
+            wait = self._try_take(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, amount: float = 1) -> None:
+        while True:
+            wait = self._try_take(amount)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
@@ -0,0 +1,146 @@
+import hashlib
+import re
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from src.data_ingestion.sources import ThreadedSource
+from src.filtering.dedup_engine import ArticleFilter
+from src.models.article_batch import make_article
+from src.models.schemas import EvaluationResult, ScoredArticle
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class HashingEncoder:
+    """測試用的假語意模型：詞袋雜湊成固定維度向量，字詞重疊越多 cosine 越高，不需下載模型。"""
+
+    dim = 256
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD_RE.findall(text.casefold()):
+                vectors[row, int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dim] += 1.0
+        return vectors
+
+
+class ListSource(ThreadedSource):
+    """依固定順序產出給定文章的資料源，runs 記錄被執行的次數。"""
+
+    def __init__(self, articles, name="fake"):
+        super().__init__(name)
+        self.articles = articles
+        self.runs = 0
+
+    def iterate(self):
+        self.runs += 1
+        return list(self.articles)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """每個測試使用獨立的快取目錄，避免讀寫到工作目錄下的 .cache。"""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("YOYO_CACHE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def article():
+    def build(title, url=None, source="Test", snippet=None, hours_ago=1.0):
+        published = datetime.fromtimestamp(datetime.now(timezone.utc).timestamp() - hours_ago * 3600, timezone.utc)
+        return make_article(
+            title=title,
+            url=url or "https://example.com/" + hashlib.sha1(title.encode("utf-8")).hexdigest()[:12],
+            source=source,
+            published_at=published,
+            content_snippet=snippet if snippet is not None else f"{title} — detailed coverage of the announcement",
+        )
+
+    return build
+
+
+@pytest.fixture
+def scored(article):
+    def build(title, score, qualified=None, summary="Summary of the event.", **kwargs):
+        evaluation = EvaluationResult(
+            reasoning="test",
+            impact_score=score // 3,
+            specificity_score=score // 3,
+            novelty_score=score - 2 * (score // 3),
+            total_score=score,
+            is_qualified=score >= 8 if qualified is None else qualified,
+            executive_summary=summary,
+        )
+        return ScoredArticle(article=article(title, **kwargs), evaluation=evaluation)
+
+    return build
+
+
+@pytest.fixture
+def make_filter():
+    def build(**kwargs):
+        kwargs.setdefault("use_cache", False)
+        kwargs.setdefault("use_history", False)
+        engine = ArticleFilter(**kwargs)
+        engine._model = HashingEncoder()
+        return engine
+
+    return build
+
+
+@pytest.fixture
+def list_source():
+    return ListSource
+
+
+@pytest.fixture
+def hashing_encoder():
+    return HashingEncoder
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """啟動 OpenAI Chat Completions 替身並讓 AsyncOpenAI 指向它。"""
+    from benchmarks.mock_servers import openai_server
+
+    def start(**kwargs):
+        server = openai_server(**kwargs).__enter__()
+        servers.append(server)
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{server.url}/v1")
+        return server
+
+    servers = []
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    """啟動 Telegram Bot API 替身並把 telebot 指向它；測試中不限制每群組速率。"""
+    from telebot import apihelper
+
+    from benchmarks.mock_servers import telegram_server
+
+    def start(**kwargs):
+        server = telegram_server(**kwargs).__enter__()
+        servers.append(server)
+        monkeypatch.setenv("TELEGRAM_API_URL", server.url)
+        return server
+
+    servers = []
+    # send_briefings 依 TELEGRAM_API_URL 改寫 apihelper.API_URL；測試結束後還原
+    monkeypatch.setattr(apihelper, "API_URL", apihelper.API_URL)
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "1:test")
+    monkeypatch.setenv("TELEGRAM_PER_CHAT_PER_MINUTE", "60000")
+    yield start
+    for server in servers:
+        server.__exit__(None, None, None)
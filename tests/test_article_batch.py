@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from src.models.article_batch import ArticleBatch
+
+NOW = 1_700_000_000.0
+
+
+def batch(n, start=0, source="Test"):
+    return ArticleBatch(
+        titles=[f"title {i}" for i in range(start, start + n)],
+        urls=[f"https://example.com/{i}" for i in range(start, start + n)],
+        sources=[source] * n,
+        timestamps=[NOW - i * 3600 for i in range(start, start + n)],
+        snippets=[f"snippet {i}" for i in range(start, start + n)],
+        token_counts=list(range(start, start + n)),
+    )
+
+
+def test_take_selects_rows_and_keeps_columns_aligned():
+    b = batch(5)
+    picked = b.take([3, 0])
+    assert picked.urls == ["https://example.com/3", "https://example.com/0"]
+    assert picked.timestamps.tolist() == [NOW - 3 * 3600, NOW]
+    assert picked.token_counts.tolist() == [3, 0]
+    assert picked.titles[0] is b.titles[3]
+
+    empty = b.take([])
+    assert len(empty) == 0 and empty.timestamps.shape == (0,) and empty.token_counts.shape == (0,)
+
+
+def test_since_filters_by_cutoff_and_returns_self_when_nothing_is_dropped():
+    b = batch(5)
+    cutoff = datetime.fromtimestamp(NOW - 2 * 3600, tz=timezone.utc)
+    assert b.since(cutoff).urls == [f"https://example.com/{i}" for i in range(3)]
+    assert b.since(datetime.fromtimestamp(NOW - 99 * 3600, tz=timezone.utc)) is b
+    assert len(ArticleBatch().since(cutoff)) == 0
+
+
+@pytest.fixture
+def taipei_tz(monkeypatch):
+    monkeypatch.setenv("TZ", "Asia/Taipei")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_naive_datetimes_are_treated_as_utc(taipei_tz, article):
+    b = batch(5)
+    naive = datetime.fromtimestamp(NOW - 2 * 3600, tz=timezone.utc).replace(tzinfo=None)
+    assert len(b.since(naive)) == 3
+
+    item = article("Naive timestamp")
+    item.published_at = datetime(2024, 1, 1, 12, 0)
+    roundtrip = ArticleBatch.from_articles([item]).article(0)
+    assert roundtrip.published_at == datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_concat_skips_empty_batches_and_preserves_order():
+    merged = ArticleBatch.concat([batch(2), ArticleBatch(), batch(3, start=2, source="Other")])
+    assert len(merged) == 5
+    assert merged.urls == [f"https://example.com/{i}" for i in range(5)]
+    assert merged.sources == ["Test", "Test", "Other", "Other", "Other"]
+    assert merged.token_counts.tolist() == [0, 1, 2, 3, 4]
+    assert len(merged.similar_sources) == 5
+
+    assert len(ArticleBatch.concat([])) == 0
+    assert len(ArticleBatch.concat([ArticleBatch(), ArticleBatch()])) == 0
+
+
+def test_round_trip_through_articles():
+    b = batch(3)
+    b.similar_sources[1].append("Mirror")
+    again = ArticleBatch.from_articles(b.to_articles())
+    assert again.urls == b.urls
+    assert again.timestamps.tolist() == b.timestamps.tolist()
+    assert again.similar_sources == [[], ["Mirror"], []]
+    assert again.token_counts.tolist() == [0, 1, 2]
+
+
+def test_mismatched_column_lengths_are_rejected():
+    with pytest.raises(ValueError):
+        ArticleBatch(titles=["a"], urls=[], sources=["s"], timestamps=[NOW], snippets=["x"])
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+
+from src.notifications.audiences import (
+    AudienceProfile,
+    group_deliveries,
+    load_audiences,
+    plan_briefings,
+)
+
+
+@pytest.fixture
+def ranked(scored):
+    """已依總分由高到低排序的共用評分結果。"""
+    items = [
+        scored("OpenAI ships a new reasoning model", 14, source="OpenAI Blog"),
+        scored("Nvidia earnings beat expectations", 12, source="Reuters"),
+        scored("Robotics startup raises seed round", 9, source="TechCrunch"),
+        scored("Minor library patch release", 6, source="Hacker News"),
+        scored("Weekly newsletter roundup", 4, source="Reuters"),
+    ]
+    items[2].article.similar_sources.append("Reuters")
+    return items
+
+
+def titles(articles):
+    return [s.article.title for s in articles]
+
+
+def test_source_filters_include_merged_sources(ranked):
+    reuters = AudienceProfile("reuters", chat_ids=["1"], top_n=5, sources=["Reuters"])
+    articles, downgraded = reuters.select(ranked)
+    assert titles(articles) == ["Nvidia earnings beat expectations", "Robotics startup raises seed round"]
+    assert not downgraded
+
+    no_vendor = AudienceProfile("no-vendor", chat_ids=["1"], top_n=5, exclude_sources=["OpenAI Blog"])
+    articles, _ = no_vendor.select(ranked)
+    assert "OpenAI ships a new reasoning model" not in titles(articles)
+
+
+def test_min_score_overrides_is_qualified(ranked):
+    strict = AudienceProfile("strict", chat_ids=["1"], top_n=5, min_score=13)
+    assert titles(strict.select(ranked)[0]) == ["OpenAI ships a new reasoning model"]
+
+    loose = AudienceProfile("loose", chat_ids=["1"], top_n=5, min_score=6)
+    assert len(loose.select(ranked)[0]) == 4
+
+
+def test_topic_weights_only_change_ordering(ranked):
+    robotics = AudienceProfile("robotics", chat_ids=["1"], top_n=2, topic_weights={"ROBOTICS": 10})
+    articles, downgraded = robotics.select(ranked)
+    assert titles(articles) == ["Robotics startup raises seed round", "OpenAI ships a new reasoning model"]
+    assert not downgraded
+
+    # 加權分不會讓未達標的文章變成達標
+    minor = AudienceProfile("minor", chat_ids=["1"], top_n=5, topic_weights={"patch": 100})
+    assert "Minor library patch release" not in titles(minor.select(ranked)[0])
+
+
+def test_downgrade_sends_best_unqualified_or_nothing(ranked):
+    low = [s for s in ranked if not s.evaluation.is_qualified]
+    fallback = AudienceProfile("fallback", chat_ids=["1"], top_n=1)
+    articles, downgraded = fallback.select(low)
+    assert titles(articles) == ["Minor library patch release"] and downgraded
+
+    silent = AudienceProfile("silent", chat_ids=["2"], top_n=1, allow_downgrade=False)
+    assert silent.select(low) == ([], False)
+
+    briefings = plan_briefings(low, [fallback, silent])
+    assert [b.profile.name for b in briefings] == ["fallback"]
+    assert briefings[0].is_downgraded
+
+
+def test_identical_selections_share_rendered_messages(ranked):
+    profiles = [
+        AudienceProfile("a", chat_ids=["1", "2"], top_n=2),
+        AudienceProfile("b", chat_ids=["2", "3"], top_n=2),
+        AudienceProfile("c", chat_ids=["4"], top_n=1),
+    ]
+    a, b, c = plan_briefings(ranked, profiles)
+    assert a.messages is b.messages
+    assert c.messages is not a.messages
+    assert a.content_key == b.content_key != c.content_key
+
+    deliveries = group_deliveries([a, b, c])
+    assert deliveries == [
+        (a.messages, ["1", "2", "3"], a.content_key),
+        (c.messages, ["4"], c.content_key),
+    ]
+
+
+def test_content_key_ignores_rendered_text(ranked):
+    profile = AudienceProfile("a", chat_ids=["1"], top_n=2)
+    (first,) = plan_briefings(ranked, [profile])
+    ranked[0].evaluation.executive_summary = "Reworded summary."
+    (second,) = plan_briefings(ranked, [profile])
+    assert first.messages != second.messages
+    assert first.content_key == second.content_key
+
+
+def test_load_audiences_skips_disabled_and_falls_back_to_default(tmp_path, monkeypatch):
+    monkeypatch.setenv("TARGET_CHAT_IDS", "100,200")
+    assert [(p.name, p.chat_ids, p.top_n) for p in load_audiences(str(tmp_path / "missing.json"), 4)] == [
+        ("default", ["100", "200"], 4)
+    ]
+
+    path = tmp_path / "audiences.json"
+    path.write_text(json.dumps({"audiences": [
+        {"name": "research", "chat_ids": [1], "min_score": 10},
+        {"name": "off", "chat_ids": [2], "enabled": False},
+    ]}), encoding="utf-8")
+    (profile,) = load_audiences(str(path), default_top_n=2)
+    assert (profile.name, profile.chat_ids, profile.min_score, profile.top_n) == ("research", ["1"], 10, 2)
@@ -0,0 +1,145 @@
+import re
+import time
+
+from src.notifications import broadcaster
+from src.notifications.broadcaster import (
+    MESSAGE_LIMIT,
+    _Outbox,
+    _render_item,
+    _tg_len,
+    format_daily_briefing,
+    format_daily_briefing_messages,
+    send_briefings,
+)
+
+
+def test_short_briefing_is_a_single_message(scored):
+    articles = [scored(f"Event {i}", 9 - i) for i in range(3)]
+    messages = format_daily_briefing_messages(articles)
+    assert messages == [format_daily_briefing(articles)]
+
+
+def test_long_briefing_is_split_on_article_boundaries(scored):
+    articles = [scored(f"Event number {i} 🚀", 9, summary="長篇戰略簡報 " * 120 + "<&>") for i in range(12)]
+    messages = format_daily_briefing_messages(articles)
+
+    assert len(messages) > 1
+    assert all(_tg_len(m) <= MESSAGE_LIMIT for m in messages)
+    for i in range(12):
+        assert sum(f"Event number {i} 🚀" in m for m in messages) == 1
+    for number, message in enumerate(messages[1:], start=2):
+        assert f"(續 {number}/{len(messages)})" in message
+    # 每則訊息的 HTML 標籤都成對出現，沒有被切到兩則訊息
+    for message in messages:
+        assert len(re.findall(r"<b>", message)) == len(re.findall(r"</b>", message))
+        assert len(re.findall(r"<a ", message)) == len(re.findall(r"</a>", message))
+
+
+def test_outbox_resumes_from_last_sent_part(telegram):
+    server = telegram()
+    messages = ["part 1", "part 2", "part 3"]
+    outbox = _Outbox()
+    broadcast_id = outbox.open(messages)
+    # 模擬上次執行在第一個群組送出兩則後崩潰
+    outbox.mark(broadcast_id, "100", 2)
+
+    stats = send_briefings([(messages, ["100", "200"])])
+
+    assert stats == {"sent": 2, "skipped": 0, "dropped": 0, "failed": 0}
+    assert [text for chat, text in server.sent if chat == "100"] == ["part 3"]
+    assert [text for chat, text in server.sent if chat == "200"] == messages
+    # 全部送達後 outbox 清空，再送一次同樣的簡報會重新發送
+    assert _Outbox()._data == {}
+
+
+def test_outbox_is_keyed_on_content_identity_not_rendered_text(telegram):
+    server = telegram()
+    outbox = _Outbox()
+    # 上次執行在送出第一則後崩潰；重跑時跨過午夜，日期標頭不同但收錄的文章相同
+    outbox.mark(outbox.open("urls-a"), "100", 1)
+
+    stats = send_briefings([(["2024-01-02 part 1", "2024-01-02 part 2"], ["100"], "urls-a")])
+    assert stats["sent"] == 1
+    assert [text for _, text in server.sent] == ["2024-01-02 part 2"]
+
+    # 收錄文章不同的簡報是新內容，照常發送
+    stats = send_briefings([(["2024-01-02 part 1"], ["100"], "urls-b")])
+    assert stats["sent"] == 1 and len(server.sent) == 2
+
+
+def test_escaped_and_wide_summary_is_truncated_not_collapsed(scored):
+    summary = "R&D <AI> 🚀 " * 1500
+    budget = 1000
+    item = _render_item(scored("Event", 9, summary=summary), budget)
+
+    # 每段重複約佔 23 個 UTF-16 單位：應截到接近 budget，而不是只剩 "…"
+    assert budget - 30 < _tg_len(item) <= budget
+    assert item.count("🚀") > 30
+    assert "&amp;" in item and "&lt;AI&gt;" in item
+    # 截斷發生在跳脫之前，不會留下被切斷的實體
+    assert not re.search(r"&[a-z]*…", item)
+
+
+def test_huge_title_is_capped(scored):
+    article = scored("T" * 5000, 9, summary="short")
+    item = _render_item(article, 500)
+    assert _tg_len(item) <= 500
+    assert "…" in item
+
+    messages = format_daily_briefing_messages([article, scored("Other", 8)])
+    assert all(_tg_len(m) <= MESSAGE_LIMIT for m in messages)
+    assert any("Other" in m for m in messages)
+
+
+def test_rate_limited_send_waits_retry_after(telegram):
+    server = telegram(rate_limit_every=2, retry_after=1)
+    messages = ["part 1", "part 2", "part 3"]
+
+    started = time.monotonic()
+    stats = send_briefings([(messages, ["100"])])
+
+    assert stats == {"sent": 1, "skipped": 0, "dropped": 0, "failed": 0}
+    assert [text for _, text in server.sent] == messages
+    assert time.monotonic() - started >= 0.9
+
+
+def test_failing_chat_stays_in_outbox_until_delivered(telegram, monkeypatch):
+    monkeypatch.setattr(broadcaster, "RETRY_BACKOFF", 0.0)
+    messages = ["part 1", "part 2"]
+    first = telegram(fail_chats=("200",), fail_status=500)
+    stats = send_briefings([(messages, ["100", "200"])])
+
+    assert stats == {"sent": 1, "skipped": 0, "dropped": 0, "failed": 1}
+    assert {chat for chat, _ in first.sent} == {"100"}
+    (entry,) = _Outbox()._data.values()
+    assert entry["progress"] == {"100": 2}
+
+    # 下次執行只補送失敗的群組，已送達的群組略過
+    second = telegram()
+    stats = send_briefings([(messages, ["100", "200"])])
+    assert stats == {"sent": 1, "skipped": 1, "dropped": 0, "failed": 0}
+    assert [chat for chat, _ in second.sent] == ["200", "200"]
+    assert _Outbox()._data == {}
+
+
+def test_forbidden_chat_is_dropped_without_retries(telegram):
+    messages = ["part 1", "part 2"]
+    server = telegram(fail_chats=("200",))
+    stats = send_briefings([(messages, ["100", "200"])])
+
+    # 403 不重試、不計入失敗，outbox 視為已完成
+    assert stats == {"sent": 1, "skipped": 0, "dropped": 1, "failed": 0}
+    assert server.requests == 3
+    assert _Outbox()._data == {}
+
+
+def test_chat_rate_limit_is_shared_across_briefings(telegram, monkeypatch):
+    server = telegram()
+    monkeypatch.setenv("TELEGRAM_PER_CHAT_PER_MINUTE", "120")
+
+    started = time.monotonic()
+    stats = send_briefings([(["team a"], ["100"]), (["team b"], ["100"])])
+
+    assert stats["sent"] == 2
+    assert sorted(text for _, text in server.sent) == ["team a", "team b"]
+    assert time.monotonic() - started >= 0.45
@@ -0,0 +1,80 @@
+import pytest
+
+import main
+from src.data_ingestion.scheduler import CircuitBreaker, IngestionScheduler
+from src.pipeline.checkpoint import IncompleteStageError, RunCheckpoint
+from src.scoring import llm_evaluator
+
+WORDS = ["quantum", "ledger", "harbor", "violet", "summit", "cobalt", "meadow", "falcon", "prism", "tundra"]
+
+
+@pytest.fixture
+def articles(article):
+    # 每篇使用互不重疊的字詞，假 embedding 下彼此不會被併為同一事件
+    return [
+        article(f"{w}{i} {w}{i + 1} {w}{i + 2} {w} funding round", snippet=f"{w}alpha {w}beta {w}gamma")
+        for i, w in enumerate(WORDS[:5])
+    ]
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(llm_evaluator, "RETRY_BACKOFF", 0.0)
+    monkeypatch.setenv("SCORING_BATCH_SIZE", "1")
+
+
+def run(source, checkpoint, make_filter, only_stage=None):
+    scheduler = IngestionScheduler([source], breaker=CircuitBreaker())
+    return main.run_staged(scheduler, make_filter(), checkpoint, only_stage)
+
+
+def test_resume_after_scoring_fails_partway(articles, list_source, make_filter, llm, tmp_path):
+    source = list_source(articles)
+    llm(fail_after=2)
+    with pytest.raises(IncompleteStageError):
+        run(source, RunCheckpoint("r1", root=str(tmp_path)), make_filter)
+
+    checkpoint = RunCheckpoint("r1", root=str(tmp_path))
+    assert checkpoint.completed("ingest") and checkpoint.completed("dedup")
+    assert not checkpoint.completed("score")
+    first = set(checkpoint.partial_scores())
+    assert len(first) == 2
+
+    # 重跑只送出尚未評分的 3 篇
+    server = llm()
+    scored = run(source, checkpoint, make_filter)
+    assert source.runs == 1
+    assert server.requests == 3
+    assert {s.article.url for s in scored} == {a.url for a in articles}
+    assert [s.evaluation.total_score for s in scored] == sorted((s.evaluation.total_score for s in scored), reverse=True)
+    assert checkpoint.completed("score") and not checkpoint.partial_scores()
+
+    # 評分已完成：再跑一次直接讀回 artifact，不再呼叫評分
+    server = llm()
+    again = run(source, RunCheckpoint("r1", root=str(tmp_path)), make_filter)
+    assert server.requests == 0 and source.runs == 1
+    assert [s.article.url for s in again] == [s.article.url for s in scored]
+
+
+def test_rerunning_a_stage_invalidates_later_stages(articles, list_source, make_filter, llm, tmp_path):
+    source = list_source(articles)
+    checkpoint = RunCheckpoint("r2", root=str(tmp_path))
+    llm()
+    run(source, checkpoint, make_filter)
+    assert checkpoint.completed("score")
+
+    assert run(source, checkpoint, make_filter, only_stage="dedup") is None
+    assert checkpoint.completed("dedup") and not checkpoint.completed("score")
+    assert source.runs == 1
+
+
+def test_incompatible_artifact_version_starts_over(articles, tmp_path, monkeypatch):
+    from src.models.article_batch import ArticleBatch
+    from src.pipeline import checkpoint as checkpoint_module
+
+    RunCheckpoint("r3", root=str(tmp_path)).save_ingest(ArticleBatch.from_articles(articles))
+    monkeypatch.setattr(checkpoint_module, "ARTIFACT_VERSION", checkpoint_module.ARTIFACT_VERSION + 1)
+    checkpoint = RunCheckpoint("r3", root=str(tmp_path))
+    assert not checkpoint.completed("ingest")
+    with pytest.raises(FileNotFoundError):
+        checkpoint.load_ingest()
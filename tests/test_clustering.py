@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from src.filtering.clustering import GreedyClusterer
+
+
+def baseline_assignments(embeddings: np.ndarray, threshold: float) -> list:
+    """改寫前逐篇比對 cos_sim 的貪婪分群迴圈，作為對照組。"""
+    reps, rep_embs, assignments = [], [], []
+    for idx, emb in enumerate(embeddings):
+        if reps:
+            matrix = np.array(rep_embs)
+            sims = matrix @ emb / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(emb))
+            best = int(np.argmax(sims))
+            if float(sims[best]) > threshold:
+                assignments.append(reps[best])
+                continue
+        reps.append(idx)
+        rep_embs.append(emb)
+        assignments.append(idx)
+    return assignments
+
+
+def clustered_embeddings(n: int, n_topics: int, noise: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(n_topics, 32))
+    picks = rng.integers(0, n_topics, size=n)
+    return (topics[picks] + noise * rng.normal(size=(n, 32))).astype(np.float32)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 512])
+def test_matches_baseline_loop(block_size):
+    embeddings = clustered_embeddings(300, 25, noise=0.6)
+    clusterer = GreedyClusterer(0.65, block_size=block_size)
+    assert clusterer.add(embeddings).tolist() == baseline_assignments(embeddings, 0.65)
+
+
+def test_micro_batches_match_single_batch():
+    embeddings = clustered_embeddings(200, 15, noise=0.5, seed=1)
+    expected = baseline_assignments(embeddings, 0.65)
+
+    clusterer = GreedyClusterer(0.65, block_size=16)
+    assignments = np.concatenate([clusterer.add(embeddings[i : i + 37]) for i in range(0, len(embeddings), 37)])
+    assert assignments.tolist() == expected
+    assert clusterer.rep_ids == sorted(set(expected))
+
+
+def test_threshold_is_strict():
+    embeddings = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    assert GreedyClusterer(0.99).add(embeddings).tolist() == [0, 0, 2]
+    assert GreedyClusterer(1.0).add(embeddings).tolist() == [0, 1, 2]
@@ -0,0 +1,63 @@
+import asyncio
+
+import numpy as np
+
+from src.data_ingestion.scheduler import CircuitBreaker, IngestionScheduler
+from src.notifications import broadcaster
+from src.notifications.audiences import AudienceProfile
+from src.pipeline import daemon
+from src.pipeline.daemon import BriefingDaemon
+
+
+def make_daemon(make_filter, broadcast_attempts=3):
+    engine = make_filter(use_history=True)
+    scheduler = IngestionScheduler([], breaker=CircuitBreaker())
+    return BriefingDaemon(scheduler, engine, audiences=[AudienceProfile("team", chat_ids=["1", "2"])],
+                          broadcast_attempts=broadcast_attempts)
+
+
+def test_failed_broadcast_keeps_candidates_for_next_slot(make_filter, scored, monkeypatch):
+    bot = make_daemon(make_filter)
+    item = scored("OpenAI raises new funding round", 9)
+    bot.candidates = {item.article.url: item}
+    bot.engine.defer_history(np.ones((1, 8), dtype=np.float32), [item.article.title])
+
+    monkeypatch.setattr(daemon, "send_briefings", lambda deliveries: {"sent": 1, "skipped": 0, "dropped": 0, "failed": 1})
+    assert asyncio.run(bot.broadcast()) is False
+    assert list(bot.candidates) == [item.article.url]
+    assert len(bot.engine.history) == 0
+
+    monkeypatch.setattr(daemon, "send_briefings", lambda deliveries: {"sent": 0, "skipped": 0, "dropped": 0, "failed": 0})
+    assert asyncio.run(bot.broadcast()) is False
+    assert bot.candidates
+
+    monkeypatch.setattr(daemon, "send_briefings", lambda deliveries: {"sent": 1, "skipped": 1, "dropped": 0, "failed": 0})
+    assert asyncio.run(bot.broadcast()) is True
+    assert bot.candidates == {}
+    assert bot.engine.history.titles == [item.article.title]
+
+
+def test_failing_chat_gives_up_after_the_last_broadcast_slot(make_filter, scored, telegram, monkeypatch):
+    monkeypatch.setattr(broadcaster, "RETRY_BACKOFF", 0.0)
+    server = telegram(fail_chats=("2",), fail_status=500)
+    bot = make_daemon(make_filter, broadcast_attempts=2)
+    item = scored("OpenAI raises new funding round", 9)
+    bot.candidates = {item.article.url: item}
+    bot.engine.defer_history(np.ones((1, 8), dtype=np.float32), [item.article.title])
+
+    assert asyncio.run(bot.broadcast()) is False
+    assert bot.candidates and bot.failed_slots == 1
+
+    # 重啟後仍記得已失敗的時段數；第二個時段只補送失敗的群組，仍失敗就放棄並開始新的一天
+    restarted = make_daemon(make_filter, broadcast_attempts=2)
+    restarted._load_state()
+    restarted.engine.defer_history(np.ones((1, 8), dtype=np.float32), [item.article.title])
+    assert restarted.failed_slots == 1
+    assert asyncio.run(restarted.broadcast()) is True
+    assert restarted.candidates == {} and restarted.failed_slots == 0
+    assert restarted.engine.history.titles == [item.article.title]
+    assert [chat for chat, _ in server.sent] == ["1"]
+
+    fresh = make_daemon(make_filter, broadcast_attempts=2)
+    fresh._load_state()
+    assert fresh.candidates == {} and fresh.failed_slots == 0
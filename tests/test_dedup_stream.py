@@ -0,0 +1,56 @@
+import random
+
+TOPICS = [
+    "OpenAI raises new funding round at record valuation",
+    "Anthropic launches enterprise assistant with usage based pricing",
+    "Startup acquires robotics company to expand warehouse automation",
+    "Nvidia reports quarterly revenue growth driven by data center chips",
+    "Show HN: open source vector database written in Rust",
+    "European regulators open antitrust probe into cloud AI partnerships",
+]
+SOURCES = ["Hacker News", "TechCrunch", "The Verge", "HF Papers"]
+
+
+def corpus(article, n=60, seed=7):
+    rng = random.Random(seed)
+    articles = []
+    for i in range(n):
+        topic = rng.choice(TOPICS)
+        variant = rng.randrange(4)
+        if variant == 0:
+            # 同一篇文章被不同來源轉載：URL 完全相同
+            articles.append(article(topic, url=f"https://news.example/{TOPICS.index(topic)}", source=f"feed-{i}"))
+        else:
+            title = f"{topic} report {variant}"
+            articles.append(article(title, url=f"https://site{i}.example/post", source=f"feed-{i}"))
+    return articles
+
+
+def summary(representatives):
+    # 每篇文章的來源名稱都不同，similar_sources 即可完整描述各群的成員
+    return [(a.url, sorted(a.similar_sources)) for a in representatives]
+
+
+def test_stream_micro_batches_match_batch_mode(article, make_filter):
+    batch_result = make_filter().process(corpus(article))
+
+    stream = make_filter().stream()
+    articles = corpus(article)
+    streamed = []
+    for start in range(0, len(articles), 9):
+        streamed.extend(stream.add(articles[start : start + 9]))
+
+    assert summary(streamed) == summary(batch_result)
+    assert summary(stream.representatives) == summary(batch_result)
+    assert len(stream.embeddings) == len(batch_result)
+
+
+def test_exact_duplicates_skip_embedding(article, make_filter):
+    engine = make_filter()
+    title = "OpenAI raises new funding round at record valuation"
+    articles = [article(title, url="https://news.example/a", source=source) for source in SOURCES]
+
+    result = engine.process(articles)
+    assert len(result) == 1
+    assert sorted(result[0].similar_sources) == sorted(SOURCES[1:])
+    assert engine.model.calls == 1
@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.filtering import embedding_cache
+from src.filtering.embedding_cache import EmbeddingCache
+
+DAY = 86400
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_700_000_000.0)
+    monkeypatch.setattr(embedding_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, texts):
+        self.seen.extend(texts)
+        return np.stack([np.full(4, float(len(t)), dtype=np.float32) for t in texts])
+
+
+def test_hits_skip_the_encoder_and_survive_a_reload(clock):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache("test-model")
+    first = cache.encode(["alpha", "beta", "alpha"], encoder)
+    assert encoder.seen == ["alpha", "beta"]
+    assert (cache.hits, cache.misses) == (0, 3)
+    cache.save()
+
+    reloaded = EmbeddingCache("test-model")
+    again = reloaded.encode(["beta", "alpha"], encoder)
+    assert encoder.seen == ["alpha", "beta"]
+    assert (reloaded.hits, reloaded.misses) == (2, 0)
+    np.testing.assert_array_equal(again, first[[1, 0]])
+
+
+def test_save_evicts_rows_past_max_age_and_compacts_the_matrix(clock):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache("test-model", max_age_days=1)
+    cache.encode(["old one", "old two", "kept"], encoder)
+    cache.save()
+
+    clock.now += DAY / 2
+    cache = EmbeddingCache("test-model", max_age_days=1)
+    cache.encode(["kept"], encoder)  # 命中會更新最後使用時間
+    cache.save()
+
+    clock.now += DAY
+    cache = EmbeddingCache("test-model", max_age_days=1)
+    cache.encode(["newest text"], encoder)
+    cache.save()
+
+    reloaded = EmbeddingCache("test-model", max_age_days=1)
+    assert len(reloaded) == 2
+    assert np.load(reloaded.matrix_path).shape == (2, 4)
+    assert sorted(row for row, _ in reloaded._rows.values()) == [0, 1]
+
+    # 壓實後的列號仍對應正確的向量，過期的文字重新計算
+    seen = len(encoder.seen)
+    vectors = reloaded.encode(["kept", "newest text", "old one"], encoder)
+    assert encoder.seen[seen:] == ["old one"]
+    np.testing.assert_array_equal(vectors[:, 0], [4.0, 11.0, 7.0])
+
+
+def test_model_name_is_part_of_the_key(clock):
+    encoder = CountingEncoder()
+    cache = EmbeddingCache("model-a")
+    cache.encode(["same text"], encoder)
+    cache.save()
+
+    EmbeddingCache("model-b").encode(["same text"], encoder)
+    assert encoder.seen == ["same text", "same text"]
@@ -0,0 +1,37 @@
+import os
+import stat
+import threading
+
+import pytest
+
+from src.filtering import embedding_worker
+from src.filtering.embedding_worker import EmbeddingWorker
+from src.filtering.encoders import RemoteEncoder
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch, hashing_encoder):
+    monkeypatch.setattr(embedding_worker, "load_local_model", lambda name, backend: hashing_encoder())
+    server = EmbeddingWorker(str(tmp_path / "worker.sock"), "test-model", "torch")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_socket_is_owner_only(worker):
+    assert stat.S_IMODE(os.stat(worker.socket_path).st_mode) == 0o600
+
+
+def test_ping_requires_matching_model_and_backend(worker):
+    assert RemoteEncoder(worker.socket_path, "test-model", "torch").ping()
+    assert not RemoteEncoder(worker.socket_path, "test-model", "onnx").ping()
+    assert not RemoteEncoder(worker.socket_path, "other-model", "torch").ping()
+
+
+def test_encode_rejects_other_backend(worker):
+    assert RemoteEncoder(worker.socket_path, "test-model", "torch").encode(["hello world"]).shape == (1, 256)
+    with pytest.raises(RuntimeError):
+        RemoteEncoder(worker.socket_path, "test-model", "onnx").encode(["hello world"])
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.schemas import EvaluationResult
+from src.scoring import eval_cache
+from src.scoring.eval_cache import EvaluationCache, make_key
+
+DAY = 86400
+PAYLOAD = {"title": "Acme raises $20M", "source": "Test", "content_snippet": "Series A for AI agents"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_700_000_000.0)
+    monkeypatch.setattr(eval_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "eval.sqlite3")
+
+
+def verdict(score=72):
+    return EvaluationResult(
+        reasoning="test", impact_score=30, specificity_score=25, novelty_score=17,
+        total_score=score, is_qualified=score >= 65, executive_summary=None,
+    )
+
+
+def test_hit_survives_a_reopen_and_counters_accumulate(clock, db):
+    key = make_key(PAYLOAD, "prompt", "gpt-4o-mini", 0.3)
+    cache = EvaluationCache(db)
+    assert cache.get(key) is None
+    cache.put(key, verdict())
+    assert cache.get(key) == verdict()
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    cache = EvaluationCache(db)
+    assert cache.get(key) == verdict()
+    assert (cache.hits, cache.misses) == (1, 0)
+    cache.close()
+    assert EvaluationCache(db).totals() == {"hits": 2, "misses": 1}
+
+
+def test_entries_past_the_ttl_miss_and_are_evicted(clock, db):
+    key = make_key(PAYLOAD, "prompt", "gpt-4o-mini", 0.3)
+    cache = EvaluationCache(db, ttl_days=1)
+    cache.put(key, verdict())
+
+    clock.now += DAY / 2
+    assert cache.get(key) == verdict()
+    clock.now += DAY
+    assert cache.get(key) is None
+    assert cache.evict_expired() == 1
+
+
+def test_prompt_model_and_temperature_changes_miss(db):
+    key = make_key(PAYLOAD, "prompt", "gpt-4o-mini", 0.3)
+    cache = EvaluationCache(db)
+    cache.put(key, verdict())
+
+    for changed in (
+        make_key(PAYLOAD, "prompt v2", "gpt-4o-mini", 0.3),
+        make_key(PAYLOAD, "prompt", "gpt-4o", 0.3),
+        make_key(PAYLOAD, "prompt", "gpt-4o-mini", 0.7),
+        make_key({**PAYLOAD, "title": "Acme raises $30M"}, "prompt", "gpt-4o-mini", 0.3),
+    ):
+        assert changed != key
+        assert cache.get(changed) is None
+
+    # 空白差異會被正規化，不影響命中
+    assert make_key({**PAYLOAD, "title": " Acme  raises $20M "}, "prompt", "gpt-4o-mini", 0.3) == key
+    assert cache.get(key) == verdict()
+
+
+def test_get_counts_one_lookup_across_fallback_keys(db):
+    cache = EvaluationCache(db)
+    cache.put("single", verdict(40))
+    assert cache.get("batch", "single") == verdict(40)
+    assert cache.get("batch", "missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
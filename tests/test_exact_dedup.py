@@ -0,0 +1,54 @@
+from src.filtering.exact_dedup import ExactDeduper, canonical_url, simhash
+
+BODY = (
+    "OpenAI announced on Tuesday that it has raised a new funding round led by several large investors, "
+    "valuing the company at a record level and giving it capital to expand data centers and hire "
+    "researchers across three continents this year"
+)
+
+
+def test_tracking_params_www_and_fragment_are_stripped():
+    url = "http://www.Example.com/a/?utm_source=x&b=2&ref=hn&a=1&fbclid=z#comments"
+    assert canonical_url(url) == "https://example.com/a?a=1&b=2"
+    assert canonical_url("https://example.com/a?b=2&a=1") == canonical_url(url)
+
+
+def test_meaningful_query_and_non_default_ports_are_kept():
+    assert canonical_url("https://news.ycombinator.com/item?id=123") == "https://news.ycombinator.com/item?id=123"
+    assert canonical_url("https://news.ycombinator.com/item?id=123") != canonical_url(
+        "https://news.ycombinator.com/item?id=456"
+    )
+    assert canonical_url("https://example.com:8080/x") == "https://example.com:8080/x"
+    assert canonical_url("https://example.com:443/x") == "https://example.com/x"
+
+
+def test_malformed_port_falls_back_to_the_raw_netloc():
+    assert canonical_url("https://Example.com:abc/x") == "https://example.com:abc/x"
+    assert canonical_url("https://example.com:99999/x") == "https://example.com:99999/x"
+
+    unique, duplicates = ExactDeduper().add(
+        ["https://example.com:abc/x", "https://example.com/x"], ["First title", "Second title"], ["a", "b"], 0
+    )
+    assert unique == [0, 1] and duplicates == {}
+
+
+def test_simhash_merges_near_duplicate_text_only():
+    assert (simhash(BODY) ^ simhash("Reuters - " + BODY)).bit_count() <= 3
+
+    unique, duplicates = ExactDeduper().add(
+        ["https://a.example/1", "https://b.example/2", "https://c.example/3"],
+        ["OpenAI raises a record round", "Investors back OpenAI again", "Nvidia revenue jumps"],
+        [
+            BODY,
+            "Reuters - " + BODY,
+            "Nvidia reported quarterly revenue growth driven by strong demand for data center chips "
+            "from cloud providers and enterprise customers worldwide",
+        ],
+        first_id=10,
+    )
+    assert unique == [0, 2]
+    assert duplicates == {1: 10}
+
+
+def test_short_texts_skip_simhash():
+    assert simhash("Show HN: a tiny tool") is None
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.filtering import history_index
+from src.filtering.history_index import MIN_TRAIN_SIZE, HistoryIndex
+
+DAY = 86400
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_700_000_000.0)
+    monkeypatch.setattr(history_index, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def vectors(n, seed):
+    return np.random.default_rng(seed).normal(size=(n, 16)).astype(np.float32)
+
+
+def test_add_expires_entries_past_retention(clock):
+    index = HistoryIndex(retention_days=1)
+    old = vectors(3, seed=0)
+    index.add(old, ["a", "b", "c"])
+    assert index.query(old, 0.9)[0][0] == 0
+
+    clock.now += 2 * DAY
+    new = vectors(2, seed=1)
+    index.add(new, ["d", "e"])
+
+    assert index.titles == ["d", "e"]
+    assert [idx for idx, _ in index.query(old, 0.9)] == [-1, -1, -1]
+    assert index.query(new, 0.9)[1][0] == 1
+
+    index.save()
+    assert HistoryIndex(retention_days=1).titles == ["d", "e"]
+
+
+def test_expiry_rebuilds_ivf_buckets(clock):
+    index = HistoryIndex(retention_days=1)
+    index.add(vectors(MIN_TRAIN_SIZE + 50, seed=2), [f"old {i}" for i in range(MIN_TRAIN_SIZE + 50)])
+    assert index.centroids is not None
+
+    clock.now += DAY / 2
+    fresh = vectors(MIN_TRAIN_SIZE, seed=3)
+    index.add(fresh, [f"fresh {i}" for i in range(MIN_TRAIN_SIZE)])
+    clock.now += DAY
+    latest = vectors(10, seed=4)
+    index.add(latest, [f"latest {i}" for i in range(10)])
+
+    assert len(index) == MIN_TRAIN_SIZE + 10
+    assert all(not title.startswith("old") for title in index.titles)
+    members = sorted(i for bucket in index._lists for i in bucket)
+    assert members == list(range(len(index)))
+    assert [idx for idx, _ in index.query(latest, 0.99)] == list(range(MIN_TRAIN_SIZE, MIN_TRAIN_SIZE + 10))
+
+
+def test_reload_drops_expired_entries_and_queries_the_rebuilt_index(clock):
+    index = HistoryIndex(retention_days=1)
+    old = vectors(MIN_TRAIN_SIZE, seed=5)
+    index.add(old, [f"old {i}" for i in range(MIN_TRAIN_SIZE)])
+    index.save()
+
+    clock.now += DAY / 2
+    index = HistoryIndex(retention_days=1)
+    recent = vectors(MIN_TRAIN_SIZE, seed=6)
+    index.add(recent, [f"recent {i}" for i in range(MIN_TRAIN_SIZE)])
+    index.save()
+
+    clock.now += 0.75 * DAY
+    reloaded = HistoryIndex(retention_days=1)
+    assert reloaded.titles == [f"recent {i}" for i in range(MIN_TRAIN_SIZE)]
+    assert reloaded.centroids is not None
+    assert [idx for idx, _ in reloaded.query(recent[:5], 0.99)] == list(range(5))
+    assert [idx for idx, _ in reloaded.query(old[:5], 0.99)] == [-1] * 5
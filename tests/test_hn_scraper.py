@@ -0,0 +1,34 @@
+import time
+
+from benchmarks.mock_servers import hn_server
+from src.data_ingestion import hn_scraper
+from src.data_ingestion.hn_scraper import fetch_hn_ai_stories
+
+
+def titles(articles):
+    return {a.title.rsplit("#", 1)[-1] for a in articles}
+
+
+def test_transient_errors_are_retried_and_client_errors_are_not(monkeypatch):
+    monkeypatch.setattr(hn_scraper, "RETRY_BACKOFF", 0.01)
+    with hn_server(7, failures={1: (503, 1), 2: (404, -1), 3: (429, 1)}) as server:
+        monkeypatch.setenv("HN_API_BASE", f"{server.url}/v0")
+        articles = fetch_hn_ai_stories(max_workers=4, stage_timeout=10)
+
+    assert titles(articles) == {"1", "3", "4", "7"}
+    assert server.hits[1] == 2 and server.hits[3] == 2
+    # 404 是確定性錯誤，只請求一次
+    assert server.hits[2] == 1
+
+
+def test_retry_backoff_stops_at_the_stage_deadline(monkeypatch):
+    monkeypatch.setattr(hn_scraper, "RETRY_BACKOFF", 30)
+    with hn_server(7, failures={1: (503, -1)}) as server:
+        monkeypatch.setenv("HN_API_BASE", f"{server.url}/v0")
+        started = time.monotonic()
+        articles = fetch_hn_ai_stories(max_workers=4, stage_timeout=0.5)
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 2
+    assert server.hits[1] == 1
+    assert titles(articles) == {"2", "3", "4", "7"}
@@ -0,0 +1,93 @@
+import time
+
+from src.scoring.llm_evaluator import evaluate_events
+
+
+def by_url(scored):
+    return {s.article.url: s.evaluation.total_score for s in scored}
+
+
+def test_rate_limited_request_is_retried_after_retry_after(llm, article):
+    articles = [article(f"Startup {i} raises a Series A") for i in range(3)]
+    llm()
+    reference = by_url(evaluate_events(articles, max_concurrency=1, use_cache=False, batch_size=1))
+
+    # 第 3 個請求回 429 (retry-after-ms: 200)，重試後成功
+    server = llm(rate_limit_every=3)
+    started = time.monotonic()
+    scored = evaluate_events(articles, max_concurrency=1, use_cache=False, batch_size=1)
+
+    assert by_url(scored) == reference
+    assert server.requests == 4
+    assert time.monotonic() - started >= 0.2
+
+
+def test_in_flight_requests_never_exceed_max_concurrency(llm, article):
+    server = llm(latency=0.05)
+    articles = [article(f"Company {i} launches an AI product") for i in range(12)]
+
+    scored = evaluate_events(articles, max_concurrency=3, use_cache=False, batch_size=1)
+
+    assert len(scored) == 12
+    assert server.peak_in_flight == 3
+
+
+
+def titles(n):
+    return [f"Startup {i} raises a Series A for its AI agents" for i in range(n)]
+
+
+def test_short_or_malformed_batch_falls_back_to_single_requests(llm, article):
+    articles = [article(t) for t in titles(4)]
+    llm()
+    reference = by_url(evaluate_events(articles, use_cache=False, batch_size=1))
+
+    # 漏掉最後一篇，且第一篇缺少必要欄位
+    def short(results):
+        broken = {k: v for k, v in results[0].items() if k != "total_score"}
+        return {"results": [broken, *results[1:-1]]}
+
+    server = llm(batch_reply=short)
+    scored = evaluate_events(articles, use_cache=False, batch_size=4)
+    assert by_url(scored) == reference
+    assert server.batches == 1
+    assert server.requests == 3
+
+    server = llm(batch_reply=lambda results: "not a results object")
+    scored = evaluate_events(articles, use_cache=False, batch_size=4)
+    assert by_url(scored) == reference
+    assert server.requests == 1 + len(articles)
+
+
+def test_batch_results_are_matched_by_id_not_position(llm, article):
+    articles = [article(t) for t in titles(6)]
+    llm()
+    reference = by_url(evaluate_events(articles, use_cache=False, batch_size=1))
+    assert len(set(reference.values())) > 1
+
+    # 錯序、重複 id 與未知 id 都不能讓評分落到別篇文章上
+    def shuffled(results):
+        return {"results": [*reversed(results), {**results[0], "id": results[1]["id"]}, {**results[2], "id": 99}]}
+
+    server = llm(batch_reply=shuffled)
+    scored = evaluate_events(articles, use_cache=False, batch_size=6)
+    assert by_url(scored) == reference
+    assert server.requests == 1
+
+
+def test_batch_and_single_verdicts_are_cached_under_their_own_prompt(llm, article):
+    from src.scoring.llm_evaluator import cache_key
+
+    articles = [article(t) for t in titles(3)]
+    assert cache_key(articles[0]) != cache_key(articles[0], batched=True)
+
+    server = llm(batch_reply=lambda results: {"results": results[:2]})
+    evaluate_events(articles, batch_size=3)
+    assert server.requests == 2
+
+    # 批次模式同時命中批次評分與逐篇重試留下的評分；逐篇模式只認逐篇評分
+    server = llm()
+    evaluate_events(articles, batch_size=3)
+    assert server.requests == 0
+    evaluate_events(articles, batch_size=1)
+    assert server.requests == 2
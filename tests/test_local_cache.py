@@ -0,0 +1,21 @@
+import os
+
+from src.utils.local_cache import cache_path, load_json, save_json
+
+
+def test_cache_dir_is_read_from_env_on_each_call(tmp_path, monkeypatch):
+    monkeypatch.setenv("YOYO_CACHE_DIR", str(tmp_path / "first"))
+    first = cache_path("state.json")
+    monkeypatch.setenv("YOYO_CACHE_DIR", str(tmp_path / "second"))
+    second = cache_path("state.json")
+
+    assert first == os.path.join(str(tmp_path / "first"), "state.json")
+    assert second == os.path.join(str(tmp_path / "second"), "state.json")
+    assert os.path.isdir(tmp_path / "second")
+
+
+def test_save_and_load_json_round_trip(tmp_path):
+    path = str(tmp_path / "nested" / "data.json")
+    save_json(path, {"中文": [1, 2]})
+    assert load_json(path) == {"中文": [1, 2]}
+    assert load_json(str(tmp_path / "missing.json"), {}) == {}
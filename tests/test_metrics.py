@@ -0,0 +1,43 @@
+from src.utils import metrics
+
+
+def test_enabled_is_read_from_env_on_first_use(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", None)
+    monkeypatch.setenv("METRICS_ENABLED", "1")
+    assert metrics.is_enabled()
+    monkeypatch.setattr(metrics, "_enabled", None)
+    monkeypatch.delenv("METRICS_ENABLED")
+    assert not metrics.is_enabled()
+
+
+def test_export_reads_report_paths_from_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    monkeypatch.setenv("METRICS_REPORT_PATH", str(tmp_path / "report.json"))
+    monkeypatch.setenv("METRICS_PROMETHEUS_PATH", str(tmp_path / "metrics.prom"))
+    metrics.reset()
+    metrics.incr("articles_scored", 3)
+
+    assert metrics.export() == str(tmp_path / "report.json")
+    assert "yoyo_articles_scored_total 3" in (tmp_path / "metrics.prom").read_text(encoding="utf-8")
+
+
+def test_prometheus_families_are_contiguous(monkeypatch):
+    monkeypatch.setattr(metrics, "_enabled", True)
+    metrics.reset()
+    for mode in ("batch", "single"):
+        with metrics.span("llm_request", mode=mode):
+            pass
+    metrics.incr("cache_hits", 2, cache="llm")
+    metrics.incr("cache_hits", 1, cache="embedding")
+
+    family = None
+    seen = set()
+    for line in metrics.render_prometheus().splitlines():
+        if line.startswith("# TYPE "):
+            family = line.split()[2]
+            assert family not in seen
+            seen.add(family)
+            continue
+        name = line.split("{")[0].split()[0]
+        assert name in (family, f"{family}_count", f"{family}_sum")
+    assert {"yoyo_llm_request_seconds", "yoyo_llm_request_max_seconds", "yoyo_cache_hits_total"} <= seen
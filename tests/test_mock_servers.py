@@ -0,0 +1,17 @@
+import time
+
+import requests
+
+from benchmarks.mock_servers import hn_server
+
+
+def test_keep_alive_requests_are_not_delayed():
+    """同一條 keep-alive 連線上的請求不應被 Nagle + 延遲 ACK 拖慢 (未修正時每個約 40ms)。"""
+    with hn_server(20) as server, requests.Session() as session:
+        session.get(f"{server.url}/v0/item/1.json").raise_for_status()
+        started = time.perf_counter()
+        for story_id in range(2, 22):
+            session.get(f"{server.url}/v0/item/{story_id}.json").raise_for_status()
+        elapsed = time.perf_counter() - started
+
+    assert elapsed / 20 < 0.02
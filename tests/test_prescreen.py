@@ -0,0 +1,86 @@
+import numpy as np
+
+from benchmarks.run_benchmarks import simulate_prescreen
+from src.scoring import prescreen
+from src.scoring.prescreen import PreScreener
+
+
+def _encoder(dim=8):
+    rng = np.random.default_rng(1)
+    return lambda texts: rng.normal(size=(len(texts), dim)).astype(np.float32)
+
+
+def _trained(tmp_path, dim=8):
+    """以 MIN_TRAIN_SAMPLES 筆「分數 = 50 + 40 * 第一維」的樣本擬合線性模型。"""
+    screener = PreScreener(_encoder(dim), top_k=2, explore=0, samples_path=str(tmp_path / "s.npz"))
+    rng = np.random.default_rng(2)
+    embeddings = rng.normal(size=(prescreen.MIN_TRAIN_SAMPLES, dim)).astype(np.float32)
+    unit = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    urls = np.array([f"https://t/{i}" for i in range(len(embeddings))])
+    screener._samples = (embeddings, (50 + 40 * unit[:, 0]).astype(np.float32), urls)
+    screener._fit()
+    return screener
+
+
+def test_min_score_adds_to_top_k_once_model_is_trained(tmp_path, article):
+    screener = _trained(tmp_path)
+    articles = [article(f"story {i}") for i in range(6)]
+    embeddings = np.eye(6, 8, dtype=np.float32)
+    embeddings[:3, 0] = [1.0, 0.9, 0.8]
+
+    kept, _ = screener.select(articles, embeddings)
+    assert len(kept) == 2
+
+    screener.min_score = 70
+    kept, kept_embs = screener.select(articles, embeddings)
+    assert kept == articles[:3]
+    assert len(kept_embs) == 3
+
+
+def test_min_score_is_ignored_before_model_is_trained(tmp_path, article):
+    screener = PreScreener(_encoder(), top_k=2, min_score=-100, explore=0, samples_path=str(tmp_path / "s.npz"))
+    articles = [article(f"story {i}") for i in range(6)]
+    kept, _ = screener.select(articles, np.random.default_rng(3).normal(size=(6, 8)).astype(np.float32))
+    assert len(kept) == 2
+
+
+def test_explore_picks_are_deterministic_per_input(tmp_path, article):
+    screener = PreScreener(_encoder(), top_k=2, explore=3, samples_path=str(tmp_path / "s.npz"))
+    articles = [article(f"story {i}") for i in range(10)]
+    embeddings = np.random.default_rng(4).normal(size=(10, 8)).astype(np.float32)
+
+    first, _ = screener.select(articles, embeddings)
+    second, _ = screener.select(articles, embeddings)
+    assert len(first) == 5
+    assert first == second
+
+
+def test_record_keeps_one_sample_per_url(tmp_path, article, scored):
+    screener = PreScreener(_encoder(), samples_path=str(tmp_path / "s.npz"))
+    items = [scored(f"story {i}", 10 + i) for i in range(3)]
+    articles = [s.article for s in items]
+    embeddings = np.eye(3, 8, dtype=np.float32)
+
+    screener.record(articles, embeddings, items)
+    rescored = [scored("story 0", 20)]
+    screener.record(articles[:1], embeddings[:1], rescored)
+
+    reloaded = PreScreener(_encoder(), samples_path=screener.samples_path)
+    _, scores, urls = reloaded._samples
+    assert sorted(urls.tolist()) == sorted(a.url for a in articles)
+    assert dict(zip(urls.tolist(), scores.tolist()))[articles[0].url] == 20
+
+
+def test_simulated_top3_is_unchanged_once_model_is_trained():
+    result = simulate_prescreen(days=20, per_day=200, top_k=40, seed=0)
+    assert result["trained_days"] >= 10
+    assert result["trained_top3_unchanged"] == result["trained_days"]
+    assert result["trained_llm_fraction"] < 0.3
+
+
+def test_limits_are_read_from_env_at_construction(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRESCREEN_TOP_K", "7")
+    monkeypatch.setenv("PRESCREEN_MIN_SCORE", "72.5")
+    screener = PreScreener(_encoder(), samples_path=str(tmp_path / "s.npz"))
+    assert (screener.top_k, screener.min_score) == (7, 72.5)
+    assert PreScreener(_encoder(), top_k=3, samples_path=str(tmp_path / "s.npz")).top_k == 3
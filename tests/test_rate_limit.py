@@ -0,0 +1,24 @@
+import asyncio
+import time
+
+from src.utils.rate_limit import TokenBucket
+
+
+def test_bucket_refills_at_its_rate():
+    bucket = TokenBucket(600, capacity=1)  # 每 0.1 秒補 1 個
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    assert 0.28 <= time.monotonic() - started < 1.0
+
+
+def test_pause_blocks_async_callers_until_it_expires():
+    bucket = TokenBucket(60_000)
+    bucket.pause(0.2)
+
+    async def take():
+        started = time.monotonic()
+        await bucket.acquire_async()
+        return time.monotonic() - started
+
+    assert asyncio.run(take()) >= 0.2
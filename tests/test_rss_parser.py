@@ -0,0 +1,123 @@
+import time
+from email.utils import formatdate
+
+from benchmarks.mock_servers import rss_server
+from src.data_ingestion import rss_parser
+from src.data_ingestion.rss_parser import _stream_entries, fetch_official_rss_batch, iter_official_rss
+from src.utils.local_cache import cache_path, load_json
+
+
+class ChunkedResponse:
+    """只提供 iter_content 的假回應，以很小的區塊逐段送出內容。"""
+
+    def __init__(self, body: bytes, chunk_size: int = 64):
+        self.body = body
+        self.chunk_size = chunk_size
+
+    def iter_content(self, _):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start : start + self.chunk_size]
+
+
+def feed_xml(descriptions):
+    items = "".join(
+        f"<item><title>Item {i}</title><link>https://example.com/{i}</link><guid>g{i}</guid>"
+        f"<description>{text}</description><pubDate>{formatdate(time.time() - i * 60)}</pubDate></item>"
+        for i, text in enumerate(descriptions)
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>T</title>{items}</channel></rss>'.encode()
+
+
+def feeds(server, n=3):
+    return [{"url": f"{server.url}/feed/{k}.xml", "name": f"Feed {k}"} for k in range(n)]
+
+
+def test_stream_parse_matches_feedparser(monkeypatch):
+    with rss_server(40) as server:
+        streamed = fetch_official_rss_batch(feeds=feeds(server), use_cache=False)
+        monkeypatch.setenv("RSS_STREAM_PARSE", "0")
+        parsed = fetch_official_rss_batch(feeds=feeds(server), use_cache=False)
+
+    assert len(streamed) == 120
+    assert streamed.titles == parsed.titles
+    assert streamed.urls == parsed.urls
+
+
+def test_invalid_xml_before_first_entry_falls_back_to_feedparser():
+    entries, complete = _stream_entries(ChunkedResponse(feed_xml(["bad &nbsp; entity", "fine"])), None)
+    assert complete
+    assert [e["title"] for e in entries] == ["Item 0", "Item 1"]
+
+
+def test_invalid_xml_after_first_entry_keeps_parsed_prefix():
+    body = feed_xml(["fine " * 40, "fine", "bad &nbsp; entity", "fine"])
+    entries, complete = _stream_entries(ChunkedResponse(body), None)
+    assert not complete
+    assert [e["title"] for e in entries] == ["Item 0", "Item 1"]
+
+
+def test_only_complete_feeds_are_cached_with_validators(monkeypatch):
+    with rss_server(200) as server:
+        # 每 15 分鐘一篇：24 小時窗口外的舊 entry 觸發提前停止
+        fetch_official_rss_batch(hours=24, feeds=feeds(server, 1), use_cache=True)
+        early_stopped = load_json(cache_path(rss_parser.FEED_CACHE_FILE))
+    (cached,) = early_stopped.values()
+    assert cached["etag"] is None and len(cached["entries"]) < 200
+
+    with rss_server(20) as server:
+        fetch_official_rss_batch(hours=24, feeds=feeds(server, 1), use_cache=True)
+        monkeypatch.setenv("RSS_MAX_FEED_BYTES", "2048")
+        monkeypatch.setattr(rss_parser, "CHUNK_SIZE", 512)
+        fetch_official_rss_batch(hours=24, feeds=[{"url": f"{server.url}/feed/1.xml", "name": "Big"}],
+                                 use_cache=True)
+        cache = load_json(cache_path(rss_parser.FEED_CACHE_FILE))
+    complete = cache[f"{server.url}/feed/0.xml"]
+    truncated = cache[f"{server.url}/feed/1.xml"]
+    assert complete["etag"] == '"feed-0-v1"' and len(complete["entries"]) == 20
+    assert truncated["etag"] is None and len(truncated["entries"]) < 20
+
+
+def test_not_modified_feeds_reuse_cached_entries():
+    with rss_server(20) as server:
+        first = fetch_official_rss_batch(feeds=feeds(server, 2), use_cache=True)
+        second = fetch_official_rss_batch(feeds=feeds(server, 2), use_cache=True)
+
+    assert server.not_modified == 2
+    assert len(second) == 40
+    assert second.titles == first.titles
+    assert second.urls == first.urls
+
+
+def test_partial_feeds_are_downloaded_again_instead_of_304():
+    with rss_server(200) as server:
+        first = fetch_official_rss_batch(hours=24, feeds=feeds(server, 1), use_cache=True)
+        second = fetch_official_rss_batch(hours=24, feeds=feeds(server, 1), use_cache=True)
+
+    # 提前停止的結果沒有記錄 ETag，第二次不會送出條件式請求
+    assert server.not_modified == 0
+    assert second.urls == first.urls
+
+
+def test_closing_the_stream_early_keeps_unconsumed_entries_for_next_run():
+    cursor = {}
+    with rss_server(10) as server:
+        stream = iter_official_rss(feeds=feeds(server, 1), use_cache=False, cursor=cursor)
+        taken = [next(stream) for _ in range(4)]
+        # 提前關閉前游標尚未寫回；關閉後只記下已被取走的 3 篇 (第 4 篇還沒要求下一篇)
+        assert cursor == {}
+        stream.close()
+        assert len(cursor["feeds"][f"{server.url}/feed/0.xml"]) == 3
+
+        rest = list(iter_official_rss(feeds=feeds(server, 1), use_cache=False, cursor=cursor))
+        assert len(rest) == 7
+        assert rest[0].url == taken[3].url
+        assert not {a.url for a in rest} & {a.url for a in taken[:3]}
+        assert list(iter_official_rss(feeds=feeds(server, 1), use_cache=False, cursor=cursor)) == []
+
+
+def test_batch_fetch_marks_every_returned_entry():
+    cursor = {}
+    with rss_server(5) as server:
+        first = fetch_official_rss_batch(feeds=feeds(server, 2), use_cache=False, cursor=cursor)
+        second = fetch_official_rss_batch(feeds=feeds(server, 2), use_cache=False, cursor=cursor)
+    assert len(first) == 10 and len(second) == 0
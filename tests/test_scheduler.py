@@ -0,0 +1,104 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.data_ingestion import scheduler as scheduler_module
+from src.data_ingestion.scheduler import CircuitBreaker, IngestionScheduler
+from src.data_ingestion.sources import ThreadedSource
+
+
+class HangingSource(ThreadedSource):
+    """先產出幾篇文章後卡住，模擬回應極慢的資料源。"""
+
+    def __init__(self, articles, hang=5.0, **kwargs):
+        super().__init__("hanging", **kwargs)
+        self.articles = articles
+        self.hang = hang
+
+    def iterate(self):
+        yield from self.articles
+        time.sleep(self.hang)
+
+
+class BrokenSource(ThreadedSource):
+    def __init__(self, name="broken", **kwargs):
+        super().__init__(name, **kwargs)
+        self.runs = 0
+        self.fail = True
+
+    def iterate(self):
+        self.runs += 1
+        if self.fail:
+            raise RuntimeError("plugin exploded")
+        return []
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_700_000_000.0)
+    monkeypatch.setattr(scheduler_module, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_hanging_source_times_out_without_blocking_others(article, list_source, tmp_path):
+    fast = list_source([article("Fast source story")], name="fast")
+    hanging = HangingSource([article("Slow source story")], timeout=0.3)
+    scheduler = IngestionScheduler([hanging, fast], breaker=CircuitBreaker(str(tmp_path / "health.json")))
+
+    started = time.monotonic()
+    results = scheduler.collect()
+
+    assert time.monotonic() - started < 2.0
+    assert [a.title for a in results["fast"]] == ["Fast source story"]
+    # 逾時前已取得的文章仍保留
+    assert [a.title for a in results["hanging"]] == ["Slow source story"]
+    assert scheduler.breaker._state["hanging"]["failures"] == 1
+    assert "timeout" in scheduler.breaker._state["hanging"]["last_error"]
+
+
+def test_raising_plugin_is_reported_and_isolated(article, list_source, tmp_path):
+    good = list_source([article("Healthy source story")], name="good")
+    broken = BrokenSource()
+    scheduler = IngestionScheduler([broken, good], breaker=CircuitBreaker(str(tmp_path / "health.json")))
+
+    async def emit(name, item):
+        pass
+
+    reports = asyncio.run(scheduler.run(emit))
+    assert reports == {"broken": {"status": "error", "count": 0}, "good": {"status": "ok", "count": 1}}
+    assert CircuitBreaker(str(tmp_path / "health.json"))._state["broken"]["last_error"] == "plugin exploded"
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_cooldown(clock, tmp_path):
+    path = str(tmp_path / "health.json")
+    broken = BrokenSource(failure_threshold=2, cooldown_minutes=10)
+
+    def run_once():
+        IngestionScheduler([broken], breaker=CircuitBreaker(path)).collect()
+
+    run_once()
+    run_once()
+    assert broken.runs == 2
+
+    # 斷路器開啟：冷卻期內直接略過，且狀態跨執行保存
+    clock.now += 9 * 60
+    run_once()
+    assert broken.runs == 2
+
+    # 冷卻期過後放行一次 (half-open)；再次失敗則重新計時
+    clock.now += 2 * 60
+    run_once()
+    assert broken.runs == 3
+    run_once()
+    assert broken.runs == 3
+
+    # 再等一個冷卻期，這次成功即重置
+    clock.now += 11 * 60
+    broken.fail = False
+    run_once()
+    assert broken.runs == 4
+    assert "broken" not in CircuitBreaker(path)._state
+    run_once()
+    assert broken.runs == 5
@@ -0,0 +1,90 @@
+import functools
+import hashlib
+
+import pytest
+
+import main
+from src.data_ingestion.scheduler import CircuitBreaker, IngestionScheduler
+from src.models.schemas import EvaluationResult, ScoredArticle
+from src.pipeline import streaming
+from src.scoring.prescreen import PreScreener
+
+EVENTS = [
+    "OpenAI raises new funding round at record valuation",
+    "Anthropic launches enterprise assistant with usage based pricing",
+    "Startup acquires robotics company to expand warehouse automation",
+    "Nvidia reports quarterly revenue growth driven by data center chips",
+    "Show HN: open source vector database written in Rust",
+    "European regulators open antitrust probe into cloud AI partnerships",
+]
+
+
+def fake_score(article) -> ScoredArticle:
+    """分數只取決於文章本身，與評分順序或批次切法無關。"""
+    score = int(hashlib.md5(article.url.encode("utf-8")).hexdigest(), 16) % 10
+    evaluation = EvaluationResult(reasoning="r", impact_score=score, specificity_score=0, novelty_score=0,
+                                  total_score=score, is_qualified=score >= 8)
+    return ScoredArticle(article=article, evaluation=evaluation)
+
+
+def fake_evaluate(articles, on_result=None, **kwargs):
+    results = [fake_score(a) for a in articles]
+    for item in results:
+        if on_result is not None:
+            on_result(item.article, item.evaluation)
+    return results
+
+
+async def fake_evaluate_async(articles, **kwargs):
+    return fake_evaluate(articles)
+
+
+@pytest.fixture
+def fixed_input(article):
+    articles = []
+    for i in range(30):
+        event = EVENTS[i % len(EVENTS)]
+        title = event if i % 3 else f"{event} update {i % 4}"
+        articles.append(article(title, url=f"https://site{i}.example/post", source=f"feed-{i}"))
+    return articles
+
+
+@pytest.fixture
+def modes(fixed_input, list_source, make_filter, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(main, "evaluate_events", fake_evaluate)
+    monkeypatch.setattr(streaming, "evaluate_events_async", fake_evaluate_async)
+
+    def staged():
+        scheduler = IngestionScheduler([list_source(fixed_input)], breaker=CircuitBreaker())
+        return main.run_staged(scheduler, make_filter())
+
+    def streamed():
+        scheduler = IngestionScheduler([list_source(fixed_input)], breaker=CircuitBreaker())
+        scored, _ = streaming.run_streaming_pipeline(scheduler, make_filter(), micro_batch_size=4,
+                                                     flush_interval=0.05, use_cache=False)
+        return scored
+
+    return staged, streamed
+
+
+def outcome(scored):
+    return sorted((s.article.url, s.evaluation.total_score, tuple(sorted(s.article.similar_sources))) for s in scored)
+
+
+def test_modes_agree_when_events_fit_in_top_k(modes):
+    staged, streamed = modes
+    staged_result = staged()
+    assert 1 < len(staged_result) <= len(EVENTS) * 4
+    assert outcome(streamed()) == outcome(staged_result)
+
+
+def test_streaming_skips_prescreen(modes, monkeypatch):
+    staged, streamed = modes
+    monkeypatch.setattr(main, "PreScreener", functools.partial(PreScreener, top_k=3, explore=0))
+
+    staged_urls = {s.article.url for s in staged()}
+    streamed_urls = {s.article.url for s in streamed()}
+    assert len(staged_urls) == 3
+    assert len(streamed_urls) > 3
+    assert staged_urls < streamed_urls
@@ -0,0 +1,46 @@
+from src.filtering import text_cleaning
+from src.filtering.text_cleaning import clean_text, clean_texts, strip_html
+
+
+def test_entities_are_decoded_once():
+    assert strip_html("AT&amp;T &lt;b&gt;not a tag&lt;/b&gt; &#8217;s") == "AT&T <b>not a tag</b> ’s"
+    assert strip_html("plain text with no markup") == "plain text with no markup"
+
+
+def test_script_style_and_template_content_is_dropped():
+    html = (
+        "<p>Hello</p><script>alert('<p>no</p>')</script><style>p { color: red }</style>"
+        "<template><b>hidden</b></template><div>World</div>"
+    )
+    assert clean_text(html) == "Hello World"
+    assert clean_text("<p>before<script>never closed</p> secret") == "before"
+
+
+def test_block_tags_separate_words():
+    assert clean_text("<li>one</li><li>two</li><br>three") == "one two three"
+
+
+def test_malformed_markup_keeps_visible_text():
+    assert clean_text("<div><p>Unclosed <b>bold") == "Unclosed bold"
+    assert clean_text("</p></div>stray end<br/>tags") == "stray end tags"
+    assert clean_text("a < b and c > d & e") == "a < b and c > d & e"
+    # 截斷在標籤中間時，不完整的標籤不會變成文字
+    assert clean_text('Read more at <a href="https://exa') == "Read more at"
+    assert clean_text('<a href="x">link</a text') == "link"
+
+
+def test_limit_stops_parsing_early():
+    html = "<p>" + "word " * 50_000 + "</p><p>TAIL</p>"
+    text = clean_text(html, max_chars=100)
+    assert len(text) == 100
+    assert "TAIL" not in strip_html(html, limit=100)
+
+
+def test_parallel_cleaning_matches_serial(monkeypatch):
+    texts = [f"<p>Item {i} &amp; <b>more</b></p><script>x()</script>" for i in range(40)]
+    serial = clean_texts(texts, max_chars=50, processes=1)
+
+    monkeypatch.setenv("CLEAN_PARALLEL_THRESHOLD", "10")
+    assert text_cleaning._MP_CONTEXT in ("forkserver", "spawn")
+    assert clean_texts(texts, max_chars=50, processes=2) == serial
+    assert serial[0][0] == "Item 0 & more"